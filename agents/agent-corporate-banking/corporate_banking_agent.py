@@ -3,66 +3,55 @@ Exposes customer relationships and loan exposure via MCP protocol
 """
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from session_pool import AgentPool, CONVERSATION_WINDOW
+from fast_path import FastPathRouter, remember, stream_text
+from tool_output import encode
+from loan_data import create_loan_store
+import asyncio
 import boto3
 import json
+import model_tiering
 import os
+import tracing
 
 app = BedrockAgentCoreApp()
 
-# Load hybrid data from S3
-s3 = boto3.client('s3')
+# Load hybrid data from S3: manifest now, bank/industry partitions as queries touch them
 S3_BUCKET = os.getenv('DATA_BUCKET', 'corporate-banking-891377397197')
-S3_KEY = 'data/customer_loans.json'
 
-def load_data_from_s3():
-    """Load customer loans data from S3"""
-    try:
-        response = s3.get_object(Bucket=S3_BUCKET, Key=S3_KEY)
-        return json.loads(response['Body'].read().decode('utf-8'))
-    except Exception as e:
-        print(f"Error loading data from S3: {e}")
-        return {"banks": []}
-
-CORPORATE_DATA = load_data_from_s3()
+# S3 client built on first load (LAZY_INIT defers both to the first tool call)
+LOANS = create_loan_store(lambda: boto3.client('s3'), S3_BUCKET)
+CORPORATE_DATA = LOANS.meta
 
 @tool
-def query_customer_loans(bank_name: str = None, customer_name: str = None, industry: str = None) -> str:
-    """Query customer relationships and loan exposure.
+def query_customer_loans(bank_name: str = None, customer_name: str = None, industry: str = None,
+                         limit: int = 50, cursor: str = None, fields: list[str] = None, sort_by: str = None) -> str:
+    """Query customer relationships and loan exposure, one page at a time.
     
     Args:
         bank_name: Filter by bank (JPMorgan Chase, Bank of America, Citigroup)
         customer_name: Filter by customer name
         industry: Filter by industry
+        limit: Maximum rows to return (default 50, max 500)
+        cursor: next_cursor from a previous call to fetch the following page
+        fields: Columns to return (bank, customer, industry, loan_amount_millions, credit_rating, loan_type, relationship_years)
+        sort_by: Sort column (loan_amount_millions, relationship_years, credit_rating, customer, bank, industry); prefix '-' for descending
     """
-    results = []
-    
-    for bank in CORPORATE_DATA["banks"]:
-        if bank_name and bank_name.lower() not in bank["bank_name"].lower():
-            continue
-            
-        for loan in bank["customer_loans"]:
-            if customer_name and customer_name.lower() not in loan["customer_name"].lower():
-                continue
-            if industry and industry.lower() not in loan["industry"].lower():
-                continue
-                
-            results.append({
-                "bank": bank["bank_name"],
-                "customer": loan["customer_name"],
-                "industry": loan["industry"],
-                "loan_amount_millions": loan["loan_amount_millions"],
-                "credit_rating": loan["credit_rating"],
-                "loan_type": loan["loan_type"],
-                "relationship_years": loan["relationship_years"]
-            })
+    try:
+        page = LOANS.book(bank=bank_name, industry=industry).query(
+            {"bank": bank_name, "customer": customer_name, "industry": industry},
+            limit=limit, cursor=cursor, fields=fields, sort_by=sort_by
+        )
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
     
-    return json.dumps({
+    return encode("query_customer_loans", {
         "lob": "Corporate Banking",
         "account_id": CORPORATE_DATA["account_id"],
         "data_source": CORPORATE_DATA["data_source"],
-        "results": results,
-        "total_results": len(results)
-    }, indent=2)
+        "results": page
+    })
 
 @tool
 def get_bank_aggregate_data(bank_name: str) -> str:
@@ -71,16 +60,16 @@ def get_bank_aggregate_data(bank_name: str) -> str:
     Args:
         bank_name: Bank name (JPMorgan Chase, Bank of America, Citigroup)
     """
-    for bank in CORPORATE_DATA["banks"]:
-        if bank_name.lower() in bank["bank_name"].lower():
-            return json.dumps({
-                "bank_name": bank["bank_name"],
-                "total_ci_loans_billions": bank["total_ci_loans_billions"],
-                "data_source_aggregate": bank["data_source_aggregate"],
-                "total_customers": bank["total_customers"],
-                "total_exposure_millions": bank["total_exposure_millions"],
-                "customer_breakdown_available": True
-            }, indent=2)
+    bank = LOANS.bank(bank_name)
+    if bank:
+        return encode("get_bank_aggregate_data", {
+            "bank_name": bank["bank_name"],
+            "total_ci_loans_billions": bank["total_ci_loans_billions"],
+            "data_source_aggregate": bank["data_source_aggregate"],
+            "total_customers": bank["total_customers"],
+            "total_exposure_millions": bank["total_exposure_millions"],
+            "customer_breakdown_available": True
+        })
     
     return json.dumps({"error": f"Bank {bank_name} not found"})
 
@@ -93,30 +82,49 @@ def get_industry_exposure(industry: str) -> str:
     """
     exposure_by_bank = {}
     
-    for bank in CORPORATE_DATA["banks"]:
-        bank_exposure = 0
-        customers = []
-        
-        for loan in bank["customer_loans"]:
-            if industry.lower() in loan["industry"].lower():
-                bank_exposure += loan["loan_amount_millions"]
-                customers.append(loan["customer_name"])
-        
-        if bank_exposure > 0:
-            exposure_by_bank[bank["bank_name"]] = {
-                "exposure_millions": bank_exposure,
-                "customers": customers
-            }
+    # Only the industry's partitions are read
+    for loan in LOANS.rows(industry=industry):
+        if industry.lower() in loan["industry"].lower():
+            bank = exposure_by_bank.setdefault(loan["bank"], {"exposure_millions": 0, "customers": []})
+            bank["exposure_millions"] += loan["loan_amount_millions"]
+            bank["customers"].append(loan["customer"])
+    exposure_by_bank = {name: b for name, b in exposure_by_bank.items() if b["exposure_millions"] > 0}
     
-    return json.dumps({
+    return encode("get_industry_exposure", {
         "industry": industry,
         "exposure_by_bank": exposure_by_bank,
         "total_exposure_millions": sum(b["exposure_millions"] for b in exposure_by_bank.values())
-    }, indent=2)
+    })
 
-# Create agent with MCP tools
-agent = Agent(tools=[query_customer_loans, get_bank_aggregate_data, get_industry_exposure])
-agent.system_prompt = """You are the Corporate Banking LOB Agent.
+# Fast path: structured prompts answered straight from the tools, no model call
+fast_path = FastPathRouter(lambda: {
+    "bank_name": [bank["bank_name"] for bank in CORPORATE_DATA["banks"]],
+    "industry": CORPORATE_DATA.get("industries", [])
+})
+fast_path.register(
+    get_industry_exposure,
+    [
+        r"(?:total )?(?:industry )?(?:loan )?exposure (?:to|for|in) (?:the )?(?P<industry>[a-z&' ]+?)(?: industry| sector)?",
+        r"(?P<industry>[a-z&' ]+?) (?:industry |sector )?(?:loan )?exposure"
+    ],
+    lambda r: f"Corporate Banking exposure to {r['industry']}: ${r['total_exposure_millions']}M in total. " + " ".join(
+        f"{bank}: ${b['exposure_millions']}M ({', '.join(b['customers'])})." if isinstance(b, dict)
+        else f"({b} banks not shown.)"  # Entries cut to fit the token budget
+        for bank, b in r["exposure_by_bank"].items()
+    )
+)
+fast_path.register(
+    get_bank_aggregate_data,
+    [
+        r"(?:aggregate|portfolio)(?: loan)?(?: portfolio)?(?: data| summary| totals)? (?:for|of) (?P<bank_name>[a-z.&' ]+)",
+        r"(?P<bank_name>[a-z.&' ]+?)(?:'s)? (?:aggregate|loan portfolio|portfolio)(?: data| summary| totals)?"
+    ],
+    lambda r: f"{r['bank_name']}: {r['total_customers']} corporate customers with ${r['total_exposure_millions']}M "
+              f"exposure in this LOB; total C&I loans ${r['total_ci_loans_billions']}B ({r['data_source_aggregate']})."
+)
+
+# Agent system prompt
+SYSTEM_PROMPT = """You are the Corporate Banking LOB Agent.
 
 You provide customer relationship data and loan exposure for:
 - JPMorgan Chase
@@ -130,13 +138,42 @@ Data Sources:
 Your tools are exposed via MCP protocol for cross-account access from the central orchestrator.
 """
 
+def create_agent():
+    """Build a fresh agent with a bounded conversation window"""
+    router = model_tiering.ModelRouter()
+    return Agent(
+        model=router.large,
+        hooks=[router],
+        tools=[query_customer_loans, get_bank_aggregate_data, get_industry_exposure],
+        system_prompt=SYSTEM_PROMPT,
+        conversation_manager=SlidingWindowConversationManager(window_size=CONVERSATION_WINDOW)
+    )
+
+# One agent per session; concurrent sessions never share conversation history
+agent_pool = AgentPool(create_agent)
+
 @app.entrypoint
 async def invoke(payload):
     """AgentCore entrypoint with MCP support"""
     user_message = payload.get("prompt", "Hello from Corporate Banking LOB!")
-    stream = agent.stream_async(user_message)
-    async for event in stream:
-        yield event
+    with tracing.trace("corporate_banking.invoke", traceparent=payload.get("traceparent")) as root, \
+            model_tiering.turn() as turn:
+        # Pick up intraday data deltas (polled at most every DATA_DELTA_POLL_SECONDS)
+        await asyncio.to_thread(LOANS.maybe_refresh)
+        # The tool may fetch partitions (or build the S3 client): keep it off the event loop
+        answer = await asyncio.to_thread(fast_path.route, user_message)
+        if answer is not None:
+            if payload.get("session_id"):
+                async with agent_pool.session(payload["session_id"]) as agent:
+                    remember(agent, user_message, answer)
+            for event in stream_text(answer):
+                yield event
+        else:
+            async with agent_pool.session(payload.get("session_id")) as agent:
+                async for event in turn.guard(agent.stream_async(user_message)):
+                    yield event
+    print(f"Trace {root.trace_id}: {json.dumps(root.summary)}")
+    yield {"metrics": {"trace": root.summary, "model_tier": turn.summary(), "fast_path": fast_path.stats()}}
 
 if __name__ == "__main__":
     app.run()
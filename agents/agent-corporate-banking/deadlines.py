@@ -0,0 +1,108 @@
+"""Request Deadlines
+One absolute deadline per request, set at the backend entry and carried to every hop so work stops when the caller has given up
+
+    with deadlines.scope(payload.get("deadline")):
+        timeout = deadlines.timeout(30)      # min(30, time left)
+        if deadlines.budget_low():           # skip optional work
+            ...
+
+Deadlines are epoch seconds (time.time()) so they mean the same thing in
+every account and process; scopes only ever tighten an outer deadline.
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+REQUEST_BUDGET_SECONDS = float(os.getenv('REQUEST_BUDGET_SECONDS', '28'))  # API Gateway cuts off at 29s
+LOW_BUDGET_SECONDS = float(os.getenv('DEADLINE_LOW_BUDGET_SECONDS', '2'))
+# Left for the answer's trip back when handing the deadline to the next hop
+HOP_MARGIN_SECONDS = float(os.getenv('DEADLINE_HOP_MARGIN_SECONDS', '0.25'))
+DEADLINE_KEY = 'deadline'
+
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before the work could start or finish"""
+
+
+def parse(value):
+    """Epoch-seconds deadline from a payload/header value, or None"""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def new(budget=REQUEST_BUDGET_SECONDS):
+    """Deadline `budget` seconds from now"""
+    return time.time() + budget
+
+
+def current():
+    return _deadline.get()
+
+
+@contextmanager
+def scope(deadline):
+    """Run the block under `deadline` (epoch seconds; None keeps the outer one)"""
+    deadline = parse(deadline)
+    outer = _deadline.get()
+    if deadline is None or (outer is not None and outer <= deadline):
+        yield outer
+        return
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:  # Exited from another context (async generator finalized elsewhere)
+            pass
+
+
+def downstream(margin=HOP_MARGIN_SECONDS):
+    """Deadline to hand the next hop: ours minus time for its answer to get back (None without one)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - margin
+
+
+def remaining():
+    """Seconds left (may be negative), or None without a deadline"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def budget_low(threshold=LOW_BUDGET_SECONDS):
+    """True when so little time is left that optional work should be skipped"""
+    left = remaining()
+    return left is not None and left < threshold
+
+
+def timeout(limit):
+    """`limit` seconds capped by the time left (never below zero)"""
+    left = remaining()
+    return limit if left is None else max(0.0, min(limit, left))
+
+
+def monotonic_deadline(limit):
+    """time.monotonic() deadline `limit` seconds from now, capped by the request deadline (for local waits)"""
+    return time.monotonic() + timeout(limit)
+
+
+def lambda_deadline(meta, context):
+    """Deadline for a gateway Lambda target: MCP request _meta or client context, capped by the Lambda's own timeout"""
+    deadline = parse(meta.get(DEADLINE_KEY)) if isinstance(meta, dict) else None
+    if deadline is None:
+        custom = getattr(getattr(context, 'client_context', None), 'custom', None) or {}
+        deadline = parse(custom.get(DEADLINE_KEY))
+    if hasattr(context, 'get_remaining_time_in_millis'):
+        own = time.time() + context.get_remaining_time_in_millis() / 1000
+        deadline = own if deadline is None else min(deadline, own)
+    return deadline
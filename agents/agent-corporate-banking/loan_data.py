@@ -0,0 +1,50 @@
+"""Corporate Banking Loan Data
+Partitioned, indexed loan store shared by the agent and the gateway Lambda
+"""
+from partition_store import PartitionStore
+
+# Best to worst, so an ascending sort lists the strongest credits first
+CREDIT_RATING_ORDER = ["AAA", "AA+", "AA", "AA-", "A+", "A", "A-", "BBB+", "BBB", "BBB-",
+                       "BB+", "BB", "BB-", "B+", "B", "B-", "CCC", "CC", "C", "D"]
+_RATING_RANK = {rating: rank for rank, rating in enumerate(CREDIT_RATING_ORDER)}
+
+SORT_FIELDS = {
+    "loan_amount_millions": None,
+    "relationship_years": None,
+    "credit_rating": lambda rating: _RATING_RANK.get(rating, len(_RATING_RANK)),
+    "customer": str.lower,
+    "bank": str.lower,
+    "industry": str.lower
+}
+TEXT_FIELDS = ("bank", "customer", "industry")
+
+
+def loan_record(bank_name, loan):
+    """Flat record for one customer loan"""
+    record = {
+        "bank": bank_name,
+        "customer": loan["customer_name"],
+        "industry": loan["industry"],
+        "loan_amount_millions": loan["loan_amount_millions"],
+        "credit_rating": loan["credit_rating"],
+        "loan_type": loan["loan_type"],
+        "relationship_years": loan["relationship_years"]
+    }
+    if "loan_id" in loan:  # Generated scale data keys its rows on loan_id
+        record["loan_id"] = loan["loan_id"]
+    return record
+
+
+def create_loan_store(s3, bucket):
+    """Loan store partitioned by bank and industry (manifest loaded now or on first use with LAZY_INIT)"""
+    return PartitionStore(
+        s3, bucket,
+        prefix='data/',
+        snapshot_key='data/customer_loans.json',
+        records_key='customer_loans',
+        to_record=loan_record,
+        partition_by=("bank", "industry"),
+        key_fields=("bank", "customer", "loan_type"),
+        sort_fields=SORT_FIELDS,
+        text_fields=TEXT_FIELDS
+    ).start()
@@ -0,0 +1,510 @@
+"""Partitioned LOB Data Store
+Reads only the S3 partitions a query's filters touch, fetched concurrently and cached
+"""
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+
+import deadlines
+import tracing
+from record_book import RecordBook, key_index
+
+try:
+    import ijson
+except ImportError:  # Snapshot fallback parses the whole body at once without it
+    ijson = None
+
+MANIFEST_NAME = 'manifest.json'
+DELTA_INDEX_NAME = 'deltas/index.json'
+MAX_FETCH_WORKERS = 16
+MAX_CACHED_BOOKS = 16
+DELTA_POLL_SECONDS = int(os.getenv('DATA_DELTA_POLL_SECONDS', '60'))
+# LAZY_INIT defers the S3 client and manifest load to the first tool call; PREWARM then runs it on a background thread
+LAZY_INIT = os.getenv('LAZY_INIT', 'false').lower() == 'true'
+PREWARM = os.getenv('PREWARM', 'false').lower() == 'true'
+
+
+def apply_changes(rows, changes, key_fields):
+    """New list of records with ("insert" | "update" | "delete", record) changes applied (rows is not modified)"""
+    if not changes:
+        return rows
+    position = key_index(rows, key_fields)
+    rows = list(rows)
+    for op, record in changes:
+        key = tuple(record[f] for f in key_fields)
+        if op == "delete":
+            if key in position:
+                rows[position.pop(key)] = None
+        elif key in position:
+            rows[position[key]] = record
+        else:
+            position[key] = len(rows)
+            rows.append(record)
+    return [r for r in rows if r is not None]
+
+
+def _snapshot_value_kind(prefix, records_key):
+    """What a JSON value at `prefix` is in a {"banks": [{..., records_key: [...]}]} snapshot"""
+    parts = prefix.split('.')
+    if len(parts) == 1 and parts[0] not in ('', 'banks'):
+        return 'meta', parts[0]
+    if len(parts) == 3 and parts[:2] == ['banks', 'item'] and parts[2] != records_key:
+        return 'bank', parts[2]
+    if parts == ['banks', 'item', records_key, 'item']:
+        return 'record', None
+    return None, None
+
+
+def iter_snapshot(body, records_key):
+    """Stream a snapshot body, yielding ("meta", (key, value)), ("record", raw) and ("bank", bank_meta).
+
+    Only one record (or one metadata value) is materialized at a time; the
+    raw bytes, the decoded text and the full object tree never coexist. A
+    bank's "bank" event follows its records, and records are tagged with
+    bank_name once it is known.
+    """
+    builder = capture = record = field = None
+    bank, held = {}, []
+
+    def finish_record():
+        if "bank_name" in bank:
+            record["bank_name"] = bank["bank_name"]
+            return True
+        held.append(record)
+        return False
+
+    for prefix, event, value in ijson.parse(body, use_float=True):
+        if record is not None:
+            # Records are (almost always) flat maps: fill them directly, nested values go through a builder
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == capture and event in ('end_map', 'end_array'):
+                    record[field], builder = builder.value, None
+            elif event == 'map_key':
+                field = value
+            elif event in ('start_map', 'start_array'):
+                builder, capture = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+            elif event == 'end_map':
+                if finish_record():
+                    yield 'record', record
+                record = None
+            else:
+                record[field] = value
+            continue
+
+        if builder is not None:
+            builder.event(event, value)
+            if prefix != capture[0] or event in ('start_map', 'start_array', 'map_key'):
+                continue
+            # Containers complete at their matching end event (inner events have longer prefixes)
+            _, kind, key = capture
+            value, builder = builder.value, None
+            if kind == 'meta':
+                yield 'meta', (key, value)
+            else:
+                bank[key] = value
+            continue
+
+        if prefix == 'banks.item' and event in ('start_map', 'end_map'):
+            if event == 'end_map':
+                for raw in held:
+                    raw["bank_name"] = bank.get("bank_name")
+                    yield 'record', raw
+                yield 'bank', bank
+            bank, held = {}, []
+            continue
+        if event in ('map_key', 'end_map', 'end_array'):
+            continue
+        kind, key = _snapshot_value_kind(prefix, records_key)
+        if kind == 'record':
+            record = {}
+        elif kind == 'meta' and event not in ('start_map', 'start_array'):
+            yield 'meta', (key, value)
+        elif kind == 'bank' and event not in ('start_map', 'start_array'):
+            bank[key] = value
+        elif kind is not None:
+            builder, capture = ijson.ObjectBuilder(), (prefix, kind, key)
+            builder.event(event, value)
+
+class Rows(list):
+    """Rows of the partitions a query touches; partial when the request deadline cut the fetch short"""
+    partial = False
+
+
+class PartitionStore:
+    """LOB records split into bank (and optionally industry) partitions.
+
+    The manifest (bank metadata plus one entry per partition) is loaded up
+    front; partition bodies are fetched on first use. When a bucket has no
+    manifest the monolithic snapshot is loaded and partitioned in memory,
+    so callers see the same interface either way.
+
+    Args:
+        s3: boto3 S3 client, or a zero-argument factory for one (called on first load)
+        bucket: Data bucket
+        prefix: Key prefix holding manifest.json and partitions/
+        snapshot_key: Monolithic snapshot used when there is no manifest
+        records_key: Per-bank list in the snapshot ("customer_loans" / "risk_models")
+        to_record: (bank_name, raw row) -> flat record
+        partition_by: Record fields partitions are split on, e.g. ("bank", "industry")
+        key_fields: Flat record fields identifying a row across delta files
+            (a manifest's own key_fields take precedence)
+        sort_fields / text_fields: Passed to RecordBook
+    """
+
+    def __init__(self, s3, bucket, prefix, snapshot_key, records_key, to_record,
+                 partition_by=("bank",), key_fields=(), sort_fields=(), text_fields=()):
+        self._s3 = s3
+        self._s3_factory = None if hasattr(s3, "get_object") else s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.snapshot_key = snapshot_key
+        self.records_key = records_key
+        self.to_record = to_record
+        self.partition_by = tuple(partition_by)
+        self.key_fields = tuple(key_fields)
+        self.sort_fields = sort_fields
+        self.text_fields = text_fields
+        self.meta = {"banks": []}
+        self.partitions = []
+        self.base_version = 0
+        self.version = 0
+        self._rows = {}  # partition path -> flat records
+        self._pending = {}  # partition path -> delta changes waiting for the partition to be fetched
+        self._books = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._last_poll = 0.0
+        self.timings = {}  # phase -> seconds (summed across fetch threads)
+        self._timing_lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, phase):
+        """Accumulate wall time under timings[phase] (client, fetch, parse, index)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._timing_lock:
+                self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+
+    @property
+    def s3(self):
+        if not hasattr(self._s3, "get_object"):
+            with self.timed("client"):
+                self._s3 = self._s3()
+        return self._s3
+
+    def reset_client(self):
+        """Drop the S3 client so the next call builds its own (a forked worker must not share the parent's sockets)"""
+        if self._s3_factory is not None:
+            self._s3 = self._s3_factory
+
+    def _get_object(self, key):
+        with self.timed("fetch"):
+            return self.s3.get_object(Bucket=self.bucket, Key=key)
+
+    def _get_json(self, key):
+        response = self._get_object(key)
+        with self.timed("parse"):
+            return json.loads(response['Body'].read().decode('utf-8'))
+
+    def start(self, lazy=None, prewarm=None):
+        """Load now, or (LAZY_INIT) on first use, optionally prewarmed on a background thread"""
+        lazy = LAZY_INIT if lazy is None else lazy
+        prewarm = PREWARM if prewarm is None else prewarm
+        if not lazy:
+            return self.load()
+        if prewarm:
+            threading.Thread(target=self.ensure_loaded, name="partition-store-prewarm", daemon=True).start()
+        return self
+
+    def ensure_loaded(self):
+        """Load once; concurrent first callers wait for the same load (e.g. a running prewarm)"""
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+        return self
+
+    def load(self):
+        """Load the manifest (or the monolithic snapshot as a fallback), then any deltas"""
+        try:
+            with tracing.span("data.load", prefix=self.prefix):
+                return self._load()
+        finally:
+            self._loaded = True
+
+    def _load(self):
+        self._rows.clear()
+        self._pending.clear()
+        self._books.clear()
+        s3 = self.s3  # Built before the try: a failing client factory must not raise again inside `except`
+        try:
+            manifest = self._get_json(self.prefix + MANIFEST_NAME)
+            self.partitions = manifest.pop("partitions")
+            self.partition_by = tuple(manifest.get("partition_by", self.partition_by))
+            self.key_fields = tuple(manifest.get("key_fields", self.key_fields))
+            self._set_meta(manifest)
+            self.base_version = self.version = manifest.get("data_version", 0)
+        except s3.exceptions.NoSuchKey:
+            pass
+        except Exception as e:
+            print(f"Error loading manifest: {e}")
+        else:
+            self._catch_up_or_log()
+            return self
+
+        try:
+            response = self._get_object(self.snapshot_key)
+            with self.timed("parse"):
+                if ijson:
+                    self._load_snapshot_events(iter_snapshot(response['Body'], self.records_key))
+                else:
+                    self.load_snapshot(json.loads(response['Body'].read().decode('utf-8')))
+        except Exception as e:
+            print(f"Error loading data from S3: {e}")
+            return self
+        self._catch_up_or_log()
+        return self
+
+    def _set_meta(self, meta):
+        # Updated in place so module-level aliases (CORPORATE_DATA, RISK_DATA) see reloads
+        self.meta.clear()
+        self.meta.update(meta)
+
+    def _record(self, raw):
+        """Flat record with its repeated strings (bank, industry, rating, ...) interned"""
+        record = self.to_record(raw["bank_name"], raw)
+        for field, value in record.items():
+            if type(value) is str:
+                record[field] = sys.intern(value)
+        return record
+
+    def load_snapshot(self, data):
+        """Partition an in-memory snapshot ({"banks": [{..., records_key: [...]}]})"""
+        def events():
+            for key, value in data.items():
+                if key != "banks":
+                    yield "meta", (key, value)
+            for bank in data.get("banks", []):
+                for raw in bank.get(self.records_key, []):
+                    yield "record", dict(raw, bank_name=bank["bank_name"])
+                yield "bank", {k: v for k, v in bank.items() if k != self.records_key}
+        self._load_snapshot_events(events())
+
+    def _load_snapshot_events(self, events):
+        grouped = OrderedDict()
+        meta, banks = {}, []
+        for kind, value in events:
+            if kind == "record":
+                record = self._record(value)
+                grouped.setdefault(tuple(record[f] for f in self.partition_by), []).append(record)
+            elif kind == "bank":
+                banks.append(value)
+            else:
+                meta[value[0]] = value[1]
+        meta["banks"] = banks
+        meta["industries"] = sorted({r["industry"] for rows in grouped.values() for r in rows})
+        self._set_meta(meta)
+        self.base_version = self.version = meta.get("data_version", 0)
+        self.partitions = []
+        self._rows.clear()
+        self._books.clear()
+        for key, rows in grouped.items():
+            self._rows[self._add_partition(key)] = rows
+
+    def _add_partition(self, key):
+        """Register an in-memory partition for partition values `key`; returns its path"""
+        path = "memory:" + "/".join(key)
+        self.partitions.append({"path": path, "rows": 0, **dict(zip(self.partition_by, key))})
+        self._rows[path] = []
+        return path
+
+    def _partition_path(self, record):
+        key = tuple(record[f] for f in self.partition_by)
+        for partition in self.partitions:
+            if tuple(partition.get(f) for f in self.partition_by) == key:
+                return partition["path"]
+        return self._add_partition(key)
+
+    def _delta_index(self):
+        self._last_poll = time.monotonic()
+        s3 = self.s3
+        try:
+            return self._get_json(self.prefix + DELTA_INDEX_NAME)
+        except s3.exceptions.NoSuchKey:
+            return None
+
+    def _apply_deltas(self, index):
+        for entry in index.get("deltas", []):
+            if entry["version"] > self.version:
+                self.apply_delta(self._get_json(self.prefix + entry["path"]))
+
+    def _catch_up(self):
+        """Apply deltas written against the base just loaded (none if the index is for another base)"""
+        index = self._delta_index()
+        if index and index.get("base_version", 0) == self.base_version:
+            self._apply_deltas(index)
+
+    def _catch_up_or_log(self):
+        """_catch_up(), keeping the base just loaded if a delta fails (the next refresh retries it)"""
+        try:
+            self._catch_up()
+        except Exception as e:
+            print(f"Error applying data deltas: {e}")
+
+    def refresh(self):
+        """Apply delta files published since the loaded version; reload after a compaction"""
+        index = self._delta_index()
+        if index is None:
+            return self
+        if index.get("base_version", 0) != self.base_version:
+            # Deltas were folded into a new base: start over from the new manifest
+            return self.load()
+        self._apply_deltas(index)
+        return self
+
+    def maybe_refresh(self):
+        """refresh() at most once per DELTA_POLL_SECONDS; errors keep serving the loaded data"""
+        if not self._loaded:
+            self.ensure_loaded()
+            return
+        if time.monotonic() - self._last_poll < DELTA_POLL_SECONDS:
+            return
+        try:
+            with tracing.span("data.refresh", version=self.version):
+                self.refresh()
+        except Exception as e:
+            print(f"Error applying data deltas: {e}")
+
+    def apply_delta(self, delta):
+        """Apply one delta file.
+
+        Changes to fetched partitions produce patched copies of their rows
+        and of every cached RecordBook over them, swapped in by reference
+        once all of them are built: a query running meanwhile keeps reading
+        the old, consistent objects, and a delta that fails (keys not unique)
+        changes nothing. Changes to partitions not fetched yet are held and
+        applied when the partition is read.
+        """
+        by_path = OrderedDict()
+        with self._lock:
+            for change in delta.get("changes", []):
+                record = self._record(change["row"])
+                by_path.setdefault(self._partition_path(record), []).append((change["op"], record))
+            rows, books = {}, dict(self._books)
+            for path, changes in by_path.items():
+                if path in self._rows:
+                    rows[path] = apply_changes(self._rows[path], changes, self.key_fields)
+                for key, book in books.items():
+                    if path in key:
+                        books[key] = book.patched(changes, self.key_fields)
+            self._rows.update(rows)
+            for path, changes in by_path.items():
+                if path not in self._rows:
+                    self._pending.setdefault(path, []).extend(changes)
+            for key, book in books.items():
+                self._books[key] = book
+            banks = {b["bank_name"]: b for b in delta.get("banks", [])}
+            if banks:
+                self.meta["banks"] = [banks.pop(b["bank_name"], b) for b in self.meta["banks"]] + list(banks.values())
+            industries = {r["industry"] for changes in by_path.values() for _, r in changes if "industry" in r}
+            if "industries" in self.meta and not industries <= set(self.meta["industries"]):
+                self.meta["industries"] = sorted(industries | set(self.meta["industries"]))
+            self.version = delta["version"]
+
+    def select(self, **filters):
+        """Partitions that can contain rows matching the (substring) filters"""
+        self.ensure_loaded()
+        selected = []
+        for partition in self.partitions:
+            if all(not value or field not in partition or str(value).lower() in partition[field].lower()
+                   for field, value in filters.items()):
+                selected.append(partition)
+        return selected
+
+    def _fetch(self, partition):
+        """Fetch, parse and store one partition, with any held delta changes applied"""
+        with tracing.span("data.fetch_partition", path=partition["path"]):
+            response = self._get_object(self.prefix + partition["path"])
+            with self.timed("parse"):
+                rows = [self._record(raw) for raw in map(json.loads, filter(None, response['Body'].iter_lines()))]
+        with self._lock:
+            if partition["path"] not in self._rows:
+                self._rows[partition["path"]] = apply_changes(
+                    rows, self._pending.get(partition["path"], []), self.key_fields)
+                self._pending.pop(partition["path"], None)
+
+    def _fetch_missing(self, selected):
+        """Fetch the selected partitions not in memory yet, in parallel.
+
+        Under a request deadline, returns False once it passes with fetches
+        still running; those finish in the background and are cached for
+        later queries.
+        """
+        missing = [p for p in selected if p["path"] not in self._rows]
+        if not missing:
+            return True
+        with tracing.span("data.fetch", partitions=len(missing)):
+            pool = ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(missing)))
+            futures = []
+            for partition in missing:
+                futures.append(pool.submit(tracing.bind(self._fetch), partition))
+            pool.shutdown(wait=False)
+            left = deadlines.remaining()
+            done, pending = wait(futures, timeout=None if left is None else max(0.0, left))
+            for future in done:
+                future.result()  # Surface fetch errors
+            return not pending
+
+    def rows(self, **filters):
+        """Flat records of every partition the filters touch (missing ones fetched in parallel)"""
+        selected = self.select(**filters)
+        complete = self._fetch_missing(selected)
+        rows = Rows(row for p in selected for row in self._rows.get(p["path"], ()))
+        rows.partial = not complete
+        return rows
+
+    def book(self, **filters):
+        """RecordBook over the pruned partitions; cached per partition set"""
+        key = tuple(p["path"] for p in self.select(**filters))
+        with self._lock:
+            if key in self._books:
+                self._books.move_to_end(key)
+                return self._books[key]
+            version = self.version
+        rows = self.rows(**filters)
+        with self.timed("index"), tracing.span("index.build", rows=len(rows)):
+            book = RecordBook(rows, sort_fields=self.sort_fields, text_fields=self.text_fields)
+        book.partial = rows.partial
+        with self._lock:
+            if self.version != version or book.partial:
+                # A delta landed while the book was being built, or not every partition arrived: don't cache it
+                return book
+            self._books[key] = book
+            while len(self._books) > MAX_CACHED_BOOKS:
+                self._books.popitem(last=False)
+        return book
+
+    def preload(self):
+        """Fetch every partition and build the unfiltered index now (a long-lived server, before forking workers)"""
+        self.ensure_loaded()
+        self.book()
+        return self
+
+    def bank(self, bank_name):
+        """Bank metadata for the first bank whose name contains bank_name"""
+        self.ensure_loaded()
+        for bank in self.meta["banks"]:
+            if bank_name.lower() in bank["bank_name"].lower():
+                return bank
+        return None
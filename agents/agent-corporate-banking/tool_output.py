@@ -0,0 +1,145 @@
+"""Compact Tool Output Encoding
+Keeps tool results small because every byte returned becomes model input tokens
+"""
+import json
+import os
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = int(os.getenv('TOOL_OUTPUT_TOKEN_BUDGET', '2000'))
+MAX_LIST_ITEMS = int(os.getenv('TOOL_OUTPUT_MAX_LIST_ITEMS', '25'))
+MARKER_RESERVE_CHARS = 96
+
+# Envelope fields the model never needs (it already knows which LOB tool it called)
+ENVELOPE_FIELDS = ("account_id", "note", "customer_breakdown_available")
+
+
+def _token_budgets():
+    """Per-tool overrides, e.g. TOOL_TOKEN_BUDGETS="query_customer_loans=1500,get_market_data=200" """
+    budgets = {}
+    for item in os.getenv('TOOL_TOKEN_BUDGETS', '').split(','):
+        name, _, value = item.partition('=')
+        if value.strip():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+TOKEN_BUDGETS = _token_budgets()
+
+
+def dumps(value):
+    """JSON without whitespace"""
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+# Progressively tighter (list items, dict items, string chars) caps, tried until a value fits its budget
+SHRINK_STEPS = ((MAX_LIST_ITEMS, None, None), (10, 10, 200), (5, 5, 80), (2, 2, 40), (1, 1, 16))
+
+
+def _shrink(value, max_items, max_keys=None, max_chars=None):
+    """Value with lists (and dicts, strings when capped) cut down, each cut noted in place"""
+    if isinstance(value, dict):
+        items = list(value.items())
+        kept = {k: _shrink(v, max_items, max_keys, max_chars) for k, v in items[:max_keys]}
+        if max_keys is not None and len(items) > max_keys:
+            kept["..."] = f"{len(items) - max_keys} more"
+        return kept
+    if isinstance(value, list):
+        kept = [_shrink(v, max_items, max_keys, max_chars) for v in value[:max_items]]
+        if len(value) > max_items:
+            kept.append(f"... {len(value) - max_items} more")
+        return kept
+    if max_chars is not None and isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "..."
+    return value
+
+
+def _compact_value(value):
+    return _shrink(value, *SHRINK_STEPS[0])
+
+
+def _fit(values, chars):
+    """Shrink each value of a dict (or list) with the loosest step that fits `chars`, else the tightest"""
+    for step in SHRINK_STEPS:
+        fitted = {k: _shrink(v, *step) for k, v in values.items()} if isinstance(values, dict) \
+            else [_shrink(v, *step) for v in values]
+        if len(dumps(fitted)) <= chars:
+            break
+    return fitted
+
+
+def _table(records):
+    """List of dicts -> header row + value rows (columns in first-seen order)"""
+    columns = []
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns.append(key)
+    rows = [[_compact_value(record.get(c)) for c in columns] for record in records]
+    return columns, rows
+
+
+def compact(tool_name, payload, rows_key="results", budget=None):
+    """Compact a tool payload to fit the tool's token budget.
+
+    Drops envelope fields, encodes payload[rows_key] as columns + rows and
+    truncates rows deterministically (in their existing order) when the
+    encoding would exceed the budget, recording how many were left out.
+    For a paginated record_book.Page the cut rows stay reachable instead:
+    next_cursor resumes right after the last row that fit. At least one
+    row is always returned (cut down itself if needed), so a cursor never
+    stalls. The other fields count against the same budget: nested lists,
+    dicts and long strings are capped more tightly until they fit.
+
+    A payload that is already compact (a LOB Lambda's columns + rows) is
+    passed through as is: its next_cursor points past its last row, so
+    cutting rows here would skip them. A plain row list that gets cut loses
+    any upstream next_cursor for the same reason.
+    """
+    if isinstance(payload.get("columns"), list) and isinstance(payload.get("rows"), list):
+        return {k: v for k, v in payload.items() if k not in ENVELOPE_FIELDS}
+    budget = budget or TOKEN_BUDGETS.get(tool_name, DEFAULT_TOKEN_BUDGET)
+    chars = budget * CHARS_PER_TOKEN - MARKER_RESERVE_CHARS
+    records = payload.get(rows_key)
+    out = _fit({k: v for k, v in payload.items() if k not in ENVELOPE_FIELDS and k != rows_key}, chars)
+    if not isinstance(records, list):
+        return out
+
+    columns, rows = _table(records)
+    if out.get("total_results") == len(rows):
+        del out["total_results"]
+    out["columns"] = columns
+
+    # Fixed cost of everything but the rows (room for more_rows / next_cursor is already reserved)
+    remaining = chars - len(dumps(out))
+    kept = 0
+    for row in rows:
+        remaining -= len(dumps(row)) + 1
+        if remaining < 0:
+            break
+        kept += 1
+    out["rows"] = rows[:kept]
+    if not kept and rows:
+        # Always return a row, cut down if it alone is over budget, so a cursor after it moves forward
+        out["rows"] = [_fit(rows[0], remaining + len(dumps(rows[0])) + 1)]
+        kept = 1
+    if hasattr(records, "cursor_after"):
+        next_cursor = records.cursor_after(kept)
+        if next_cursor:
+            out["next_cursor"] = next_cursor
+    elif kept < len(rows):
+        out.pop("next_cursor", None)
+        out["more_rows"] = len(rows) - kept
+    return out
+
+
+def encode(tool_name, payload, rows_key="results", budget=None):
+    """Compact payload as a JSON string for a strands tool result"""
+    return dumps(compact(tool_name, payload, rows_key, budget))
+
+
+def decode(payload):
+    """Expand a columns + rows table back into a list of dicts under "results" """
+    if "columns" in payload and "rows" in payload:
+        payload = dict(payload)
+        columns = payload.pop("columns")
+        payload["results"] = [dict(zip(columns, row)) for row in payload.pop("rows")]
+    return payload
@@ -0,0 +1,243 @@
+"""Request Tracing
+Spans for one request across the API Lambda, agents, gateway and LOB Lambdas, linked by W3C traceparent
+
+    with tracing.trace("lambda.handler", traceparent=incoming) as root:
+        with tracing.span("data.load"):
+            ...
+    root.summary  # {"trace_id", "total_ms", "critical_path": [{"span", "ms"}, ...]}
+
+Spans are only recorded inside a trace() block, so library code can open
+spans unconditionally at no cost outside a traced request. Finished traces
+go to the configured exporter (TRACE_EXPORTER=none | stdout | file, file
+path TRACE_FILE) as one JSON object per span; set_exporter() plugs in any
+object with an export(spans) method.
+"""
+import contextvars
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'none')
+TRACE_FILE = os.getenv('TRACE_FILE', '/tmp/traces.jsonl')
+TRACEPARENT_HEADER = 'traceparent'
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+_current = contextvars.ContextVar('tracing_span', default=None)
+
+
+class Span:
+    """One timed operation; spans of a trace in this process share one `spans` list"""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start', 'end', 'attributes', 'spans', 'summary')
+
+    def __init__(self, name, trace_id, parent_id, spans, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end = None
+        self.attributes = attributes
+        self.spans = spans
+        self.summary = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            "attributes": self.attributes
+        }
+
+
+class NullExporter:
+    def export(self, spans):
+        pass
+
+
+class StdoutExporter:
+    """One JSON line per span on stdout (CloudWatch Logs in Lambda and AgentCore)"""
+
+    def export(self, spans):
+        for s in spans:
+            print(json.dumps({"span": s}, default=str))
+
+
+class FileExporter:
+    """Appends one JSON line per span to a local file for offline analysis (bench/trace_report.py)"""
+
+    def __init__(self, path=TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = "".join(json.dumps(s, default=str) + "\n" for s in spans)
+        with self._lock, open(self.path, 'a') as f:
+            f.write(lines)
+
+
+EXPORTERS = {"none": NullExporter, "stdout": StdoutExporter, "file": FileExporter}
+_exporter = EXPORTERS.get(TRACE_EXPORTER, NullExporter)()
+
+
+def set_exporter(exporter):
+    """Route finished traces to `exporter` (anything with export(list_of_span_dicts))"""
+    global _exporter
+    _exporter = exporter or NullExporter()
+
+
+def parse_traceparent(value):
+    """(trace_id, parent span_id) from a traceparent header, or None if absent/invalid"""
+    match = _TRACEPARENT.match(value.strip().lower()) if isinstance(value, str) else None
+    return match.groups() if match else None
+
+
+def current_span():
+    return _current.get()
+
+
+def traceparent():
+    """traceparent header value for the current span (None outside a trace)"""
+    span = _current.get()
+    return span.traceparent if span else None
+
+
+def inject(headers):
+    """Add the current traceparent to an outgoing headers dict"""
+    value = traceparent()
+    if value:
+        headers[TRACEPARENT_HEADER] = value
+    return headers
+
+
+def lambda_traceparent(meta, context):
+    """Incoming traceparent for a gateway Lambda target: MCP request _meta, else the client context"""
+    if isinstance(meta, dict) and meta.get(TRACEPARENT_HEADER):
+        return meta[TRACEPARENT_HEADER]
+    client_context = getattr(context, 'client_context', None)
+    custom = getattr(client_context, 'custom', None) or {}
+    return custom.get(TRACEPARENT_HEADER)
+
+
+@contextmanager
+def _activate(span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.attributes["error"] = repr(e)
+        raise
+    finally:
+        span.end = time.time()
+        span.spans.append(span)
+        try:
+            _current.reset(token)
+        except ValueError:  # Exited from another context (e.g. an async generator finalized elsewhere)
+            pass
+
+
+@contextmanager
+def span(name, **attributes):
+    """Child span of the current span; a no-op (yields None) outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(Span(name, parent.trace_id, parent.span_id, parent.spans, attributes)) as child:
+        yield child
+
+
+@contextmanager
+def trace(name, traceparent=None, **attributes):
+    """Root span for this process's part of a request.
+
+    Continues the caller's trace when `traceparent` is valid, otherwise
+    starts a new one. On exit the root's `summary` holds the critical path
+    and the trace's spans are exported.
+    """
+    remote = parse_traceparent(traceparent)
+    trace_id, parent_id = remote if remote else (secrets.token_hex(16), None)
+    root = Span(name, trace_id, parent_id, [], attributes)
+    try:
+        with _activate(root):
+            yield root
+    finally:
+        spans = [s.to_dict() for s in root.spans]
+        root.summary = summarize(spans, root.span_id)
+        try:
+            _exporter.export(spans)
+        except Exception as e:
+            print(f"Error exporting trace {trace_id}: {e}", file=sys.stderr)
+
+
+def bind(fn):
+    """fn running in the caller's trace context (for thread pools, which don't inherit it)"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def _root(spans):
+    by_id = {s["span_id"] for s in spans}
+    roots = [s for s in spans if s["parent_id"] not in by_id]
+    return min(roots, key=lambda s: s["start"]) if roots else None
+
+
+def critical_path(spans, root_id=None):
+    """Spans on the critical path with the time each one alone accounts for, in start order.
+
+    Walks back from the root's end: the child that finished last is on the
+    path, then the child that finished last before that one started, and so
+    on; time not covered by a child on the path belongs to the parent.
+    Takes span dicts (to_dict() / exported JSON), possibly from several
+    processes of one trace; the last child's end is clamped to its parent's
+    so small clock skew between processes doesn't drop a remote subtree.
+    """
+    children = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+    root = next((s for s in spans if s["span_id"] == root_id), None) if root_id else _root(spans)
+    if root is None:
+        return []
+
+    path = []
+
+    def walk(span, end):
+        cursor, own = end, 0.0
+        for child in sorted(children.get(span["span_id"], []), key=lambda c: c["end"], reverse=True):
+            if child["start"] >= cursor or (cursor < end and child["end"] > cursor):
+                continue
+            child_end = min(child["end"], cursor)
+            own += cursor - child_end
+            walk(child, child_end)
+            cursor = max(child["start"], span["start"])
+        own += max(0.0, cursor - span["start"])
+        path.append((span["start"], span["name"], own))
+
+    walk(root, root["end"])
+    return [{"span": name, "ms": round(own * 1000, 3)} for _, name, own in sorted(path, key=lambda p: p[0])]
+
+
+def summarize(spans, root_id=None):
+    """Critical-path summary attached to request metrics"""
+    root = next((s for s in spans if s["span_id"] == root_id), None) if root_id else _root(spans)
+    return {
+        "trace_id": root["trace_id"] if root else None,
+        "total_ms": root["duration_ms"] if root else 0.0,
+        "critical_path": critical_path(spans, root["span_id"]) if root else []
+    }
@@ -0,0 +1,144 @@
+"""Async AgentCore Gateway Client
+Non-blocking JSON-RPC calls from the orchestrator to the LOB MCP gateways
+"""
+import asyncio
+import itertools
+import json
+import os
+import time
+import weakref
+
+import aiohttp
+
+import deadlines
+import hedging
+import rate_limit
+import tracing
+
+GATEWAY_TIMEOUT_SECONDS = float(os.getenv('GATEWAY_TIMEOUT_SECONDS', '30'))
+GATEWAY_MAX_CONNECTIONS = int(os.getenv('GATEWAY_MAX_CONNECTIONS', '100'))
+GATEWAY_MAX_RETRIES = int(os.getenv('GATEWAY_MAX_RETRIES', '2'))
+GATEWAY_RETRY_BACKOFF_SECONDS = float(os.getenv('GATEWAY_RETRY_BACKOFF_SECONDS', '0.2'))
+# Throttled or overloaded: the limiter has already backed off, so these are worth one more try
+RETRYABLE_STATUSES = (429, 503)
+
+# aiohttp sessions are bound to the loop that created them, so keep one per loop
+_sessions = weakref.WeakKeyDictionary()
+_request_ids = itertools.count(1)
+
+
+def get_session():
+    """Return the shared keep-alive HTTP session for the running event loop"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=GATEWAY_TIMEOUT_SECONDS),
+            connector=aiohttp.TCPConnector(limit=GATEWAY_MAX_CONNECTIONS)
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_session():
+    """Close the running loop's HTTP session (tests and graceful shutdown)"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+async def call_tool(gateway_url, tool_name, arguments, hedge=False):
+    """Invoke an MCP tool through a gateway with JSON-RPC tools/call.
+
+    Calls are paced by the gateway's limiter (token bucket plus adaptive
+    concurrency) and throttled calls (429/503) are retried after a backoff
+    while the queue deadline allows. hedge=True marks the tool idempotent:
+    with GATEWAY_HEDGING on, a call slower than recent latency gets a
+    backup request and the first answer wins. Returns the JSON-RPC result
+    (or the raw body if it has none), or an error dict when the gateway
+    answers with a non-200 status or the call can't be admitted in time.
+
+    Under a request deadline (deadlines.scope) the queue wait and HTTP
+    timeout are capped by the time left, the deadline travels to the
+    Lambda in the request's _meta, and hedging is skipped when the budget
+    is low; a call the caller can no longer use is not sent at all.
+    """
+    if deadlines.expired():
+        return {"error": "Request deadline exceeded; call not sent"}
+    limiter = rate_limit.limiter_for(gateway_url)
+    policy = hedging.policy_for(gateway_url)
+    deadline = deadlines.monotonic_deadline(limiter.queue_timeout)
+
+    async def send(is_hedge=False):
+        return await _post(limiter, deadline, gateway_url, tool_name, arguments, policy, is_hedge)
+
+    for attempt in range(GATEWAY_MAX_RETRIES + 1):
+        try:
+            if hedge and hedging.GATEWAY_HEDGING and not deadlines.budget_low():
+                status, result, retry_after = await hedging.hedged(policy, send, lambda r: r[0] == 200)
+            else:
+                status, result, retry_after = await send()
+        except rate_limit.RateLimitTimeout as e:
+            return {"error": f"Gateway busy: {e}, retry later"}
+        except asyncio.TimeoutError:
+            return {"error": "Gateway call timed out within the request's time budget"}
+        if status not in RETRYABLE_STATUSES:
+            return result
+        delay = retry_after if retry_after is not None else GATEWAY_RETRY_BACKOFF_SECONDS * 2 ** attempt
+        if attempt == GATEWAY_MAX_RETRIES or time.monotonic() + delay > deadline:
+            return result
+        await asyncio.sleep(delay)
+
+
+async def _post(limiter, deadline, gateway_url, tool_name, arguments, policy, is_hedge=False):
+    """One admitted tools/call; returns (status, result, Retry-After seconds)"""
+    session = get_session()
+    async with limiter.slot(deadline) as slot:
+        with tracing.span("gateway.http", tool=tool_name, hedge=is_hedge) as span:
+            request = {
+                "jsonrpc": "2.0",
+                "method": "tools/call",
+                "params": {
+                    "name": tool_name,
+                    "arguments": arguments
+                },
+                "id": next(_request_ids)
+            }
+            headers = tracing.inject({})
+            meta = dict(headers)  # Trace context rides in both the HTTP header and the MCP request metadata
+            if deadlines.current() is not None:
+                meta[deadlines.DEADLINE_KEY] = deadlines.downstream()
+            if meta:
+                request["params"]["_meta"] = meta
+            timeout = aiohttp.ClientTimeout(total=deadlines.timeout(GATEWAY_TIMEOUT_SECONDS))
+            async with session.post(gateway_url, json=request, headers=headers, timeout=timeout) as response:
+                slot.status = response.status
+                if span:
+                    span.set(status=response.status)
+                if response.status != 200:
+                    return response.status, {"error": f"Gateway returned {response.status}"}, _retry_after(response)
+                result = await response.json(content_type=None)
+                policy.record(time.monotonic() - slot.start)
+                return response.status, result.get('result', result), None
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def result_payload(result):
+    """Unwrap MCP text content so LOB JSON is not re-escaped inside another JSON document.
+
+    Returns the parsed object when the content is JSON, the raw text otherwise,
+    and the result unchanged when it carries no MCP content blocks.
+    """
+    if not isinstance(result, dict) or not isinstance(result.get('content'), list):
+        return result
+    text = "".join(block.get('text', '') for block in result['content'] if block.get('type') == 'text')
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
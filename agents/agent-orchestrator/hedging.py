@@ -0,0 +1,106 @@
+"""Hedged Gateway Requests
+Backup request for idempotent tool calls that outlive a percentile of recent latency; the first answer wins
+"""
+import asyncio
+import math
+import os
+from collections import deque
+
+GATEWAY_HEDGING = os.getenv('GATEWAY_HEDGING', 'false').lower() == 'true'
+HEDGE_PERCENTILE = float(os.getenv('GATEWAY_HEDGE_PERCENTILE', '95'))
+# Extra calls allowed per primary call (0.05 = at most ~5% more gateway load)
+HEDGE_BUDGET = float(os.getenv('GATEWAY_HEDGE_BUDGET', '0.05'))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv('GATEWAY_HEDGE_MIN_DELAY_MS', '20')) / 1000
+HEDGE_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_SAVED = 10  # Budget banked while idle, so a burst of slow calls can still be hedged
+
+
+class HedgePolicy:
+    """Recent latencies and hedge budget for one gateway.
+
+    Args:
+        percentile: Hedge once a call has run longer than this percentile of recent latency
+        budget: Hedges earned per primary call
+        min_delay: Never hedge sooner than this (seconds)
+    """
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET, min_delay=HEDGE_MIN_DELAY_SECONDS):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.latencies = deque(maxlen=HEDGE_WINDOW)
+        self.tokens = 0.0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, latency):
+        self.latencies.append(latency)
+
+    def delay(self):
+        """Seconds to wait before hedging, or None until there are enough samples"""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered) - 1, max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1))
+        return max(self.min_delay, ordered[rank])
+
+    def start_call(self):
+        self.calls += 1
+        self.tokens = min(HEDGE_MAX_SAVED, self.tokens + self.budget)
+
+    def try_spend(self):
+        """Take one hedge from the budget"""
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        self.hedges += 1
+        return True
+
+
+async def hedged(policy, attempt, succeeded):
+    """Run attempt(hedge: bool) and, if it is still running after policy.delay(), a backup.
+
+    The first result for which succeeded(result) is true wins and the other
+    attempt is cancelled; if neither succeeds the primary's result (or
+    error) is returned.
+    """
+    policy.start_call()
+    primary = asyncio.ensure_future(attempt(False))
+    attempts = [primary]
+    try:
+        delay = policy.delay()
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not policy.try_spend():
+            return await primary
+
+        backup = asyncio.ensure_future(attempt(True))
+        attempts.append(backup)
+        pending = set(attempts)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and succeeded(task.result()):
+                    if task is backup:
+                        policy.hedge_wins += 1
+                    return task.result()
+        return await primary
+    finally:
+        # Also reached when the caller is cancelled mid-wait: no attempt outlives the call
+        for task in attempts:
+            if not task.done():
+                task.cancel()
+
+
+_policies = {}
+
+
+def policy_for(gateway_url):
+    """Shared hedge policy for a gateway URL"""
+    policy = _policies.get(gateway_url)
+    if policy is None:
+        policy = _policies[gateway_url] = HedgePolicy()
+    return policy
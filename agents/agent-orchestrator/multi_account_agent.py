@@ -1,8 +1,14 @@
 """Multi-Account Trade Finance Risk Assessment Agent"""
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from session_pool import AgentPool, CONVERSATION_WINDOW
+from tool_output import encode
+import asyncio
 import boto3
 import json
+import model_tiering
+import prompt_cache
 
 app = BedrockAgentCoreApp()
 
@@ -25,14 +31,21 @@ def assume_role(role_arn: str, session_name: str = "MultiAccountAgent"):
         'aws_session_token': credentials['SessionToken']
     }
 
+def lob_s3_client(role_arn: str):
+    """S3 client in a child account via the cross-account role (blocking)"""
+    return boto3.client('s3', **assume_role(role_arn))
+
 @tool
-def assess_trade_finance_risk(company_name: str) -> str:
+async def assess_trade_finance_risk(company_name: str) -> str:
     """Comprehensive trade finance risk assessment combining financial and trade data."""
     try:
-        # Corporate Banking LOB - Get real SEC data
+        # Corporate Banking + Treasury & Risk LOBs - STS calls run off the event loop, in parallel
         role_arn_corporate = "arn:aws:iam::891377397197:role/CentralAccountAccessRole"
-        credentials_corporate = assume_role(role_arn_corporate)
-        s3_corporate = boto3.client('s3', **credentials_corporate)
+        role_arn_treasury = "arn:aws:iam::058264155998:role/CentralAccountAccessRole"
+        s3_corporate, s3_treasury = await asyncio.gather(
+            asyncio.to_thread(lob_s3_client, role_arn_corporate),
+            asyncio.to_thread(lob_s3_client, role_arn_treasury)
+        )
         
         # Map company to ticker
         ticker_map = {
@@ -58,11 +71,6 @@ def assess_trade_finance_risk(company_name: str) -> str:
                 "HON": {"revenue": "$36B", "position": "industrial technology leader", "margins": "strong", "revenue_type": "recurring services", "operations": "global"}
             }.get(ticker, {})
         
-        # Treasury & Risk LOB
-        role_arn_treasury = "arn:aws:iam::058264155998:role/CentralAccountAccessRole"
-        credentials_treasury = assume_role(role_arn_treasury)
-        s3_treasury = boto3.client('s3', **credentials_treasury)
-        
         country_map = {
             "Caterpillar": "CHN",
             "Boeing": "CHN",
@@ -93,13 +101,12 @@ def assess_trade_finance_risk(company_name: str) -> str:
         return json.dumps({"error": str(e)})
 
 @tool
-def query_country_risks(country: str) -> str:
+async def query_country_risks(country: str) -> str:
     """Query trade risks for a specific country from Treasury & Risk LOB."""
     try:
         # Treasury & Risk LOB
         role_arn_treasury = "arn:aws:iam::058264155998:role/CentralAccountAccessRole"
-        credentials_treasury = assume_role(role_arn_treasury)
-        s3_treasury = boto3.client('s3', **credentials_treasury)
+        s3_treasury = await asyncio.to_thread(lob_s3_client, role_arn_treasury)
         
         # Map country names to codes
         country_codes = {
@@ -126,13 +133,13 @@ def query_country_risks(country: str) -> str:
         }
         
         if country_code in country_profiles:
-            return json.dumps({
+            return encode("query_country_risks", {
                 "success": True,
                 "country": country,
                 "treasury_risk_access": "SUCCESS - Real World Bank data accessed",
                 "profile": country_profiles[country_code],
                 "data_source": "World Bank API + Trade Risk Analysis"
-            }, indent=2)
+            })
         else:
             return json.dumps({
                 "success": False,
@@ -142,9 +149,9 @@ def query_country_risks(country: str) -> str:
     except Exception as e:
         return json.dumps({"success": False, "error": str(e)})
 
-# Create agent
-agent = Agent(tools=[assess_trade_finance_risk, query_country_risks])
-agent.system_prompt = """You are a Corporate Credit Risk Assessment specialist.
+# Agent system prompt - stable across requests (with the example memo, the bulk of every model call's input),
+# so it sits ahead of a cache checkpoint; keep per-request details out of it
+SYSTEM_PROMPT = """You are a Corporate Credit Risk Assessment specialist.
 
 CRITICAL: YOU MUST FOLLOW THESE INSTRUCTIONS EXACTLY. NO DEVIATIONS ALLOWED.
 
@@ -171,13 +178,32 @@ FAILURE TO FOLLOW THIS EXACT FORMAT WILL RESULT IN RESPONSE REJECTION.
 YOU HAVE NO CREATIVE FREEDOM - FOLLOW THE RULES EXACTLY.
 COUNT YOUR PARAGRAPHS (3-4) AND SENTENCES (4-6 each) BEFORE RESPONDING."""
 
+def create_agent():
+    """Build a fresh agent with a bounded conversation window"""
+    router = model_tiering.ModelRouter(*model_tiering.models(prompt_cache.model), prose=True)
+    return Agent(
+        model=router.large,
+        hooks=[router],
+        tools=[assess_trade_finance_risk, query_country_risks],
+        system_prompt=prompt_cache.system_prompt(SYSTEM_PROMPT),
+        conversation_manager=SlidingWindowConversationManager(window_size=CONVERSATION_WINDOW)
+    )
+
+# One agent per session; concurrent sessions never share conversation history
+agent_pool = AgentPool(create_agent)
+
 @app.entrypoint
 async def invoke(payload):
     """AgentCore entrypoint"""
     user_message = payload.get("prompt", "Hello! I'm your Multi-Account Trade Finance Agent.")
-    stream = agent.stream_async(user_message)
-    async for event in stream:
-        yield event
+    usage = prompt_cache.CacheUsage()
+    async with agent_pool.session(payload.get("session_id")) as agent:
+        with model_tiering.turn() as turn:
+            async for event in turn.guard(agent.stream_async(user_message), on_discard=usage.observe_rejected):
+                usage.observe(event)
+                yield event
+    print(f"Prompt cache: {json.dumps(usage.stats())}")
+    yield {"metrics": {"prompt_cache": usage.stats(), "model_tier": turn.summary()}}
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
@@ -1,63 +1,91 @@
 """Centralized Hub-and-Spoke Orchestrator Agent"""
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from session_pool import AgentPool, CONVERSATION_WINDOW
+from tool_output import encode
+import deadlines
+import gateway_client
 import json
-import requests
+import model_tiering
+import os
+import prefetch
+import prompt_cache
+import tracing
 
 app = BedrockAgentCoreApp()
 
-# Gateway URLs
-CORPORATE_BANKING_GATEWAY = "https://corporate-banking-gateway-noauth-vd51qkmqqy.gateway.bedrock-agentcore.us-east-1.amazonaws.com/mcp"
-TREASURY_RISK_GATEWAY = "https://treasury-risk-gateway-noauth-w7wh7wboyx.gateway.bedrock-agentcore.us-east-1.amazonaws.com/mcp"
+# Gateway URLs (or a LOB's long-lived mcp_http_server, which speaks the same protocol)
+CORPORATE_BANKING_GATEWAY = os.getenv('CORPORATE_BANKING_GATEWAY_URL', "https://corporate-banking-gateway-noauth-vd51qkmqqy.gateway.bedrock-agentcore.us-east-1.amazonaws.com/mcp")
+TREASURY_RISK_GATEWAY = os.getenv('TREASURY_RISK_GATEWAY_URL', "https://treasury-risk-gateway-noauth-w7wh7wboyx.gateway.bedrock-agentcore.us-east-1.amazonaws.com/mcp")
+
+# Follow-up calls started while the model reads a result, served from cache if it asks for them
+prefetcher = prefetch.Prefetcher()
+
+@prefetcher.rule("query_customer_loans")
+def risk_models_for_loan_industries(arguments, payload):
+    """Loans in some industries are almost always followed by the risk models for those industries"""
+    return [(TREASURY_RISK_GATEWAY, "treasury-risk-tools___query_risk_models", {"industry": industry})
+            for industry in prefetch.column_values(payload, "industry")]
+
+DEADLINE_NOTICE = "\n\n[Response cut short: the request's time budget ran out.]"
+
+def stream_text(text):
+    """Text in the Agent.stream_async event shape"""
+    yield {"event": {"contentBlockDelta": {"delta": {"text": text}}}}
+    yield {"event": {"messageStop": {"stopReason": "end_turn"}}}
+
+def tool_result(tool_name, result):
+    """Gateway result as compact model input (LOB JSON passed through, not re-wrapped)"""
+    payload = gateway_client.result_payload(result)
+    return encode(tool_name, payload) if isinstance(payload, dict) else str(payload)
 
 @tool
-def query_customer_loans(bank_name: str = None, customer_name: str = None, industry: str = None) -> str:
-    """Query customer loans from Corporate Banking LOB."""
+async def query_customer_loans(bank_name: str = None, customer_name: str = None, industry: str = None,
+                               limit: int = None, cursor: str = None, fields: list[str] = None, sort_by: str = None) -> str:
+    """Query customer loans from Corporate Banking LOB.
+
+    Results are paged: pass the returned next_cursor to get more rows. Use
+    fields to request only the columns you need and sort_by (prefix '-' for
+    descending, e.g. "-loan_amount_millions") to get the largest loans first.
+    """
     try:
-        response = requests.post(
-            CORPORATE_BANKING_GATEWAY,
-            json={
-                "jsonrpc": "2.0",
-                "method": "tools/call",
-                "params": {
-                    "name": "corporate-banking-tools___query_customer_loans",
-                    "arguments": {k: v for k, v in {"bank_name": bank_name, "customer_name": customer_name, "industry": industry}.items() if v}
-                },
-                "id": 1
-            }
-        )
-        if response.status_code == 200:
-            result = response.json()
-            return json.dumps(result.get('result', result))
-        return json.dumps({"error": f"Gateway returned {response.status_code}"})
+        with tracing.span("tool.query_customer_loans"):
+            result = await prefetcher.call_tool(
+                CORPORATE_BANKING_GATEWAY,
+                "corporate-banking-tools___query_customer_loans",
+                {k: v for k, v in {"bank_name": bank_name, "customer_name": customer_name, "industry": industry,
+                                   "limit": limit, "cursor": cursor, "fields": fields, "sort_by": sort_by}.items() if v},
+                hedge=True
+            )
+        return tool_result("query_customer_loans", result)
     except Exception as e:
         return json.dumps({"error": str(e)})
 
 @tool
-def query_risk_models(bank_name: str = None, industry: str = None) -> str:
-    """Query risk models from Treasury & Risk LOB."""
+async def query_risk_models(bank_name: str = None, industry: str = None,
+                            limit: int = None, cursor: str = None, fields: list[str] = None, sort_by: str = None) -> str:
+    """Query risk models from Treasury & Risk LOB.
+
+    Results are paged: pass the returned next_cursor to get more rows. Use
+    fields to request only the columns you need and sort_by (prefix '-' for
+    descending, e.g. "-expected_loss_pct") to rank models.
+    """
     try:
-        response = requests.post(
-            TREASURY_RISK_GATEWAY,
-            json={
-                "jsonrpc": "2.0",
-                "method": "tools/call",
-                "params": {
-                    "name": "treasury-risk-tools___query_risk_models",
-                    "arguments": {k: v for k, v in {"bank_name": bank_name, "industry": industry}.items() if v}
-                },
-                "id": 1
-            }
-        )
-        if response.status_code == 200:
-            result = response.json()
-            return json.dumps(result.get('result', result))
-        return json.dumps({"error": f"Gateway returned {response.status_code}"})
+        with tracing.span("tool.query_risk_models"):
+            result = await prefetcher.call_tool(
+                TREASURY_RISK_GATEWAY,
+                "treasury-risk-tools___query_risk_models",
+                {k: v for k, v in {"bank_name": bank_name, "industry": industry,
+                                   "limit": limit, "cursor": cursor, "fields": fields, "sort_by": sort_by}.items() if v},
+                hedge=True
+            )
+        return tool_result("query_risk_models", result)
     except Exception as e:
         return json.dumps({"error": str(e)})
 
-agent = Agent(tools=[query_customer_loans, query_risk_models])
-agent.system_prompt = """You are a Corporate Banking Credit Risk Orchestrator Agent.
+# Stable across requests: sent ahead of a cache checkpoint, so keep per-request details out of it
+SYSTEM_PROMPT = """You are a Corporate Banking Credit Risk Orchestrator Agent.
 
 ARCHITECTURE: Hub-and-Spoke with AgentCore MCP Gateways
 - Central Account: 164543933824 (You are here)
@@ -72,13 +100,51 @@ RESPONSE FORMAT:
 - Flowing narrative prose
 """
 
+def create_agent():
+    """Build a fresh agent with a bounded conversation window"""
+    # Small model for tool selection and short turns, large for the memo (each model keeps its own prompt cache)
+    router = model_tiering.ModelRouter(*model_tiering.models(prompt_cache.model), prose=True)
+    return Agent(
+        model=router.large,
+        hooks=[router],
+        tools=[query_customer_loans, query_risk_models],
+        system_prompt=prompt_cache.system_prompt(SYSTEM_PROMPT),
+        conversation_manager=SlidingWindowConversationManager(window_size=CONVERSATION_WINDOW)
+    )
+
+# One agent per session; concurrent sessions never share conversation history
+agent_pool = AgentPool(create_agent)
+
 @app.entrypoint
 async def invoke(payload):
     """AgentCore entrypoint"""
     user_message = payload.get("prompt", "Hello! I'm your Multi-Region Banking Orchestrator.")
-    stream = agent.stream_async(user_message)
-    async for event in stream:
-        yield event
+    usage = prompt_cache.CacheUsage()
+    with tracing.trace("orchestrator.invoke", traceparent=payload.get("traceparent")) as root, \
+            deadlines.scope(payload.get("deadline")), model_tiering.turn() as turn:
+        # A request that is already dead (e.g. queued too long) does no work at all
+        truncated = deadlines.expired()
+        if not truncated:
+            async with agent_pool.session(payload.get("session_id")) as agent:
+                stream = agent.stream_async(user_message)
+                async for event in turn.guard(stream, on_discard=usage.observe_rejected):
+                    usage.observe(event)
+                    yield event
+                    if deadlines.expired():
+                        # The caller is about to give up: stop the agent and keep what it produced so far
+                        await stream.aclose()
+                        truncated = True
+                        break
+        root.set(cache_read_tokens=usage.cache_read_tokens, cache_write_tokens=usage.cache_write_tokens)
+        if truncated:
+            root.set(truncated=True)
+            for event in stream_text(DEADLINE_NOTICE):
+                yield event
+    # Last event: where this request's time went (the API Lambda folds it into its metrics)
+    print(f"Trace {root.trace_id}: {json.dumps(root.summary)}")
+    print(f"Prompt cache: {json.dumps(usage.stats())}")
+    yield {"metrics": {"trace": root.summary, "prefetch": prefetcher.stats(), "prompt_cache": usage.stats(),
+                       "model_tier": turn.summary()}}
 
 if __name__ == "__main__":
     app.run()
@@ -0,0 +1,138 @@
+"""Speculative Prefetch
+Issues the gateway calls the model is likely to make next and keeps their results in a short-lived cache
+"""
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+
+import deadlines
+import gateway_client
+import rate_limit
+from tool_output import decode
+
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() == 'true'
+PREFETCH_TTL_SECONDS = float(os.getenv('PREFETCH_TTL_SECONDS', '30'))
+PREFETCH_MAX_FOLLOWUPS = int(os.getenv('PREFETCH_MAX_FOLLOWUPS', '3'))
+PREFETCH_MAX_ENTRIES = 256
+
+
+def cache_key(gateway_url, tool_name, arguments):
+    return gateway_url, tool_name, json.dumps(arguments, sort_keys=True, default=str)
+
+
+def column_values(payload, column):
+    """Values of `column` in a tool payload (compact table, list of records, or a scalar field), most common first"""
+    if not isinstance(payload, dict):
+        return []
+    records = decode(payload).get("results")
+    counts = Counter()
+    if isinstance(records, list):
+        counts.update(r[column] for r in records if isinstance(r, dict) and isinstance(r.get(column), str))
+    elif isinstance(payload.get(column), str):
+        counts[payload[column]] += 1
+    return [value for value, _ in counts.most_common()]
+
+
+class Prefetcher:
+    """Follow-up rules plus a TTL cache of in-flight and finished prefetches.
+
+    Rules map a tool to a function (arguments, payload) -> [(gateway_url,
+    tool_name, arguments), ...] of likely next calls. A prefetch the model
+    then asks for with the same arguments is a hit (even if it is still in
+    flight); one that expires or is evicted unused is wasted.
+    """
+
+    def __init__(self, ttl=PREFETCH_TTL_SECONDS, max_followups=PREFETCH_MAX_FOLLOWUPS, enabled=PREFETCH_ENABLED):
+        self.ttl = ttl
+        self.max_followups = max_followups
+        self.enabled = enabled
+        self.rules = {}
+        self._entries = {}  # key -> (task, loop, expires)
+        self.issued = 0
+        self.hits = 0
+        self.wasted = 0
+
+    def rule(self, tool_name):
+        """Decorator registering a follow-up rule for tool_name"""
+        def register(fn):
+            self.rules.setdefault(tool_name, []).append(fn)
+            return fn
+        return register
+
+    async def call_tool(self, gateway_url, tool_name, arguments, hedge=False):
+        """gateway_client.call_tool, served from a prefetch when one matches; schedules follow-ups"""
+        result = await self._take(cache_key(gateway_url, tool_name, arguments))
+        if result is None:
+            result = await gateway_client.call_tool(gateway_url, tool_name, arguments, hedge=hedge)
+        self.speculate(tool_name.split("___")[-1], arguments, result)
+        return result
+
+    async def _take(self, key):
+        self._expire()
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        task, loop, _ = entry
+        result = None
+        if loop is asyncio.get_running_loop():
+            try:
+                result = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise  # This call was cancelled, not the prefetch
+            except Exception as e:
+                print(f"Error in prefetched {key[1]} call: {e}")
+        if result is None or (isinstance(result, dict) and "error" in result):
+            self.wasted += 1  # Failed prefetches aren't served; the live call tries again
+            return None
+        self.hits += 1
+        return result
+
+    def speculate(self, tool_name, arguments, result):
+        """Start the follow-up calls the rules predict from one tool result"""
+        if not self.enabled or tool_name not in self.rules or deadlines.budget_low():
+            return
+        payload = gateway_client.result_payload(result)
+        followups = [call for fn in self.rules[tool_name] for call in fn(arguments, payload)]
+        for gateway_url, next_tool, next_arguments in followups[:self.max_followups]:
+            key = cache_key(gateway_url, next_tool, next_arguments)
+            if key in self._entries or self._busy(gateway_url):
+                continue
+            loop = asyncio.get_running_loop()
+            task = loop.create_task(gateway_client.call_tool(gateway_url, next_tool, next_arguments))
+            self._entries[key] = (task, loop, time.monotonic() + self.ttl)
+            self.issued += 1
+        while len(self._entries) > PREFETCH_MAX_ENTRIES:
+            self._drop(next(iter(self._entries)))
+
+    @staticmethod
+    def _busy(gateway_url):
+        """Speculation never competes with real calls for a throttled gateway"""
+        concurrency = rate_limit.limiter_for(gateway_url).concurrency
+        return concurrency.in_flight >= concurrency.limit / 2 or concurrency.queued > 0
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [k for k, (_, _, expires) in self._entries.items() if expires <= now]:
+            self._drop(key)
+
+    def _drop(self, key):
+        task, _, _ = self._entries.pop(key)
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()  # Retrieve it, so a failed prefetch isn't logged as "never retrieved"
+        self.wasted += 1
+
+    def stats(self):
+        self._expire()
+        served = self.hits + self.wasted
+        return {
+            "issued": self.issued,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "pending": len(self._entries),
+            "hit_rate": round(self.hits / served, 3) if served else None
+        }
@@ -0,0 +1,87 @@
+"""Prompt Caching
+Stable prompt prefix (tool schemas, system prompt, few-shot examples) first behind cache checkpoints, volatile content last
+
+    agent = Agent(
+        model=prompt_cache.model(),
+        system_prompt=prompt_cache.system_prompt(INSTRUCTIONS, EXAMPLE, volatile=f"Today is {date}"),
+        ...
+    )
+
+Bedrock caches the request prefix up to each cachePoint (tools, then
+system, then messages), so every model call in a tool loop re-reads the
+unchanged prefix from cache instead of reprocessing it. Anything that
+changes per request must come after the last stable checkpoint or it
+invalidates everything behind it. Prefixes under the model's minimum
+cacheable size (about 1K tokens for Claude) are simply not cached.
+"""
+import os
+
+from strands.models import BedrockModel, CacheConfig
+
+PROMPT_CACHE_ENABLED = os.getenv('PROMPT_CACHE_ENABLED', 'true').lower() == 'true'
+PROMPT_CACHE_TTL = os.getenv('PROMPT_CACHE_TTL') or None  # e.g. "1h"; Bedrock's default (5 minutes) when unset
+
+
+def cache_point():
+    point = {"type": "default"}
+    if PROMPT_CACHE_TTL:
+        point["ttl"] = PROMPT_CACHE_TTL
+    return {"cachePoint": point}
+
+
+def system_prompt(*stable, volatile=None):
+    """System content blocks: the stable sections, one cache checkpoint, then volatile text (never cached)"""
+    blocks = [{"text": section} for section in stable if section]
+    if PROMPT_CACHE_ENABLED and blocks:
+        blocks.append(cache_point())
+    if volatile:
+        blocks.append({"text": volatile})
+    return blocks
+
+
+def model(**config):
+    """BedrockModel that also checkpoints the tool schemas and the conversation so far (each tool loop turn)"""
+    if PROMPT_CACHE_ENABLED:
+        config.setdefault("cache_config", CacheConfig(strategy="auto", ttl=PROMPT_CACHE_TTL, tools_ttl=True))
+    return BedrockModel(**config)
+
+
+class CacheUsage:
+    """Token usage summed over the model calls of one request, from the stream's metadata events"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rejected_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def observe(self, event):
+        """Count one Agent.stream_async event (only metadata events carry usage)"""
+        usage = event.get("event", {}).get("metadata", {}).get("usage") if isinstance(event, dict) else None
+        if not usage:
+            return False
+        self.calls += 1
+        self.input_tokens += usage.get("inputTokens", 0)
+        self.output_tokens += usage.get("outputTokens", 0)
+        self.cache_read_tokens += usage.get("cacheReadInputTokens", 0)
+        self.cache_write_tokens += usage.get("cacheWriteInputTokens", 0)
+        return True
+
+    def observe_rejected(self, event):
+        """Count an event of a model call that was discarded (a small-model attempt escalated to the large model)"""
+        if self.observe(event):
+            self.rejected_calls += 1
+
+    def stats(self):
+        prompt_tokens = self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+        return {
+            "model_calls": self.calls,
+            "rejected_model_calls": self.rejected_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "cache_hit_rate": round(self.cache_read_tokens / prompt_tokens, 3) if prompt_tokens else None
+        }
@@ -0,0 +1,223 @@
+"""Gateway Rate Limiting
+Per-gateway token bucket plus AIMD adaptive concurrency, so calls queue at the limit instead of bursting into 429s
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+try:
+    import yaml
+except ImportError:  # Defaults (or the env overrides) apply without it
+    yaml = None
+
+AGENTCORE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agentcore.yaml')
+DEFAULT_RATE_LIMIT = 100
+DEFAULT_BURST_LIMIT = 200
+GATEWAY_QUEUE_TIMEOUT_SECONDS = float(os.getenv('GATEWAY_QUEUE_TIMEOUT_SECONDS', '10'))
+GATEWAY_MAX_CONCURRENCY = int(os.getenv('GATEWAY_MAX_CONCURRENCY', '64'))
+GATEWAY_MIN_CONCURRENCY = int(os.getenv('GATEWAY_MIN_CONCURRENCY', '2'))
+# A call slower than this multiple of the best recent latency counts as congestion
+GATEWAY_LATENCY_TOLERANCE = float(os.getenv('GATEWAY_LATENCY_TOLERANCE', '3.0'))
+
+
+class RateLimitTimeout(Exception):
+    """A call could not get a token or a concurrency slot before its deadline"""
+
+
+def throttle_settings(path=AGENTCORE_CONFIG):
+    """(rate per second, burst) from the gateway section of agentcore.yaml; env overrides win"""
+    rate, burst = DEFAULT_RATE_LIMIT, DEFAULT_BURST_LIMIT
+    if yaml is not None and os.path.exists(path):
+        try:
+            with open(path) as f:
+                gateway = (yaml.safe_load(f) or {}).get('gateway') or {}
+            rate = gateway.get('throttle_rate_limit', rate)
+            burst = gateway.get('throttle_burst_limit', burst)
+        except Exception as e:
+            print(f"Error reading throttle settings from {path}: {e}")
+    return (float(os.getenv('GATEWAY_RATE_LIMIT', rate)), int(os.getenv('GATEWAY_BURST_LIMIT', burst)))
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` per second up to `burst`.
+
+    Callers reserve a token up front (the balance may go negative) and
+    sleep until it is theirs, so waiters are served in arrival order and
+    nothing is tied to one event loop.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, deadline=None):
+        """Seconds to wait for the next token, or None (nothing reserved) if that passes the deadline"""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, (1.0 - self.tokens) / self.rate)
+        if deadline is not None and now + wait > deadline:
+            return None
+        self.tokens -= 1.0
+        return wait
+
+    async def acquire(self, deadline=None):
+        wait = self.reserve(deadline)
+        if wait is None:
+            raise RateLimitTimeout(f"rate limit of {self.rate:g}/s reached")
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund()  # Cancelled while queued: the reserved token was never used
+                raise
+
+    def refund(self):
+        """Return one reserved token"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.burst, self.tokens + 1.0)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight calls.
+
+    Every successful call adds 1/limit (about +1 per round of calls); a
+    throttle (429), server error (5xx) or a latency spike past
+    GATEWAY_LATENCY_TOLERANCE x the best recent latency halves the limit,
+    at most once per round trip so one burst of failures counts once.
+    """
+
+    def __init__(self, initial=None, minimum=GATEWAY_MIN_CONCURRENCY, maximum=GATEWAY_MAX_CONCURRENCY,
+                 backoff=0.5, latency_tolerance=GATEWAY_LATENCY_TOLERANCE):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial or maximum)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.best_latency = None
+        self._waiters = deque()
+        self._last_decrease = 0.0
+
+    async def acquire(self, deadline=None):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            # The slot is handed over by release(), so in_flight is already counted for us
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Granted just as we gave up: hand it on
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise RateLimitTimeout(f"concurrency limit of {int(self.limit)} reached")
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def observe(self, status, latency):
+        """Adjust the limit from one finished call's HTTP status (None on a transport error) and latency"""
+        now = time.monotonic()
+        self.best_latency = latency if self.best_latency is None else min(self.best_latency * 1.01, latency)
+        congested = (status is None or status == 429 or status >= 500
+                     or latency > self.best_latency * self.latency_tolerance)
+        if not congested:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._wake()
+        elif now - self._last_decrease >= latency:
+            self.limit = max(self.minimum, self.limit * self.backoff)
+            self._last_decrease = now
+
+
+class GatewayLimiter:
+    """Token bucket plus adaptive concurrency for one gateway.
+
+    Args:
+        rate / burst: Token bucket settings (default: agentcore.yaml throttle settings)
+        queue_timeout: Seconds a call may wait for a token and a slot before failing
+    """
+
+    def __init__(self, rate=None, burst=None, queue_timeout=GATEWAY_QUEUE_TIMEOUT_SECONDS, **concurrency):
+        if rate is None or burst is None:
+            default_rate, default_burst = throttle_settings()
+            rate = default_rate if rate is None else rate
+            burst = default_burst if burst is None else burst
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(**concurrency)
+        self.queue_timeout = queue_timeout
+        self.throttled = 0
+        self.timeouts = 0
+
+    def deadline(self):
+        return time.monotonic() + self.queue_timeout
+
+    @asynccontextmanager
+    async def slot(self, deadline=None):
+        """Wait for a token and a concurrency slot; yields a Slot to report the call's status on"""
+        deadline = self.deadline() if deadline is None else deadline
+        try:
+            await self.bucket.acquire(deadline)
+            await self.concurrency.acquire(deadline)
+        except RateLimitTimeout:
+            self.timeouts += 1
+            raise
+        slot = Slot()
+        cancelled = False
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            cancelled = True  # Abandoned by the caller, says nothing about the gateway
+            raise
+        finally:
+            if slot.status == 429:
+                self.throttled += 1
+            if not cancelled:
+                self.concurrency.observe(slot.status, time.monotonic() - slot.start)
+            self.concurrency.release()
+
+
+class Slot:
+    """One admitted call; set status once the gateway answers"""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.status = None
+
+
+_limiters = {}
+
+
+def limiter_for(gateway_url):
+    """Shared limiter for a gateway URL"""
+    limiter = _limiters.get(gateway_url)
+    if limiter is None:
+        limiter = _limiters[gateway_url] = GatewayLimiter()
+    return limiter
@@ -0,0 +1,97 @@
+"""Session-keyed Agent Pool
+Keeps one Agent per AgentCore session so concurrent conversations never share history
+
+    async with agent_pool.session(payload.get("session_id")) as agent:
+        async for event in agent.stream_async(prompt):
+            ...
+
+An Agent runs one invocation at a time, so requests on the same session
+take turns on its agent; requests on other sessions are not held up.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+MAX_SESSIONS = int(os.getenv('AGENT_POOL_MAX_SESSIONS', '64'))
+IDLE_TTL_SECONDS = float(os.getenv('AGENT_POOL_IDLE_TTL_SECONDS', '900'))
+CONVERSATION_WINDOW = int(os.getenv('AGENT_CONVERSATION_WINDOW', '20'))
+
+
+class AgentPool:
+    """Bounded LRU pool of per-session agents with idle-TTL eviction.
+
+    Args:
+        factory: Zero-argument callable returning a fresh Agent
+        max_sessions: Maximum number of live sessions (least recently used evicted first)
+        idle_ttl_seconds: Sessions idle longer than this are dropped
+    """
+
+    def __init__(self, factory, max_sessions=MAX_SESSIONS, idle_ttl_seconds=IDLE_TTL_SECONDS):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._agents = OrderedDict()  # session_id -> (agent, last_used, turn lock)
+        self._lock = threading.Lock()
+
+    def get(self, session_id=None):
+        """Return the agent for a session, creating it if needed.
+
+        Requests without a session id get a throwaway agent so they never
+        inherit another caller's history. Use session() to run the agent:
+        get() does not wait for another request on the same session.
+        """
+        if not session_id:
+            return self.factory()
+        return self._entry(session_id)[0]
+
+    @asynccontextmanager
+    async def session(self, session_id=None):
+        """The session's agent, held for the block; another request on the same session waits for it"""
+        if not session_id:
+            yield self.factory()
+            return
+        agent, turn = self._entry(session_id)
+        async with turn:
+            yield agent
+
+    def _entry(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._agents.get(session_id)
+            if entry:
+                self._agents[session_id] = (entry[0], now, entry[2])
+                self._agents.move_to_end(session_id)
+                return entry[0], entry[2]
+
+        # Build outside the lock; a concurrent first request for the same
+        # session keeps whichever agent was registered first
+        agent, turn = self.factory(), asyncio.Lock()
+        with self._lock:
+            entry = self._agents.get(session_id)
+            if entry:
+                agent, turn = entry[0], entry[2]
+            self._agents[session_id] = (agent, now, turn)
+            self._agents.move_to_end(session_id)
+            while len(self._agents) > self.max_sessions:
+                self._agents.popitem(last=False)
+        return agent, turn
+
+    def discard(self, session_id):
+        """Drop a session's agent (e.g. after the caller ends the session)"""
+        with self._lock:
+            self._agents.pop(session_id, None)
+
+    def _evict_idle(self, now):
+        # OrderedDict is kept in last-used order, so expired entries are at the front
+        while self._agents:
+            session_id, (_, last_used, _) = next(iter(self._agents.items()))
+            if now - last_used <= self.idle_ttl_seconds:
+                break
+            self._agents.popitem(last=False)
+
+    def __len__(self):
+        return len(self._agents)
@@ -0,0 +1,162 @@
+"""Deterministic Fast-Path Router
+Answers fully structured prompts by calling a tool directly, skipping the LLM
+"""
+import json
+import re
+import threading
+
+from tool_output import decode
+
+# Conversational lead-ins stripped before matching ("show me the ...", "what are ...")
+_LEAD_IN = re.compile(r"^(?:please |can you |could you )?(?:show(?: me)?|get|give me|list|what(?: is|'s| are)|tell me) (?:the )?")
+
+_GENERIC_WORDS = {"bank", "banks", "bancorp", "group", "financial", "services", "corp", "inc", "co", "the", "of", "and", "&"}
+
+
+def _number(text):
+    """A captured number ("1,250" or "2.5"), or None when it does not parse"""
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _normalize(text):
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    text = text.rstrip("?.! ")
+    return _LEAD_IN.sub("", text)
+
+
+class FastPathRouter:
+    """Routes prompts matching a registered grammar straight to a tool.
+
+    A route is confident only when the whole prompt matches one of its
+    patterns and every captured slot resolves to exactly one known entity;
+    anything else falls through to the LLM.
+
+    Args:
+        entity_index: Slot name -> iterable of canonical values
+            (e.g. {"bank_name": ["Wells Fargo", ...], "industry": [...]}),
+            or a zero-argument callable returning it, evaluated on first use
+            so it can depend on lazily loaded data
+    """
+
+    def __init__(self, entity_index):
+        self._entity_index = entity_index if callable(entity_index) else self._lists(entity_index)
+        self.routes = []
+        self.hits = {}
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _lists(entity_index):
+        return {slot: list(values) for slot, values in entity_index.items()}
+
+    @property
+    def entity_index(self):
+        """Slot -> canonical values (a callable index is resolved once, on first use)"""
+        if callable(self._entity_index):
+            self._entity_index = self._lists(self._entity_index())
+        return self._entity_index
+
+    def register(self, tool, patterns, template):
+        """Register a fast path for a strands tool.
+
+        Args:
+            tool: @tool-decorated function; its input schema defines the valid slots
+            patterns: Regexes over the normalized prompt; named groups are tool arguments
+            template: Callable turning the tool's parsed JSON result into answer text
+        """
+        spec = tool.tool_spec
+        schema = spec["inputSchema"].get("json", spec["inputSchema"])
+        properties = set(schema.get("properties", {}))
+        required = set(schema.get("required", []))
+        compiled = [re.compile(p) for p in patterns]
+        for pattern in compiled:
+            slots = set(pattern.groupindex)
+            if not slots <= properties:
+                raise ValueError(f"{spec['name']}: pattern slots {slots - properties} not in tool schema")
+            if not required <= slots:
+                raise ValueError(f"{spec['name']}: pattern does not capture required {required - slots}")
+        types = {name: prop.get("type") for name, prop in schema.get("properties", {}).items()}
+        self.routes.append((spec["name"], tool, compiled, template, types))
+        self.hits.setdefault(spec["name"], 0)
+
+    def resolve(self, slot, value):
+        """Map a captured phrase to a single canonical entity, or None"""
+        value = value.strip()
+        candidates = self.entity_index.get(slot)
+        if candidates is None:
+            return value
+        exact = [c for c in candidates if c.lower() == value]
+        if exact:
+            return exact[0]
+        # Partial names only count when they carry a distinctive word ("jpmorgan", not "bank")
+        words = value.split()
+        if not words or set(words) <= _GENERIC_WORDS:
+            return None
+        partial = [c for c in candidates if re.search(rf"\b{re.escape(value)}\b", c.lower())]
+        return partial[0] if len(partial) == 1 else None
+
+    def match(self, prompt):
+        """Return (tool_name, tool, arguments, template) for a confident match, else None"""
+        text = _normalize(prompt or "")
+        for name, tool, patterns, template, types in self.routes:
+            for pattern in patterns:
+                found = pattern.fullmatch(text)
+                if not found:
+                    continue
+                arguments = {}
+                for slot, value in found.groupdict().items():
+                    resolved = self.resolve(slot, value)
+                    if resolved is None:
+                        break
+                    if types.get(slot) in ("number", "integer"):
+                        resolved = _number(resolved)
+                        if resolved is None:
+                            break
+                    arguments[slot] = resolved
+                else:
+                    return name, tool, arguments, template
+        return None
+
+    def route(self, prompt):
+        """Answer a prompt directly if it confidently matches a route, else None"""
+        matched = self.match(prompt)
+        answer = None
+        if matched:
+            name, tool, arguments, template = matched
+            result = decode(json.loads(tool(**arguments)))
+            if "error" not in result:
+                answer = template(result)
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits[name] += 1
+        return answer
+
+    def hit_rate(self):
+        total = sum(self.hits.values()) + self.misses
+        return sum(self.hits.values()) / total if total else 0.0
+
+    def stats(self):
+        """Hit/miss counts for the metrics event"""
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate(), 4)
+        }
+
+
+def remember(agent, prompt, answer):
+    """Record a fast-path exchange in a session agent's history, so follow-up turns can refer back to it"""
+    agent.messages.append({"role": "user", "content": [{"text": prompt}]})
+    agent.messages.append({"role": "assistant", "content": [{"text": answer}]})
+
+
+def stream_text(text):
+    """Yield a fast-path answer in the same event shape as Agent.stream_async"""
+    yield {"event": {"messageStart": {"role": "assistant"}}}
+    yield {"event": {"contentBlockDelta": {"delta": {"text": text}}}}
+    yield {"event": {"messageStop": {"stopReason": "end_turn"}}}
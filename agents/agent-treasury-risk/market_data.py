@@ -0,0 +1,385 @@
+"""Treasury Market Data Time Series
+Append-only, date-indexed store of market observations (Treasury yields, Fed Funds) with range, as-of and resample queries
+
+    MARKET_SERIES = create_market_store(s3_client, S3_BUCKET)
+    MARKET_SERIES.latest(as_of="2025-06-30")
+    MARKET_SERIES.history(["treasury_10y_yield"], "2020-01-01", "2025-06-30", frequency="monthly", aggregate="mean")
+
+Each series keeps its dates (datetime64[D]) and values (float64) in two
+parallel arrays with spare capacity, so appending a day is amortized O(1)
+and a date range is two binary searches returning views, not copies.
+Resampling splits a range into periods with one np.diff and aggregates
+every period in a single reduceat, so years of daily history answer in
+well under a millisecond per series.
+
+S3 layout under data/market_data/: series.json holds the columnar base,
+{"series": {name: {"dates": [...], "values": [...]}}, ...}; new
+observations arrive as numbered NDJSON files appends/000001.ndjson, ...
+({"series", "date", "value"} per line), read in order on the delta poll.
+"""
+import json
+import os
+import threading
+import time
+
+import tracing
+
+MARKET_PREFIX = 'data/market_data/'
+BASE_NAME = 'series.json'
+APPEND_NAME = 'appends/{:06d}.ndjson'
+DELTA_POLL_SECONDS = int(os.getenv('DATA_DELTA_POLL_SECONDS', '60'))
+# Auto-resampled history stays under this many periods (the finest frequency that fits is used)
+MAX_HISTORY_POINTS = int(os.getenv('MARKET_DATA_MAX_POINTS', '60'))
+INITIAL_CAPACITY = 256
+FREQUENCIES = ("daily", "weekly", "monthly", "quarterly", "yearly")
+AGGREGATES = ("last", "first", "mean", "min", "max")
+
+np = None  # numpy, imported on first use so its import time (~90 ms) stays off cold start
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def parse_date(value, name="date"):
+    """ISO date (YYYY-MM-DD) -> datetime64[D]; None passes through"""
+    if value is None:
+        return None
+    _numpy()
+    try:
+        date = np.datetime64(value, 'D')
+    except (TypeError, ValueError):
+        date = np.datetime64('NaT')
+    if np.isnat(date):
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD), got {value!r}")
+    return date
+
+
+def period_keys(dates, frequency):
+    """Period number of each date; consecutive periods differ by one"""
+    days = dates.astype('int64')
+    if frequency == "daily":
+        return days
+    if frequency == "weekly":
+        return (days + 3) // 7  # Monday-start weeks (1970-01-01 was a Thursday)
+    months = dates.astype('datetime64[M]').astype('int64')
+    if frequency == "monthly":
+        return months
+    if frequency == "quarterly":
+        return months // 3
+    return months // 12
+
+
+def period_label(key, frequency):
+    """Readable period: 2025-06-30 (day), 2025-06-30 (week starting), 2025-06, 2025-Q2, 2025"""
+    key = int(key)
+    if frequency == "daily":
+        return str(np.datetime64(key, 'D'))
+    if frequency == "weekly":
+        return str(np.datetime64(key * 7 - 3, 'D'))
+    if frequency == "monthly":
+        return str(np.datetime64(key, 'M'))
+    if frequency == "quarterly":
+        return f"{1970 + key // 4}-Q{key % 4 + 1}"
+    return str(1970 + key)
+
+
+def _round(value):
+    return round(float(value), 4)
+
+
+class Series:
+    """One dated series: parallel date/value arrays sorted by date, grown in place"""
+
+    def __init__(self, name, dates=(), values=()):
+        _numpy()
+        self.name = name
+        self._dates = np.empty(INITIAL_CAPACITY, dtype='datetime64[D]')
+        self._values = np.empty(INITIAL_CAPACITY, dtype='float64')
+        self._size = 0
+        self._lock = threading.Lock()
+        if len(dates):
+            self.append(dates, values)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, dates, values):
+        """Append observations in increasing date order; a date equal to the last one replaces its value (a correction)"""
+        dates = np.asarray(dates, dtype='datetime64[D]').ravel()
+        values = np.asarray(values, dtype='float64').ravel()
+        if len(dates) != len(values):
+            raise ValueError(f"{self.name}: {len(dates)} dates but {len(values)} values")
+        if not len(dates):
+            return 0
+        if np.isnat(dates).any() or (dates[1:] <= dates[:-1]).any():
+            raise ValueError(f"{self.name}: observations must be dated and in increasing date order")
+        with self._lock:
+            size = self._size
+            if size and dates[0] < self._dates[size - 1]:
+                raise ValueError(f"{self.name}: {dates[0]} is before the last observation "
+                                 f"{self._dates[size - 1]}; the series is append-only")
+            if size and dates[0] == self._dates[size - 1]:
+                self._values[size - 1] = values[0]
+                dates, values = dates[1:], values[1:]
+            end = size + len(dates)
+            if end > len(self._dates):
+                self._grow(end)
+            self._dates[size:end] = dates
+            self._values[size:end] = values
+            self._size = end  # Published last: readers never see a slot before it is written
+        return len(dates)
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self._dates))
+        dates = np.empty(capacity, dtype='datetime64[D]')
+        values = np.empty(capacity, dtype='float64')
+        dates[:self._size] = self._dates[:self._size]
+        values[:self._size] = self._values[:self._size]
+        self._dates, self._values = dates, values
+
+    def range(self, start=None, end=None):
+        """(dates, values) views of the observations dated start..end inclusive"""
+        size = self._size  # Before the arrays: a concurrent _grow copies at least this many
+        dates, values = self._dates[:size], self._values[:size]
+        lo = 0 if start is None else int(np.searchsorted(dates, start, side='left'))
+        hi = size if end is None else int(np.searchsorted(dates, end, side='right'))
+        return dates[lo:hi], values[lo:hi]
+
+    def as_of(self, date=None):
+        """(date, value) of the last observation on or before date (the latest when None); None if there is none"""
+        dates, values = self.range(end=date)
+        if not len(dates):
+            return None
+        return dates[-1], values[-1]
+
+    def resample(self, frequency, aggregate="last", start=None, end=None):
+        """(period keys, values): one aggregated value per period with observations in start..end"""
+        dates, values = self.range(start, end)
+        if not len(dates):
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='float64')
+        keys = period_keys(dates, frequency)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+        if aggregate == "last":
+            result = values[np.append(starts[1:], len(values)) - 1]
+        elif aggregate == "first":
+            result = values[starts]
+        elif aggregate == "mean":
+            result = np.add.reduceat(values, starts) / np.diff(np.append(starts, len(values)))
+        elif aggregate == "min":
+            result = np.minimum.reduceat(values, starts)
+        else:
+            result = np.maximum.reduceat(values, starts)
+        return keys[starts], result
+
+    def summary(self, start=None, end=None):
+        """Range statistics over the raw observations, or None when the range is empty"""
+        dates, values = self.range(start, end)
+        if not len(dates):
+            return None
+        return {
+            "start": str(dates[0]),
+            "end": str(dates[-1]),
+            "observations": len(dates),
+            "first": _round(values[0]),
+            "last": _round(values[-1]),
+            "change": _round(values[-1] - values[0]),
+            "min": _round(values.min()),
+            "max": _round(values.max()),
+            "mean": _round(values.mean())
+        }
+
+
+class MarketDataStore:
+    """Series by name, loaded from S3 on first use and extended from the append files.
+
+    Args:
+        s3: boto3 S3 client, or a zero-argument factory for one (called on first load)
+        bucket: Data bucket
+        prefix: Key prefix holding series.json and appends/
+    """
+
+    def __init__(self, s3, bucket, prefix=MARKET_PREFIX):
+        self._s3 = s3
+        self._s3_factory = None if hasattr(s3, "get_object") else s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.meta = {}
+        self.series = {}
+        self.appends = 0  # Append files applied so far
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._last_poll = 0.0
+
+    @property
+    def s3(self):
+        if not hasattr(self._s3, "get_object"):
+            self._s3 = self._s3()
+        return self._s3
+
+    def reset_client(self):
+        """Drop the S3 client so the next call builds its own (a forked worker must not share the parent's sockets)"""
+        if self._s3_factory is not None:
+            self._s3 = self._s3_factory
+
+    def _get_body(self, name):
+        """Object body under the prefix, or None when it doesn't exist"""
+        s3 = self.s3  # Built before the try: a failing client factory must not raise again inside `except`
+        try:
+            return s3.get_object(Bucket=self.bucket, Key=self.prefix + name)['Body'].read()
+        except s3.exceptions.NoSuchKey:
+            return None
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+        return self
+
+    def load(self):
+        """Load the columnar base (an empty store if there is none), then every append file"""
+        try:
+            with tracing.span("market_data.load", prefix=self.prefix):
+                body = self._get_body(BASE_NAME)
+                base = json.loads(body) if body else {}
+                self.series = {name: Series(name, columns["dates"], columns["values"])
+                               for name, columns in base.get("series", {}).items()}
+                self.meta = {k: v for k, v in base.items() if k != "series"}
+                self.appends = base.get("appends", 0)
+                self._read_appends()
+        finally:
+            self._loaded = True
+        return self
+
+    def _read_appends(self):
+        """Apply the append files after the last one read, until the next one doesn't exist yet"""
+        self._last_poll = time.monotonic()
+        while True:
+            body = self._get_body(APPEND_NAME.format(self.appends + 1))
+            if body is None:
+                return
+            self.extend(json.loads(line) for line in body.splitlines() if line.strip())
+            self.appends += 1
+
+    def maybe_refresh(self):
+        """Read new append files at most once per DELTA_POLL_SECONDS; errors keep serving the loaded data"""
+        if not self._loaded:
+            self.ensure_loaded()
+            return
+        if time.monotonic() - self._last_poll < DELTA_POLL_SECONDS:
+            return
+        try:
+            with tracing.span("market_data.refresh", appends=self.appends), self._load_lock:
+                self._read_appends()
+        except Exception as e:
+            print(f"Error reading market data appends: {e}")
+
+    def extend(self, observations):
+        """Append {"series", "date", "value"} observations (date order within each series); new names start a series"""
+        grouped = {}
+        for observation in observations:
+            dates, values = grouped.setdefault(observation["series"], ([], []))
+            dates.append(observation["date"])
+            values.append(observation["value"])
+        for name, (dates, values) in grouped.items():
+            if name in self.series:
+                self.series[name].append(dates, values)
+            else:
+                self.series[name] = Series(name, dates, values)
+        return sum(len(dates) for dates, _ in grouped.values())
+
+    def names(self, series=None):
+        """Requested series names (all by default); ValueError naming the unknown ones"""
+        if not series:
+            return list(self.series)
+        unknown = [name for name in series if name not in self.series]
+        if unknown:
+            raise ValueError(f"Unknown market data series {unknown}. Available: {sorted(self.series)}")
+        return list(series)
+
+    def latest(self, series=None, as_of=None):
+        """{name: (date, value)} of each series' last observation on or before as_of (the latest when None)"""
+        as_of = parse_date(as_of, "as_of")
+        observations = {}
+        for name in self.names(series):
+            observation = self.series[name].as_of(as_of)
+            if observation is not None:
+                observations[name] = (str(observation[0]), _round(observation[1]))
+        return observations
+
+    def history(self, series=None, start=None, end=None, frequency=None, aggregate=None,
+                max_points=MAX_HISTORY_POINTS):
+        """Aligned table of the series over start..end, one row per period, plus per-series range statistics.
+
+        Without a frequency the finest one giving at most max_points periods
+        is used; aggregate picks the value reported for each period.
+        """
+        names = self.names(series)
+        start, end = parse_date(start, "start_date"), parse_date(end, "end_date")
+        if start is not None and end is not None and start > end:
+            raise ValueError(f"start_date {start} is after end_date {end}")
+        if frequency is not None and frequency not in FREQUENCIES:
+            raise ValueError(f"frequency must be one of {list(FREQUENCIES)}, got {frequency!r}")
+        aggregate = aggregate or "last"
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"aggregate must be one of {list(AGGREGATES)}, got {aggregate!r}")
+
+        for candidate in ([frequency] if frequency else FREQUENCIES):
+            columns = {name: self.series[name].resample(candidate, aggregate, start, end) for name in names}
+            if max(len(keys) for keys, _ in columns.values()) <= max_points:
+                break
+        frequency = candidate
+
+        # Outer-join the series on period; a series with no observation in a period reports None
+        keys = np.unique(np.concatenate([keys for keys, _ in columns.values()]))
+        table = {}
+        for name, (series_keys, values) in columns.items():
+            column = np.full(len(keys), np.nan)
+            column[np.searchsorted(keys, series_keys)] = values
+            table[name] = [None if v != v else v for v in column.round(4).tolist()]
+        rows = [{"date": period_label(key, frequency), **{name: table[name][i] for name in names}}
+                for i, key in enumerate(keys.tolist())]
+        return {
+            "start_date": None if start is None else str(start),
+            "end_date": None if end is None else str(end),
+            "frequency": frequency,
+            "aggregate": aggregate,
+            "summary": {name: self.series[name].summary(start, end) for name in names},
+            "results": rows
+        }
+
+
+def create_market_store(s3, bucket):
+    """Treasury market-data store; loads on first use"""
+    return MarketDataStore(s3, bucket)
+
+
+def market_data_result(store, snapshot, series=None, start_date=None, end_date=None, as_of=None,
+                       frequency=None, aggregate=None):
+    """get_market_data payload: values as of a date (the latest by default), or history when a range or frequency is given.
+
+    `snapshot` is the LOB metadata's market_data block, served as before
+    when the bucket has no time series.
+    """
+    store.ensure_loaded()
+    if not store.series:
+        return {"market_data": snapshot, "note": "No market data history loaded; current snapshot only"}
+    data_source = store.meta.get("data_source", snapshot.get("data_source"))
+    if start_date or end_date or frequency or aggregate:
+        return {"data_source": data_source,
+                **store.history(series, start_date, end_date, frequency, aggregate)}
+    observations = store.latest(series, as_of)
+    if not observations:
+        return {"error": f"No market data on or before {as_of}"}
+    market_data = {name: value for name, (_, value) in observations.items()}
+    market_data["as_of"] = max(date for date, _ in observations.values())
+    stale = {name: date for name, (date, _) in observations.items() if date != market_data["as_of"]}
+    if stale:
+        market_data["observation_dates"] = stale
+    market_data["data_source"] = data_source
+    return {"market_data": market_data, "note": "Use live FRED/Treasury APIs in production"}
@@ -0,0 +1,208 @@
+"""MCP HTTP Server
+Serves this LOB's tool registry (mcp_server_lambda.TOOLS) from a long-lived process over MCP streamable HTTP
+
+    python mcp_http_server.py --port 8080 --workers 4
+
+POST /mcp takes JSON-RPC (initialize, ping, tools/list, tools/call; single
+messages or batches) and answers with JSON, or for a batch sent with
+Accept: text/event-stream, one SSE event per response as each finishes.
+Connections are kept alive between calls. Tool names may carry the
+gateway's "<target>___" prefix, so an orchestrator can point its gateway
+URL straight at this server.
+
+The data (manifest, every partition and the unfiltered index) is loaded
+once in the parent process before the workers fork, so each worker starts
+with it in memory instead of fetching it again. Expect one copy per worker
+rather than shared pages: CPython's reference counting writes to every
+object a worker reads. Each worker drops the inherited S3 client, builds
+its own, and polls deltas on its own. The Lambda handler stays a thin
+adapter over the same mcp_server_lambda.handle.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import mcp_server_lambda as lob
+from partition_store import PartitionStore
+
+MCP_SERVER_PORT = int(os.getenv('MCP_SERVER_PORT', '8080'))
+MCP_SERVER_WORKERS = int(os.getenv('MCP_SERVER_WORKERS', '1'))
+# Tool functions are blocking (S3 fetches, index builds): concurrent calls per worker
+MCP_SERVER_THREADS = int(os.getenv('MCP_SERVER_THREADS', '16'))
+MCP_KEEPALIVE_SECONDS = float(os.getenv('MCP_KEEPALIVE_SECONDS', '75'))
+MCP_PRELOAD = os.getenv('MCP_PRELOAD', 'true').lower() == 'true'
+MCP_SERVER_NAME = os.getenv('MCP_SERVER_NAME', os.path.basename(os.path.dirname(os.path.abspath(__file__))))
+PROTOCOL_VERSION = "2025-03-26"
+SESSION_HEADER = "Mcp-Session-Id"
+
+
+def is_notification(message):
+    return isinstance(message, dict) and "id" not in message
+
+
+def rpc_error(rpc_id, code, message):
+    return {"jsonrpc": "2.0", "id": rpc_id, "error": {"code": code, "message": message}}
+
+
+def preload():
+    """Load every partition store in the LOB module and build its indexes"""
+    for value in vars(lob).values():
+        if isinstance(value, PartitionStore):
+            value.preload()
+            print(f"Preloaded {value.prefix}: {len(value.partitions)} partitions, data version {value.version}")
+
+
+def reset_clients():
+    """Drop the S3 clients inherited from the parent: boto3 clients and their connection pools aren't fork-safe"""
+    for value in vars(lob).values():
+        if hasattr(value, "reset_client"):
+            value.reset_client()
+
+
+class MCPServer:
+    """JSON-RPC endpoint over lob.TOOLS; blocking tool calls run on a bounded thread pool"""
+
+    def __init__(self, name=MCP_SERVER_NAME, threads=MCP_SERVER_THREADS):
+        self.name = name
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="mcp-tool")
+        self.calls = 0
+        self.errors = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/mcp", self.handle)
+        app.router.add_get("/health", self.health)
+        app.on_cleanup.append(self.close)
+        return app
+
+    async def close(self, app):
+        self.pool.shutdown(wait=False)
+
+    async def health(self, request):
+        return web.json_response({"status": "ok", "pid": os.getpid(), "calls": self.calls, "errors": self.errors})
+
+    def tools(self):
+        return [{"name": name, "description": spec["description"], "inputSchema": spec["inputSchema"]}
+                for name, spec in lob.TOOLS.items()]
+
+    async def handle(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response(rpc_error(None, -32700, "Parse error"), status=400)
+        batch = isinstance(body, list)
+        messages = body if batch else [body]
+        if not messages:
+            return web.json_response(rpc_error(None, -32600, "Empty batch"), status=400)
+        headers = {}
+        if any(isinstance(m, dict) and m.get("method") == "initialize" for m in messages):
+            headers[SESSION_HEADER] = uuid.uuid4().hex
+        traceparent = request.headers.get("traceparent")
+        for message in filter(is_notification, messages):
+            await self.rpc(message, traceparent)  # No response
+        calls = [self.rpc(m, traceparent) for m in messages if not is_notification(m)]
+        if not calls:
+            return web.Response(status=202, headers=headers)
+
+        if batch and "text/event-stream" in request.headers.get("Accept", ""):
+            # Stream each response as soon as its call finishes
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                                   **headers})
+            await response.prepare(request)
+            for finished in asyncio.as_completed(calls):
+                await response.write(f"event: message\ndata: {json.dumps(await finished)}\n\n".encode())
+            await response.write_eof()
+            return response
+        results = await asyncio.gather(*calls)
+        return web.json_response(results if batch else results[0], headers=headers)
+
+    async def rpc(self, message, traceparent=None):
+        """Response to one JSON-RPC message (None for a notification)"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or "method" not in message:
+            return rpc_error(message.get("id") if isinstance(message, dict) else None, -32600, "Invalid Request")
+        if is_notification(message):
+            return None  # notifications/initialized and friends: nothing to do
+        rpc_id, method, params = message["id"], message["method"], message.get("params") or {}
+        if method == "initialize":
+            return {"jsonrpc": "2.0", "id": rpc_id, "result": {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": {"name": self.name, "version": "1.0.0"}
+            }}
+        if method == "ping":
+            return {"jsonrpc": "2.0", "id": rpc_id, "result": {}}
+        if method == "tools/list":
+            return {"jsonrpc": "2.0", "id": rpc_id, "result": {"tools": self.tools()}}
+        if method != "tools/call":
+            return rpc_error(rpc_id, -32601, f"Method not found: {method}")
+
+        name = params.get("name", "")
+        tool_name = name.split("___", 1)[-1]
+        if tool_name not in lob.TOOLS:
+            return rpc_error(rpc_id, -32602, f"Unknown tool: {name}")
+        # Trace context and deadline ride in MCP _meta (or the traceparent header), as through the gateway
+        meta = dict(params.get("_meta") or {})
+        if traceparent and "traceparent" not in meta:
+            meta["traceparent"] = traceparent
+        self.calls += 1
+        result = await asyncio.get_running_loop().run_in_executor(
+            self.pool, lob.handle, tool_name, params.get("arguments") or {}, meta)
+        is_error = isinstance(result, dict) and "error" in result
+        self.errors += is_error
+        return {"jsonrpc": "2.0", "id": rpc_id, "result": {
+            "content": [{"type": "text", "text": json.dumps(result)}],
+            "isError": is_error
+        }}
+
+
+def run_worker(host, port, reuse_port=False):
+    web.run_app(MCPServer().app(), host=host, port=port, reuse_port=reuse_port,
+                keepalive_timeout=MCP_KEEPALIVE_SECONDS, print=None)
+
+
+def run_forked_worker(host, port):
+    reset_clients()
+    run_worker(host, port, reuse_port=True)
+
+
+def serve(host="0.0.0.0", port=MCP_SERVER_PORT, workers=MCP_SERVER_WORKERS):
+    """Preload the data, then serve from one process or `workers` forked processes sharing the port"""
+    if MCP_PRELOAD:
+        preload()
+    print(f"✅ MCP server on http://{host}:{port}/mcp ({len(lob.TOOLS)} tools, {workers} worker(s))")
+    if workers <= 1:
+        run_worker(host, port)
+        return
+    context = multiprocessing.get_context("fork")  # Workers inherit the preloaded data
+    processes = [context.Process(target=run_forked_worker, args=(host, port), daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        for process in processes:
+            process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for process in processes:
+        process.join()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=MCP_SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=MCP_SERVER_WORKERS, help="Forked worker processes")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    serve(args.host, args.port, args.workers)
@@ -2,61 +2,63 @@
 Exposes risk models as MCP tools via AgentCore Gateway
 """
 import json
-import boto3
+import deadlines
+import tool_routing
+import tracing
+from tool_output import compact
+from market_data import create_market_store, market_data_result
+from risk_data import create_risk_store
+from yield_curve import curve_for, portfolio_expected_loss, pv_expected_loss_result
+
+def s3_client():
+    # boto3 is imported here so its import cost lands on the first data load, not module init
+    import boto3
+    return boto3.client('s3')
 
-s3 = boto3.client('s3')
 S3_BUCKET = 'treasury-risk-058264155998'
-S3_KEY = 'data/risk_models.json'
 
-def load_data():
-    """Load risk models from S3"""
-    try:
-        response = s3.get_object(Bucket=S3_BUCKET, Key=S3_KEY)
-        return json.loads(response['Body'].read().decode('utf-8'))
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return {"banks": [], "market_data": {}}
+# Cold start reads only the manifest; per-bank partitions are fetched per query and cached
+RISK_MODELS = create_risk_store(s3_client, S3_BUCKET)
+RISK_DATA = RISK_MODELS.meta
+# Dated market-data series (and numpy) load on the first get_market_data call
+MARKET_SERIES = create_market_store(s3_client, S3_BUCKET)
 
-RISK_DATA = load_data()
+def partial(result, is_partial):
+    """Flag a result built before every partition arrived (the request deadline ran out)"""
+    if is_partial:
+        result["partial"] = "Request deadline reached before all data was read; results are incomplete"
+    return result
 
-def query_risk_models(bank_name=None, industry=None):
-    """Query risk models by bank and industry"""
-    results = []
-    for bank in RISK_DATA["banks"]:
-        if bank_name and bank_name.lower() not in bank["bank_name"].lower():
-            continue
-        for model in bank["risk_models"]:
-            if industry and industry.lower() not in model["industry"].lower():
-                continue
-            results.append({
-                "bank": bank["bank_name"],
-                "industry": model["industry"],
-                "probability_of_default_pct": model["probability_of_default_pct"],
-                "loss_given_default_pct": model["loss_given_default_pct"],
-                "expected_loss_pct": model["expected_loss_pct"],
-                "rating_equivalent": model["rating_equivalent"]
-            })
-    return {
+def query_risk_models(bank_name=None, industry=None, limit=None, cursor=None, fields=None, sort_by=None):
+    """Query one page of risk models by bank and industry"""
+    book = RISK_MODELS.book(bank=bank_name)
+    page = book.query(
+        {"bank": bank_name, "industry": industry},
+        limit=limit, cursor=cursor, fields=fields, sort_by=sort_by
+    )
+    return compact("query_risk_models", partial({
         "lob": "Treasury & Risk",
         "account_id": RISK_DATA["account_id"],
-        "results": results,
-        "total_results": len(results)
-    }
+        "results": page
+    }, book.partial))
 
-def get_market_data():
-    """Get current market data"""
-    return {
-        "market_data": RISK_DATA["market_data"],
-        "note": "Use live FRED/Treasury APIs in production"
-    }
+def market_series():
+    """The market-data store, with new append files read unless the caller's budget is nearly spent"""
+    if not deadlines.budget_low():
+        MARKET_SERIES.maybe_refresh()
+    return MARKET_SERIES
+
+def get_market_data(series=None, start_date=None, end_date=None, as_of=None, frequency=None, aggregate=None):
+    """Get market data as of a date (latest by default), or its history over a date range"""
+    return compact("get_market_data", market_data_result(
+        market_series(), RISK_DATA.get("market_data", {}), series=series, start_date=start_date,
+        end_date=end_date, as_of=as_of, frequency=frequency, aggregate=aggregate
+    ))
 
-def calculate_expected_loss(industry, exposure_millions):
-    """Calculate expected loss for industry and exposure"""
-    industry_models = []
-    for bank in RISK_DATA["banks"]:
-        for model in bank["risk_models"]:
-            if industry.lower() in model["industry"].lower():
-                industry_models.append(model)
+def calculate_expected_loss(industry, exposure_millions, maturity_years=None, as_of=None):
+    """Calculate expected loss for industry and exposure (lifetime and discounted over maturity_years when given)"""
+    models = RISK_MODELS.rows()
+    industry_models = [m for m in models if industry.lower() in m["industry"].lower()]
     
     if not industry_models:
         return {"error": f"No risk models found for industry: {industry}"}
@@ -66,7 +68,7 @@ def calculate_expected_loss(industry, exposure_millions):
     avg_el = sum(m["expected_loss_pct"] for m in industry_models) / len(industry_models)
     expected_loss_amount = exposure_millions * (avg_el / 100)
     
-    return {
+    result = {
         "industry": industry,
         "exposure_millions": exposure_millions,
         "average_pd_pct": round(avg_pd, 2),
@@ -75,60 +77,63 @@ def calculate_expected_loss(industry, exposure_millions):
         "expected_loss_millions": round(expected_loss_amount, 2),
         "models_used": len(industry_models)
     }
+    if maturity_years is not None:
+        result.update(discounted_expected_loss(exposure_millions, maturity_years, avg_pd, avg_lgd, as_of))
+    return compact("calculate_expected_loss", partial(result, models.partial))
 
-# MCP Tool Registry
-TOOLS = {
-    "query_risk_models": {
-        "function": query_risk_models,
-        "description": "Query risk models (PD, LGD, Expected Loss) by bank and industry",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "bank_name": {"type": "string", "description": "Filter by bank"},
-                "industry": {"type": "string", "description": "Filter by industry"}
-            }
-        }
-    },
-    "get_market_data": {
-        "function": get_market_data,
-        "description": "Get current market data (Treasury yields, Fed Funds rate)",
-        "inputSchema": {"type": "object", "properties": {}}
-    },
-    "calculate_expected_loss": {
-        "function": calculate_expected_loss,
-        "description": "Calculate expected loss for a given industry and exposure amount",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "industry": {"type": "string", "description": "Industry name"},
-                "exposure_millions": {"type": "number", "description": "Loan exposure in millions"}
-            },
-            "required": ["industry", "exposure_millions"]
-        }
+def discounted_expected_loss(exposure_millions, maturity_years, pd_pct, lgd_pct, as_of=None):
+    """Lifetime expected loss over the maturity and its present value on the yield curve"""
+    curve = curve_for(market_series(), RISK_DATA.get("market_data", {}), as_of)
+    lifetime, present = portfolio_expected_loss(curve, [exposure_millions], [maturity_years], [pd_pct], [lgd_pct])
+    return {
+        "maturity_years": maturity_years,
+        "lifetime_expected_loss_millions": round(float(lifetime[0]), 2),
+        "pv_expected_loss_millions": round(float(present[0]), 2),
+        "curve": curve.describe()
     }
-}
+
+def calculate_pv_expected_loss(exposures_millions, maturities_years, industries, bank_name=None, as_of=None,
+                               interpolation=None):
+    """Present value of lifetime expected loss for a loan book, discounted on the yield curve as of a date"""
+    models = RISK_MODELS.rows()
+    curve = curve_for(market_series(), RISK_DATA.get("market_data", {}), as_of, interpolation)
+    return compact("calculate_pv_expected_loss", partial(pv_expected_loss_result(
+        curve, models, exposures_millions, maturities_years, industries, bank_name
+    ), models.partial))
+
+# MCP Tool Registry: routing table and argument validators compiled from the gateway's tool_schema.json
+TOOLS = tool_routing.build_registry(tool_routing.SCHEMA_PATH, {
+    "query_risk_models": query_risk_models,
+    "get_market_data": get_market_data,
+    "calculate_expected_loss": calculate_expected_loss,
+    "calculate_pv_expected_loss": calculate_pv_expected_loss,
+})
 
 def lambda_handler(event, context):
-    """Gateway Lambda Handler - receives direct property mapping"""
+    """Gateway Lambda Handler - tool named in the client context, arguments as event properties"""
+    # Trace context and deadline are request metadata, not tool arguments
+    event = dict(event or {})
+    meta = event.pop('_meta', None)
+    return handle(tool_routing.tool_name(context), event, meta, context)
+
+def handle(tool_name, arguments, meta=None, context=None):
+    """One tool call under the caller's trace and deadline (Lambda and mcp_http_server entry point)"""
+    with tracing.trace("lambda.handler", traceparent=tracing.lambda_traceparent(meta, context),
+                       tool=tool_name, arguments=sorted(arguments)), \
+            deadlines.scope(deadlines.lambda_deadline(meta, context)):
+        if deadlines.expired():
+            # The caller has already given up; don't spend capacity on an answer nobody reads
+            return {"error": "Request deadline exceeded"}
+        return dispatch(tool_name, arguments)
+
+def dispatch(tool_name, arguments):
+    """Run the named tool with schema-validated arguments"""
+    if tool_name is None:
+        return {"error": f"No tool name in the request context ({tool_routing.TOOL_NAME_KEY})"}
     try:
-        # Gateway passes tool arguments directly as event properties
-        
-        if 'industry' in event and 'exposure_millions' in event:
-            # calculate_expected_loss
-            result = calculate_expected_loss(event['industry'], event['exposure_millions'])
-        elif 'bank_name' in event or 'industry' in event:
-            # query_risk_models
-            result = query_risk_models(
-                bank_name=event.get('bank_name'),
-                industry=event.get('industry')
-            )
-        elif len(event) == 0:
-            # get_market_data
-            result = get_market_data()
-        else:
-            return {"error": "Unknown tool or missing parameters"}
-        
-        return result
-    
+        # Delta polling is optional: skip it when the caller's budget is nearly spent
+        if not deadlines.budget_low():
+            RISK_MODELS.maybe_refresh()
+        return tool_routing.call(TOOLS, tool_name, arguments)
     except Exception as e:
         return {"error": str(e)}
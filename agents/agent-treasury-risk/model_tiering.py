@@ -0,0 +1,266 @@
+"""Model Tiering
+Routes each model call in a turn to a small fast model or the large one, escalating when the small model's output fails validation
+
+    router = ModelRouter(prose=True)
+    agent = Agent(model=router.large, hooks=[router], ...)
+
+    with model_tiering.turn() as turn:
+        async for event in turn.guard(agent.stream_async(prompt)):
+            ...
+    turn.summary()   # {"small": 2, "large": 1, "escalations": 0, "calls": [...]}
+
+In a turn that starts from a short lookup-style prompt, the small model
+picks the tool and its arguments and reads small tool results (formatting a
+few numbers). Long or analytical prompts, large tool results and, for
+agents that answer in memo prose, the answer written from tool results go
+to the large model.
+A small-model call that returns an invalid tool call, a truncated or
+badly formatted answer, or an error is retried on the large model; its
+streamed events are held back until it passes, so a rejected attempt
+never reaches the caller.
+"""
+import contextvars
+import functools
+import os
+import re
+from contextlib import contextmanager
+
+from strands.hooks import AfterModelCallEvent, BeforeModelCallEvent, HookProvider
+from strands.models import BedrockModel
+
+try:
+    import yaml
+except ImportError:  # Env overrides (or the model defaults) apply without it
+    yaml = None
+
+AGENTCORE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agentcore.yaml')
+DEFAULT_SMALL_MODEL_ID = 'anthropic.claude-3-5-haiku-20241022-v1:0'
+MODEL_TIERING = os.getenv('MODEL_TIERING', 'true').lower() == 'true'
+SMALL_PROMPT_CHARS = int(os.getenv('MODEL_TIER_SMALL_PROMPT_CHARS', '300'))
+SMALL_TOOL_RESULT_CHARS = int(os.getenv('MODEL_TIER_SMALL_TOOL_RESULT_CHARS', '2000'))
+
+# Prompts asking for reasoning rather than a lookup
+_COMPLEX_PROMPT = re.compile(
+    r"\b(?:analy[sz]e|assess|compare|evaluate|explain|why|recommend|memo|report|strategy|versus|vs)\b", re.I)
+_LIST_LINE = re.compile(r"^\s*(?:[-*•]|\d+[.)]|#+)\s", re.M)
+
+_turn = contextvars.ContextVar('model_tier_turn', default=None)
+
+
+def model_ids(path=AGENTCORE_CONFIG):
+    """(small, large) model ids: small_model_id / model_id from agentcore.yaml; env overrides win"""
+    small, large = DEFAULT_SMALL_MODEL_ID, None
+    if yaml is not None and os.path.exists(path):
+        try:
+            with open(path) as f:
+                config = yaml.safe_load(f) or {}
+            small = config.get('small_model_id', small)
+            large = config.get('model_id', large)
+        except Exception as e:
+            print(f"Error reading model ids from {path}: {e}")
+    return os.getenv('SMALL_MODEL_ID', small), os.getenv('LARGE_MODEL_ID', large)
+
+
+@functools.lru_cache(maxsize=None)
+def models(make_model=BedrockModel):
+    """(small, large) models, built once per process and shared by every agent"""
+    small_id, large_id = model_ids()
+    large = make_model(model_id=large_id) if large_id else make_model()
+    return make_model(model_id=small_id), large
+
+
+def _text(content):
+    """Text of a message's content blocks, tool results included"""
+    parts = []
+    for block in content:
+        if "text" in block:
+            parts.append(block["text"])
+        elif "toolResult" in block:
+            parts.extend(_text(block["toolResult"].get("content", [])))
+        elif "json" in block:
+            parts.append(str(block["json"]))
+    return parts
+
+
+def is_prose(text):
+    """Memo format: paragraphs of narrative text, no bullets, numbered lists or headers"""
+    return bool(text.strip()) and not _LIST_LINE.search(text)
+
+
+class Turn:
+    """Model choices of one request, and the gate holding back unvalidated small-model output"""
+
+    def __init__(self):
+        self.calls = []
+        self.escalations = 0
+        self.escalated = False
+        self.holding = False
+        self.discard = False
+
+    async def guard(self, events, on_discard=None):
+        """Pass stream events through, holding a small-model call's events until it is accepted.
+
+        Events of a rejected attempt are dropped; on_discard(event) still sees
+        each of them (e.g. to count the tokens the attempt used).
+        """
+        held = []
+        async for event in events:
+            if self.discard:
+                self._drop(held, on_discard)
+            if self.holding:
+                held.append(event)
+                continue
+            for pending in held:
+                yield pending
+            held.clear()
+            yield event
+        if self.discard:
+            self._drop(held, on_discard)
+        for pending in held:
+            yield pending
+
+    def _drop(self, held, on_discard):
+        if on_discard is not None:
+            for event in held:
+                on_discard(event)
+        held.clear()
+        self.discard = False
+
+    def summary(self):
+        return {
+            "small": sum(1 for call in self.calls if call["tier"] == "small"),
+            "large": sum(1 for call in self.calls if call["tier"] == "large"),
+            "escalations": self.escalations,
+            "calls": self.calls
+        }
+
+
+@contextmanager
+def turn():
+    """Scope one request; model calls outside a turn always use the large model"""
+    current = Turn()
+    token = _turn.set(current)
+    try:
+        yield current
+    finally:
+        try:
+            _turn.reset(token)
+        except ValueError:  # Exited from another context (async generator finalized elsewhere)
+            pass
+
+
+class ModelRouter(HookProvider):
+    """Per-call model selection for one agent (a strands hook provider).
+
+    Args:
+        small / large: Models to choose between (default: models())
+        prose: True when final answers must be narrative prose (memo format);
+            answers written from tool results then always use the large model
+        enabled: False pins every call to the large model
+    """
+
+    def __init__(self, small=None, large=None, prose=False, enabled=MODEL_TIERING):
+        if small is None or large is None:
+            default_small, default_large = models()
+            small = default_small if small is None else small
+            large = default_large if large is None else large
+        self.small = small
+        self.large = large
+        self.prose = prose
+        self.enabled = enabled
+
+    def register_hooks(self, registry, **kwargs):
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.after_model_call)
+
+    def choose(self, messages):
+        """("small" | "large", reason) for the next call, from the user's prompt and what the model is about to read"""
+        prompt = next((" ".join(_text(m.get("content", []))) for m in reversed(messages)
+                       if m.get("role") == "user" and not any("toolResult" in b for b in m.get("content", []))), "")
+        if len(prompt) > SMALL_PROMPT_CHARS:
+            return "large", f"prompt {len(prompt)} chars"
+        if _COMPLEX_PROMPT.search(prompt):
+            return "large", "analytical prompt"
+        content = messages[-1].get("content", []) if messages else []
+        if any("toolResult" in block for block in content):
+            size = sum(len(part) for part in _text(content))
+            if self.prose:
+                return "large", "prose answer from tool results"
+            if size > SMALL_TOOL_RESULT_CHARS:
+                return "large", f"tool result {size} chars"
+            return "small", f"tool result {size} chars"
+        return "small", f"prompt {len(prompt)} chars"
+
+    def before_model_call(self, event: BeforeModelCallEvent):
+        current = _turn.get()
+        if current is None or not self.enabled:
+            tier, reason = "large", "tiering off"
+        elif current.escalated:
+            tier, reason = "large", "escalated"
+        else:
+            tier, reason = self.choose(event.agent.messages)
+        event.agent.model = self.small if tier == "small" else self.large
+        if current is not None:
+            current.holding = tier == "small"
+            current.calls.append({"tier": tier, "reason": reason})
+
+    def after_model_call(self, event: AfterModelCallEvent):
+        current = _turn.get()
+        if current is None or not current.holding:
+            return
+        problem = self.validate(event)
+        current.holding = False
+        if problem is None:
+            return
+        # Discard the small model's attempt and redo the call (and the rest of the turn) on the large model
+        print(f"Model tier: escalating to large model ({problem})")
+        current.calls[-1]["rejected"] = problem
+        current.escalations += 1
+        current.escalated = True
+        current.discard = True
+        event.retry = True
+
+    def validate(self, event):
+        """Why a small-model response can't be used, or None"""
+        if event.exception is not None:
+            return f"error: {event.exception}"
+        response = event.stop_response
+        if response.stop_reason == "max_tokens":
+            return "output truncated"
+        content = response.message.get("content", [])
+        if response.stop_reason == "tool_use":
+            specs = {spec["name"]: spec for spec in event.agent.tool_registry.get_all_tool_specs()}
+            for block in content:
+                if "toolUse" in block:
+                    problem = self.check_tool_use(block["toolUse"], specs)
+                    if problem:
+                        return problem
+            return None
+        text = "".join(_text(content))
+        if not text.strip():
+            return "empty answer"
+        if self.prose and not is_prose(text):
+            return "answer not in prose format"
+        return None
+
+    @staticmethod
+    def check_tool_use(tool_use, specs):
+        """Tool call against the tool's input schema: known tool, required arguments, no unknown ones, JSON types"""
+        spec = specs.get(tool_use.get("name"))
+        if spec is None:
+            return f"unknown tool {tool_use.get('name')}"
+        schema = spec["inputSchema"].get("json", spec["inputSchema"])
+        properties = schema.get("properties", {})
+        arguments = tool_use.get("input")
+        if not isinstance(arguments, dict):
+            return f"{spec['name']}: arguments are not an object"
+        missing = set(schema.get("required", [])) - set(arguments)
+        unknown = set(arguments) - set(properties)
+        if missing or unknown:
+            return f"{spec['name']}: missing {sorted(missing)}, unknown {sorted(unknown)}"
+        types = {"string": str, "integer": int, "number": (int, float), "boolean": bool, "array": list, "object": dict}
+        for name, value in arguments.items():
+            expected = types.get(properties[name].get("type"))
+            if value is not None and expected and not isinstance(value, expected):
+                return f"{spec['name']}: {name} should be {properties[name]['type']}"
+        return None
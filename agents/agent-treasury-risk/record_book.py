@@ -0,0 +1,243 @@
+"""Indexed Record Book
+Flat LOB records with precomputed sort orderings, cursor pagination and field projection
+"""
+import base64
+import bisect
+import copy
+import json
+import zlib
+
+import tracing
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class Page(list):
+    """One page of query results; knows how to resume after any of its rows"""
+
+    def __init__(self, rows, positions, token, has_more):
+        super().__init__(rows)
+        self.positions = positions
+        self.token = token
+        self.has_more = has_more
+
+    def cursor_after(self, count):
+        """Cursor resuming after the first `count` rows of this page"""
+        if count < len(self):
+            return _encode_cursor(self.token, self.positions[count - 1] + 1 if count else self.positions[0])
+        return self.next_cursor
+
+    @property
+    def next_cursor(self):
+        if not self.has_more:
+            return None
+        return _encode_cursor(self.token, self.positions[-1] + 1)
+
+
+def _encode_cursor(token, position):
+    raw = json.dumps({"t": token, "p": position}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, token):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = int(state["p"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if state.get("t") != token:
+        raise ValueError("Cursor does not match this query's filters or sort order")
+    return position
+
+
+def key_index(rows, key_fields):
+    """Row key -> position; refuses rows whose keys are not unique (a delta could not tell them apart)"""
+    index = {tuple(r[f] for f in key_fields): i for i, r in enumerate(rows)}
+    if len(index) != len(rows):
+        raise ValueError(f"{len(rows) - len(index)} rows share a ({', '.join(key_fields)}) key; "
+                         "deltas need a unique key per row")
+    return index
+
+
+def parse_fields(fields):
+    """Accept a list or a comma-separated string of field names"""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return [f.strip() for f in fields if f.strip()]
+
+
+class RecordBook:
+    """Flat records plus one precomputed ordering per sortable field.
+
+    A sorted page walks the precomputed ordering from the cursor position,
+    so it costs O(page) (plus skipped non-matching rows) rather than a sort
+    of the whole book per request.
+
+    Args:
+        rows: List of flat record dicts
+        sort_fields: Fields that get a precomputed ordering, or a dict of
+            field -> sort key function for fields without a natural order
+        text_fields: Fields filtered by case-insensitive substring match
+    """
+
+    def __init__(self, rows, sort_fields=(), text_fields=()):
+        self.rows = rows
+        self.partial = False  # Set by PartitionStore when built before every partition arrived
+        if not isinstance(sort_fields, dict):
+            sort_fields = {f: None for f in sort_fields}
+        self.sort_fields = tuple(sort_fields)
+        self.text_fields = tuple(text_fields)
+        self.columns = list(rows[0]) if rows else []
+        self._lower = {f: [str(r[f]).lower() for r in rows] for f in self.text_fields}
+        self._sort_keys = {
+            f: (lambda row, f=f, k=key: k(row[f])) if key else (lambda row, f=f: row[f])
+            for f, key in sort_fields.items()
+        }
+        self.orderings = {
+            f: sorted(range(len(rows)), key=lambda i, k=k: k(rows[i]))
+            for f, k in self._sort_keys.items()
+        }
+        self._key_index = None
+
+    def _locate(self, field, index):
+        """Position of row `index` in the field's ordering (binary search, then scan ties)"""
+        ordering, sort_key = self.orderings[field], self._sort_keys[field]
+        position = bisect.bisect_left(ordering, sort_key(self.rows[index]), key=lambda i: sort_key(self.rows[i]))
+        while ordering[position] != index:
+            position += 1
+        return position
+
+    def _insort(self, field, index):
+        ordering, sort_key = self.orderings[field], self._sort_keys[field]
+        position = bisect.bisect_right(ordering, sort_key(self.rows[index]), key=lambda i: sort_key(self.rows[i]))
+        ordering.insert(position, index)
+
+    def _set_row(self, index, row):
+        self.rows[index] = row
+        for f in self.text_fields:
+            self._lower[f][index] = str(row[f]).lower()
+
+    def _append(self, row):
+        self.rows.append(row)
+        for f in self.text_fields:
+            self._lower[f].append(str(row[f]).lower())
+        for f in self.orderings:
+            self._insort(f, len(self.rows) - 1)
+        if not self.columns:
+            self.columns = list(row)
+
+    def _replace(self, index, row):
+        for f in self.orderings:
+            del self.orderings[f][self._locate(f, index)]
+        self._set_row(index, row)
+        for f in self.orderings:
+            self._insort(f, index)
+
+    def _remove(self, index):
+        """Delete row `index` by moving the last row into its slot"""
+        last = len(self.rows) - 1
+        for f, ordering in self.orderings.items():
+            del ordering[self._locate(f, index)]
+            if index != last:
+                ordering[self._locate(f, last)] = index
+        if index != last:
+            self._set_row(index, self.rows[last])
+        self.rows.pop()
+        for f in self.text_fields:
+            self._lower[f].pop()
+        return self.rows[index] if index != last else None
+
+    def apply(self, changes, key_fields):
+        """Apply ("insert" | "update" | "delete", record) changes in place.
+
+        Rows are matched on key_fields (which must be unique per row, or
+        ValueError); insert and update both upsert. Orderings and filter
+        columns are patched with binary searches rather than rebuilt, so a
+        small delta costs O(changes * log n) lookups plus list shifts instead
+        of a full re-sort. Cursors issued before the change may skip or
+        repeat rows that moved. Not safe while other threads query the
+        book: use patched() for a shared one.
+        """
+        if self._key_index is None:
+            self._key_index = key_index(self.rows, key_fields)
+        index = self._key_index
+        for op, record in changes:
+            key = tuple(record[f] for f in key_fields)
+            position = index.get(key)
+            if op == "delete":
+                if position is not None:
+                    del index[key]
+                    moved = self._remove(position)
+                    if moved is not None:
+                        index[tuple(moved[f] for f in key_fields)] = position
+            elif position is None:
+                self._append(record)
+                index[key] = len(self.rows) - 1
+            else:
+                self._replace(position, record)
+
+    def patched(self, changes, key_fields):
+        """Copy of the book with the changes applied; the original is untouched, so readers can keep using it.
+
+        Copies the row and index lists (C-level list copies, no re-sort)
+        and patches the copy as apply() does.
+        """
+        book = copy.copy(self)
+        book.rows = list(self.rows)
+        book._lower = {f: list(values) for f, values in self._lower.items()}
+        book.orderings = {f: list(ordering) for f, ordering in self.orderings.items()}
+        book._key_index = dict(self._key_index) if self._key_index is not None else None
+        book.apply(changes, key_fields)
+        return book
+
+    def _ordering(self, sort_by):
+        """Return (row-index lookup, descending) for a sort_by spec like "-loan_amount_millions" """
+        if not sort_by:
+            return None, False
+        descending = sort_by.startswith('-')
+        field = sort_by.lstrip('-+')
+        if field not in self.orderings:
+            raise ValueError(f"Cannot sort by '{field}'. Sortable fields: {', '.join(self.sort_fields)}")
+        return self.orderings[field], descending
+
+    def query(self, filters=None, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, sort_by=None):
+        """Return a Page of matching rows.
+
+        Args:
+            filters: Field -> substring (case-insensitive); empty values are ignored
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: Opaque cursor from a previous page's next_cursor
+            fields: Columns to return (default: all)
+            sort_by: Sortable field, prefix with '-' for descending (default: book order)
+        """
+        filters = {k: str(v).lower() for k, v in (filters or {}).items() if v}
+        fields = parse_fields(fields)
+        if fields:
+            unknown = [f for f in fields if f not in self.columns]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(self.columns)}")
+        limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        ordering, descending = self._ordering(sort_by)
+
+        token = zlib.crc32(json.dumps([filters, sort_by or ""], sort_keys=True).encode())
+        position = _decode_cursor(cursor, token) if cursor else 0
+
+        with tracing.span("index.lookup", sort_by=sort_by, filters=len(filters)):
+            total = len(self.rows)
+            rows, positions = [], []
+            while position < total:
+                index = position
+                if ordering is not None:
+                    index = ordering[total - 1 - position] if descending else ordering[position]
+                if all(needle in self._lower[f][index] for f, needle in filters.items()):
+                    if len(rows) == limit:
+                        break
+                    row = self.rows[index]
+                    rows.append({f: row[f] for f in fields} if fields else dict(row))
+                    positions.append(position)
+                position += 1
+        return Page(rows, positions, token, has_more=position < total)
@@ -0,0 +1,40 @@
+"""Treasury & Risk Model Data
+Partitioned, indexed risk-model store shared by the agent and the gateway Lambda
+"""
+from partition_store import PartitionStore
+
+SORT_FIELDS = {
+    "probability_of_default_pct": None,
+    "loss_given_default_pct": None,
+    "expected_loss_pct": None,
+    "bank": str.lower,
+    "industry": str.lower
+}
+TEXT_FIELDS = ("bank", "industry")
+
+
+def risk_model_record(bank_name, model):
+    """Flat record for one bank/industry risk model"""
+    return {
+        "bank": bank_name,
+        "industry": model["industry"],
+        "probability_of_default_pct": model["probability_of_default_pct"],
+        "loss_given_default_pct": model["loss_given_default_pct"],
+        "expected_loss_pct": model["expected_loss_pct"],
+        "rating_equivalent": model["rating_equivalent"]
+    }
+
+
+def create_risk_store(s3, bucket):
+    """Risk-model store partitioned by bank (one row per industry, so no finer split)"""
+    return PartitionStore(
+        s3, bucket,
+        prefix='data/',
+        snapshot_key='data/risk_models.json',
+        records_key='risk_models',
+        to_record=risk_model_record,
+        partition_by=("bank",),
+        key_fields=("bank", "industry"),
+        sort_fields=SORT_FIELDS,
+        text_fields=TEXT_FIELDS
+    ).start()
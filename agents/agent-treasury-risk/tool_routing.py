@@ -0,0 +1,107 @@
+"""Schema-Driven Tool Routing
+Routing table and argument validators compiled once from tool_schema.json, so a gateway call is dispatched by its tool name
+
+    TOOLS = build_registry(SCHEMA_PATH, {"query_customer_loans": query_customer_loans, ...})
+    result = call(TOOLS, tool_name(context), arguments)
+
+The gateway names the tool in context.client_context.custom
+["bedrockAgentCoreToolName"] as "<target>___<tool>"; arguments arrive as
+the event's properties. Bad arguments come back as an error that names the
+tool and the problem, so the model can fix the call instead of guessing.
+"""
+import json
+import os
+
+TOOL_NAME_KEY = 'bedrockAgentCoreToolName'
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tool_schema.json')
+
+# JSON Schema type -> accepted Python types (bool is an int subclass, so it's excluded explicitly)
+_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+class ToolArgumentError(ValueError):
+    """Arguments don't match the tool's input schema"""
+
+
+def tool_name(context):
+    """Tool name the gateway put in the Lambda client context, without its target prefix (None if absent)"""
+    custom = getattr(getattr(context, 'client_context', None), 'custom', None) or {}
+    name = custom.get(TOOL_NAME_KEY)
+    return name.split('___', 1)[-1] if name else None
+
+
+def _type_check(spec):
+    """(accepted types, item types) for one property schema; None where it is unconstrained"""
+    accepted = _TYPES.get(spec.get("type"))
+    items = _TYPES.get((spec.get("items") or {}).get("type")) if spec.get("type") == "array" else None
+    return accepted, items
+
+
+def _matches(value, accepted):
+    return isinstance(value, accepted) and not (isinstance(value, bool) and bool not in accepted)
+
+
+def compile_validator(name, schema):
+    """Validator for one tool's inputSchema: arguments dict -> kwargs for the tool function"""
+    properties = schema.get("properties", {})
+    required = frozenset(schema.get("required", ()))
+    checks = {prop: _type_check(spec) for prop, spec in properties.items()}
+
+    def validate(arguments):
+        unknown = arguments.keys() - checks.keys()
+        if unknown:
+            raise ToolArgumentError(f"{name}: unknown argument(s) {sorted(unknown)}; expected {sorted(checks)}")
+        missing = required - {k for k, v in arguments.items() if v is not None}
+        if missing:
+            raise ToolArgumentError(f"{name}: missing required argument(s) {sorted(missing)}")
+        for prop, value in arguments.items():
+            accepted, items = checks[prop]
+            if value is None or accepted is None:
+                continue
+            if not _matches(value, accepted):
+                raise ToolArgumentError(f"{name}: {prop} must be {properties[prop]['type']}")
+            if items and not all(_matches(item, items) for item in value):
+                raise ToolArgumentError(f"{name}: {prop} items must be {properties[prop]['items']['type']}")
+        return arguments
+
+    return validate
+
+
+def build_registry(schema_path, functions):
+    """Tool name -> {"function", "description", "inputSchema", "validate"} from the gateway's tool schema file"""
+    with open(schema_path) as f:
+        schemas = json.load(f)
+    registry = {}
+    for tool in schemas:
+        name = tool["name"]
+        if name not in functions:
+            raise ValueError(f"{schema_path}: no function for tool {name}")
+        registry[name] = {
+            "function": functions[name],
+            "description": tool["description"],
+            "inputSchema": tool["inputSchema"],
+            "validate": compile_validator(name, tool["inputSchema"])
+        }
+    extra = set(functions) - set(registry)
+    if extra:
+        raise ValueError(f"{schema_path}: functions without a schema {sorted(extra)}")
+    return registry
+
+
+def call(registry, name, arguments):
+    """Validate arguments against the tool's schema and run it; unknown tools and bad arguments become error results"""
+    tool = registry.get(name)
+    if tool is None:
+        return {"error": f"Unknown tool: {name}. Available: {sorted(registry)}"}
+    try:
+        kwargs = tool["validate"](arguments)
+    except ToolArgumentError as e:
+        return {"error": str(e)}
+    return tool["function"](**kwargs)
@@ -3,70 +3,79 @@ Exposes treasury positions and risk models via MCP protocol
 """
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 from strands import Agent, tool
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from session_pool import AgentPool, CONVERSATION_WINDOW
+from fast_path import FastPathRouter, remember, stream_text
+from tool_output import encode
+from risk_data import create_risk_store
+from market_data import create_market_store, market_data_result
+from yield_curve import curve_for, portfolio_expected_loss, pv_expected_loss_result
+import asyncio
 import boto3
 import json
+import model_tiering
 import os
+import tracing
 
 app = BedrockAgentCoreApp()
 
-# Load hybrid data from S3
-s3 = boto3.client('s3')
+# Load hybrid data from S3: manifest now, per-bank partitions as queries touch them
 S3_BUCKET = os.getenv('DATA_BUCKET', 'treasury-risk-058264155998')
-S3_KEY = 'data/risk_models.json'
 
-def load_data_from_s3():
-    """Load risk models data from S3"""
-    try:
-        response = s3.get_object(Bucket=S3_BUCKET, Key=S3_KEY)
-        return json.loads(response['Body'].read().decode('utf-8'))
-    except Exception as e:
-        print(f"Error loading data from S3: {e}")
-        return {"banks": [], "market_data": {}}
-
-RISK_DATA = load_data_from_s3()
+# S3 client built on first load (LAZY_INIT defers both to the first tool call)
+RISK_MODELS = create_risk_store(lambda: boto3.client('s3'), S3_BUCKET)
+RISK_DATA = RISK_MODELS.meta
+MARKET_SERIES = create_market_store(lambda: boto3.client('s3'), S3_BUCKET)
 
 @tool
-def query_risk_models(bank_name: str = None, industry: str = None) -> str:
-    """Query risk models (PD, LGD, Expected Loss) by bank and industry.
+def query_risk_models(bank_name: str = None, industry: str = None,
+                      limit: int = 50, cursor: str = None, fields: list[str] = None, sort_by: str = None) -> str:
+    """Query risk models (PD, LGD, Expected Loss) by bank and industry, one page at a time.
     
     Args:
         bank_name: Filter by bank (Wells Fargo, U.S. Bancorp, Charles Schwab)
         industry: Filter by industry (Technology, Healthcare, Energy, Retail, Financial Services)
+        limit: Maximum rows to return (default 50, max 500)
+        cursor: next_cursor from a previous call to fetch the following page
+        fields: Columns to return (bank, industry, probability_of_default_pct, loss_given_default_pct, expected_loss_pct, rating_equivalent)
+        sort_by: Sort column (probability_of_default_pct, loss_given_default_pct, expected_loss_pct, bank, industry); prefix '-' for descending
     """
-    results = []
-    
-    for bank in RISK_DATA["banks"]:
-        if bank_name and bank_name.lower() not in bank["bank_name"].lower():
-            continue
-            
-        for model in bank["risk_models"]:
-            if industry and industry.lower() not in model["industry"].lower():
-                continue
-                
-            results.append({
-                "bank": bank["bank_name"],
-                "industry": model["industry"],
-                "probability_of_default_pct": model["probability_of_default_pct"],
-                "loss_given_default_pct": model["loss_given_default_pct"],
-                "expected_loss_pct": model["expected_loss_pct"],
-                "rating_equivalent": model["rating_equivalent"]
-            })
+    try:
+        page = RISK_MODELS.book(bank=bank_name).query(
+            {"bank": bank_name, "industry": industry},
+            limit=limit, cursor=cursor, fields=fields, sort_by=sort_by
+        )
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
     
-    return json.dumps({
+    return encode("query_risk_models", {
         "lob": "Treasury & Risk",
         "account_id": RISK_DATA["account_id"],
         "data_source": RISK_DATA["data_source"],
-        "results": results,
-        "total_results": len(results)
-    }, indent=2)
+        "results": page
+    })
 
 @tool
-def get_market_data() -> str:
-    """Get current market data (Treasury yields, Fed Funds rate)."""
-    return json.dumps({
-        "market_data": RISK_DATA["market_data"],
-        "note": "Use live FRED/Treasury APIs in production"
-    }, indent=2)
+def get_market_data(series: list[str] = None, start_date: str = None, end_date: str = None, as_of: str = None,
+                    frequency: str = None, aggregate: str = None) -> str:
+    """Get market data (Treasury yields, Fed Funds rate): the latest values, values as of a date, or history over a date range.
+    
+    Args:
+        series: Series to return (treasury_10y_yield, treasury_2y_yield, fed_funds_rate); all by default
+        start_date: History start date (YYYY-MM-DD)
+        end_date: History end date (YYYY-MM-DD)
+        as_of: Values as of this date (YYYY-MM-DD) instead of the latest
+        frequency: History period (daily, weekly, monthly, quarterly, yearly); chosen to fit when omitted
+        aggregate: Value per history period (last, first, mean, min, max); default last
+    """
+    try:
+        MARKET_SERIES.maybe_refresh()
+        result = market_data_result(MARKET_SERIES, RISK_DATA.get("market_data", {}), series=series,
+                                    start_date=start_date, end_date=end_date, as_of=as_of,
+                                    frequency=frequency, aggregate=aggregate)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    return encode("get_market_data", result)
 
 @tool
 def get_bank_capital_ratios(bank_name: str) -> str:
@@ -75,31 +84,29 @@ def get_bank_capital_ratios(bank_name: str) -> str:
     Args:
         bank_name: Bank name (Wells Fargo, U.S. Bancorp, Charles Schwab)
     """
-    for bank in RISK_DATA["banks"]:
-        if bank_name.lower() in bank["bank_name"].lower():
-            return json.dumps({
-                "bank_name": bank["bank_name"],
-                "capital_ratios": bank["capital_ratios"],
-                "note": "Use live FDIC API in production"
-            }, indent=2)
+    bank = RISK_MODELS.bank(bank_name)
+    if bank:
+        return encode("get_bank_capital_ratios", {
+            "bank_name": bank["bank_name"],
+            "capital_ratios": bank["capital_ratios"],
+            "note": "Use live FDIC API in production"
+        })
     
     return json.dumps({"error": f"Bank {bank_name} not found"})
 
 @tool
-def calculate_expected_loss(industry: str, exposure_millions: float) -> str:
+def calculate_expected_loss(industry: str, exposure_millions: float, maturity_years: float = None,
+                            as_of: str = None) -> str:
     """Calculate expected loss for a given industry and exposure amount.
     
     Args:
         industry: Industry name
         exposure_millions: Loan exposure in millions
+        maturity_years: Loan maturity in years; adds lifetime expected loss and its present value on the yield curve
+        as_of: Yield curve date (YYYY-MM-DD); latest by default
     """
     # Average risk metrics across all banks for the industry
-    industry_models = []
-    
-    for bank in RISK_DATA["banks"]:
-        for model in bank["risk_models"]:
-            if industry.lower() in model["industry"].lower():
-                industry_models.append(model)
+    industry_models = [m for m in RISK_MODELS.rows() if industry.lower() in m["industry"].lower()]
     
     if not industry_models:
         return json.dumps({"error": f"No risk models found for industry: {industry}"})
@@ -110,7 +117,7 @@ def calculate_expected_loss(industry: str, exposure_millions: float) -> str:
     
     expected_loss_amount = exposure_millions * (avg_el / 100)
     
-    return json.dumps({
+    result = {
         "industry": industry,
         "exposure_millions": exposure_millions,
         "average_pd_pct": round(avg_pd, 2),
@@ -118,11 +125,88 @@ def calculate_expected_loss(industry: str, exposure_millions: float) -> str:
         "average_el_pct": round(avg_el, 2),
         "expected_loss_millions": round(expected_loss_amount, 2),
         "models_used": len(industry_models)
-    }, indent=2)
+    }
+    if maturity_years is not None:
+        try:
+            MARKET_SERIES.maybe_refresh()
+            curve = curve_for(MARKET_SERIES, RISK_DATA.get("market_data", {}), as_of)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
+        lifetime, present = portfolio_expected_loss(curve, [exposure_millions], [maturity_years], [avg_pd], [avg_lgd])
+        result.update({
+            "maturity_years": maturity_years,
+            "lifetime_expected_loss_millions": round(float(lifetime[0]), 2),
+            "pv_expected_loss_millions": round(float(present[0]), 2),
+            "curve": curve.describe()
+        })
+    return encode("calculate_expected_loss", result)
 
-# Create agent with MCP tools
-agent = Agent(tools=[query_risk_models, get_market_data, get_bank_capital_ratios, calculate_expected_loss])
-agent.system_prompt = """You are the Treasury & Risk LOB Agent.
+@tool
+def calculate_pv_expected_loss(exposures_millions: list[float], maturities_years: list[float], industries: list[str],
+                               bank_name: str = None, as_of: str = None, interpolation: str = None) -> str:
+    """Present value of lifetime expected loss for a loan book, discounted on the Treasury yield curve.
+    
+    Args:
+        exposures_millions: Exposure of each loan in millions
+        maturities_years: Maturity of each loan in years (same order as exposures_millions)
+        industries: Industry of each loan, or a single industry for the whole book
+        bank_name: Use only this bank's risk models (Wells Fargo, U.S. Bancorp, Charles Schwab)
+        as_of: Yield curve date (YYYY-MM-DD); latest by default
+        interpolation: Curve interpolation between tenors (linear, monotone_cubic); default monotone_cubic
+    """
+    try:
+        MARKET_SERIES.maybe_refresh()
+        curve = curve_for(MARKET_SERIES, RISK_DATA.get("market_data", {}), as_of, interpolation)
+        result = pv_expected_loss_result(curve, RISK_MODELS.rows(), exposures_millions, maturities_years,
+                                         industries, bank_name)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    return encode("calculate_pv_expected_loss", result)
+
+# Fast path: structured prompts answered straight from the tools, no model call
+fast_path = FastPathRouter(lambda: {
+    "bank_name": [bank["bank_name"] for bank in RISK_DATA["banks"]],
+    "industry": RISK_DATA.get("industries", [])
+})
+fast_path.register(
+    get_bank_capital_ratios,
+    [
+        r"capital ratios? (?:for|of) (?P<bank_name>[a-z.&' ]+)",
+        r"(?P<bank_name>[a-z.&' ]+?)(?:'s)? capital ratios?"
+    ],
+    lambda r: f"{r['bank_name']} capital ratios: Tier 1 {r['capital_ratios']['tier1_capital_ratio']}%, "
+              f"Total Capital {r['capital_ratios']['total_capital_ratio']}%, "
+              f"Leverage {r['capital_ratios']['leverage_ratio']}% ({r['capital_ratios']['data_source']})."
+)
+fast_path.register(
+    get_market_data,
+    [r"(?:current |latest )?(?:market data|treasury yields|market rates)"],
+    lambda r: f"Market data: 10Y Treasury {r['market_data']['treasury_10y_yield']}%, "
+              f"2Y Treasury {r['market_data']['treasury_2y_yield']}%, "
+              f"Fed Funds {r['market_data']['fed_funds_rate']}% ({r['market_data']['data_source']})."
+)
+fast_path.register(
+    query_risk_models,
+    [
+        r"risk models? (?:for|of|in) (?:the )?(?P<industry>[a-z&' ]+?)(?: industry| sector)?",
+        r"risk models? (?:for|of|at) (?P<bank_name>[a-z.&' ]+)",
+        r"(?P<industry>[a-z&' ]+?) (?:industry |sector )?risk models?"
+    ],
+    lambda r: f"{len(r['results'])} risk models from Treasury & Risk: " + " ".join(
+        f"{m['bank']} / {m['industry']}: PD {m['probability_of_default_pct']}%, "
+        f"LGD {m['loss_given_default_pct']}%, EL {m['expected_loss_pct']}% ({m['rating_equivalent']})."
+        for m in r["results"]
+    )
+)
+fast_path.register(
+    calculate_expected_loss,
+    [r"expected loss (?:for|on) \$?(?P<exposure_millions>\d{1,3}(?:,\d{3})*(?:\.\d+)?|\d+(?:\.\d+)?) ?(?:m|mm|million)? (?:of |in |to )(?P<industry>[a-z&' ]+?)(?: exposure| loans?)?"],
+    lambda r: f"Expected loss on ${r['exposure_millions']}M of {r['industry']} exposure: ${r['expected_loss_millions']}M "
+              f"(avg PD {r['average_pd_pct']}%, LGD {r['average_lgd_pct']}%, EL {r['average_el_pct']}% across {r['models_used']} models)."
+)
+
+# Agent system prompt
+SYSTEM_PROMPT = """You are the Treasury & Risk LOB Agent.
 
 You provide risk models and treasury positions for:
 - Wells Fargo
@@ -137,13 +221,43 @@ Data Sources:
 Your tools are exposed via MCP protocol for cross-account access from the central orchestrator.
 """
 
+def create_agent():
+    """Build a fresh agent with a bounded conversation window"""
+    router = model_tiering.ModelRouter()
+    return Agent(
+        model=router.large,
+        hooks=[router],
+        tools=[query_risk_models, get_market_data, get_bank_capital_ratios, calculate_expected_loss,
+               calculate_pv_expected_loss],
+        system_prompt=SYSTEM_PROMPT,
+        conversation_manager=SlidingWindowConversationManager(window_size=CONVERSATION_WINDOW)
+    )
+
+# One agent per session; concurrent sessions never share conversation history
+agent_pool = AgentPool(create_agent)
+
 @app.entrypoint
 async def invoke(payload):
     """AgentCore entrypoint with MCP support"""
     user_message = payload.get("prompt", "Hello from Treasury & Risk LOB!")
-    stream = agent.stream_async(user_message)
-    async for event in stream:
-        yield event
+    with tracing.trace("treasury_risk.invoke", traceparent=payload.get("traceparent")) as root, \
+            model_tiering.turn() as turn:
+        # Pick up intraday data deltas (polled at most every DATA_DELTA_POLL_SECONDS)
+        await asyncio.to_thread(RISK_MODELS.maybe_refresh)
+        # The tool may fetch partitions (or build the S3 client): keep it off the event loop
+        answer = await asyncio.to_thread(fast_path.route, user_message)
+        if answer is not None:
+            if payload.get("session_id"):
+                async with agent_pool.session(payload["session_id"]) as agent:
+                    remember(agent, user_message, answer)
+            for event in stream_text(answer):
+                yield event
+        else:
+            async with agent_pool.session(payload.get("session_id")) as agent:
+                async for event in turn.guard(agent.stream_async(user_message)):
+                    yield event
+    print(f"Trace {root.trace_id}: {json.dumps(root.summary)}")
+    yield {"metrics": {"trace": root.summary, "model_tier": turn.summary(), "fast_path": fast_path.stats()}}
 
 if __name__ == "__main__":
     app.run()
@@ -12,7 +12,7 @@ ACCOUNT_ID=$(aws sts get-caller-identity --query Account --output text)
 REGION="us-east-1"
 
 echo "Creating Lambda function..."
-zip function.zip invoke_agent.py
+zip function.zip invoke_agent.py tracing.py deadlines.py
 
 aws lambda create-function \
     --function-name orchestrator-invoke-api \
@@ -66,6 +66,31 @@ aws apigateway put-integration \
     --uri arn:aws:apigateway:${REGION}:lambda:path/2015-03-31/functions/arn:aws:lambda:${REGION}:${ACCOUNT_ID}:function:orchestrator-invoke-api/invocations \
     --region ${REGION} 2>/dev/null || true
 
+# Same Lambda behind /batch: a list of prompts (or a template plus parameters) run concurrently
+BATCH_RESOURCE_ID=$(aws apigateway create-resource \
+    --rest-api-id ${API_ID} \
+    --parent-id ${ROOT_ID} \
+    --path-part batch \
+    --region ${REGION} \
+    --query 'id' --output text 2>/dev/null || \
+    aws apigateway get-resources --rest-api-id ${API_ID} --region ${REGION} --query "items[?path=='/batch'].id" --output text)
+
+aws apigateway put-method \
+    --rest-api-id ${API_ID} \
+    --resource-id ${BATCH_RESOURCE_ID} \
+    --http-method POST \
+    --authorization-type NONE \
+    --region ${REGION} 2>/dev/null || true
+
+aws apigateway put-integration \
+    --rest-api-id ${API_ID} \
+    --resource-id ${BATCH_RESOURCE_ID} \
+    --http-method POST \
+    --type AWS_PROXY \
+    --integration-http-method POST \
+    --uri arn:aws:apigateway:${REGION}:lambda:path/2015-03-31/functions/arn:aws:lambda:${REGION}:${ACCOUNT_ID}:function:orchestrator-invoke-api/invocations \
+    --region ${REGION} 2>/dev/null || true
+
 aws lambda add-permission \
     --function-name orchestrator-invoke-api \
     --statement-id apigateway-invoke \
@@ -82,3 +107,4 @@ aws apigateway create-deployment \
 API_URL="https://${API_ID}.execute-api.${REGION}.amazonaws.com/prod/invoke"
 echo $API_URL > .api_gateway_url
 echo "API Gateway URL: $API_URL"
+echo "Batch URL: https://${API_ID}.execute-api.${REGION}.amazonaws.com/prod/batch"
@@ -1,58 +1,112 @@
 import json
 import boto3
 import os
+import time
+import deadlines
+import tracing
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor, wait
 
-bedrock_agentcore = boto3.client('bedrock-agentcore', region_name='us-east-1')
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '10'))
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '100'))
+# Direct invocations (no API Gateway in front) may use the Lambda's whole timeout, less this margin
+DIRECT_INVOKE_MARGIN_SECONDS = float(os.getenv('DIRECT_INVOKE_MARGIN_SECONDS', '5'))
+
+# No single read may outlast the request budget
+bedrock_agentcore = boto3.client('bedrock-agentcore', region_name='us-east-1',
+                                 config=Config(read_timeout=deadlines.REQUEST_BUDGET_SECONDS, retries={'max_attempts': 1}))
+
+class BadRequest(Exception):
+    """The request body is not a valid invocation"""
 
 def lambda_handler(event, context):
-    try:
-        body = json.loads(event['body'])
-        prompt = body.get('prompt', '')
-        
-        agent_runtime_arn = os.environ['AGENT_ARN']
-        
-        payload = {
-            'prompt': prompt
-        }
-        
-        print(f"Invoking agent: {agent_runtime_arn}")
-        print(f"Payload: {payload}")
-        
+    with tracing.trace("api.invoke") as root, deadlines.scope(request_deadline(event, context)):
+        response = handle(event)
+    # Attach this request's critical path next to the agent's own
+    if response['statusCode'] == 200:
+        body = json.loads(response['body'])
+        body.setdefault('metrics', {})['trace'] = root.summary
+        response['body'] = json.dumps(body)
+    return response
+
+def request_deadline(event, context):
+    """API Gateway cuts requests off at 29s; a direct invocation (e.g. a nightly batch job) can run to the Lambda timeout"""
+    if 'requestContext' not in event and hasattr(context, 'get_remaining_time_in_millis'):
+        return deadlines.new(context.get_remaining_time_in_millis() / 1000 - DIRECT_INVOKE_MARGIN_SECONDS)
+    return deadlines.new()
+
+def respond(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+            'Access-Control-Allow-Methods': 'POST,OPTIONS'
+        },
+        'body': json.dumps(body)
+    }
+
+def invoke(prompt, session_id=None):
+    """One orchestrator call: (response text, metrics)"""
+    agent_runtime_arn = os.environ['AGENT_ARN']
+    
+    payload = {
+        'prompt': prompt
+    }
+    # Agents keep one conversation per session; omit for a stateless call
+    if session_id:
+        payload['session_id'] = session_id
+    # The orchestrator continues this trace, under this request's deadline
+    payload['traceparent'] = tracing.traceparent()
+    payload['deadline'] = deadlines.downstream()
+    
+    print(f"Invoking agent: {agent_runtime_arn}")
+    print(f"Payload: {payload}")
+    
+    with tracing.span("agent_runtime.invoke"):
         response = bedrock_agentcore.invoke_agent_runtime(
             agentRuntimeArn=agent_runtime_arn,
             payload=json.dumps(payload),
             contentType='application/json',
             accept='application/json'
         )
-        
-        print(f"Response keys: {response.keys()}")
-        
-        # Parse SSE streaming response and extract final text
-        result = ''
-        current_text = ''
+    
+    print(f"Response keys: {response.keys()}")
+    
+    # Parse SSE streaming response and extract final text
+    result = ''
+    current_text = ''
+    metrics = {}
+    with tracing.span("agent_runtime.stream"):
         if 'response' in response:
             print("Reading response stream...")
             response_stream = response['response']
             byte_buffer = b''
             line_buffer = ''
-            
+        
             for chunk_bytes in response_stream:
+                if deadlines.expired():
+                    # Out of budget: answer with the text streamed so far
+                    print("Request deadline reached, returning partial response")
+                    metrics['partial'] = True
+                    break
                 if isinstance(chunk_bytes, str):
                     chunk_bytes = chunk_bytes.encode('utf-8')
                 byte_buffer += chunk_bytes
-                
+            
                 # Try to decode buffer
                 try:
                     chunk_str = byte_buffer.decode('utf-8')
                     byte_buffer = b''
                 except UnicodeDecodeError:
                     continue
-                
+            
                 # Add to line buffer and process complete lines
                 line_buffer += chunk_str
                 lines = line_buffer.split('\n')
                 line_buffer = lines[-1]  # Keep incomplete line
-                
+            
                 for line in lines[:-1]:
                     if line.startswith('data: '):
                         try:
@@ -63,25 +117,44 @@ def lambda_handler(event, context):
                                     current_text += delta['text']
                             elif 'event' in data and 'messageStop' in data['event']:
                                 result = current_text
+                            elif 'metrics' in data:
+                                metrics['agent_trace'] = data['metrics'].get('trace')
+                                metrics['prompt_cache'] = data['metrics'].get('prompt_cache')
+                                metrics['model_tier'] = data['metrics'].get('model_tier')
                         except:
                             pass
-        
-        # If no messageStop, use accumulated text
-        if not result:
-            result = current_text
-        
-        print(f"Final result length: {len(result)}")
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-                'Access-Control-Allow-Methods': 'POST,OPTIONS'
-            },
-            'body': json.dumps({'response': result})
-        }
+    
+    # If no messageStop, use accumulated text
+    if not result:
+        result = current_text
+    
+    print(f"Final result length: {len(result)}")
+    
+    return result, metrics
+
+def request_body(event):
+    """The JSON object the request carries"""
+    if event.get('body') is None:
+        raise BadRequest("request body is required")
+    try:
+        body = json.loads(event['body'])
+    except (TypeError, ValueError) as e:
+        raise BadRequest(f"request body is not valid JSON: {e}")
+    if not isinstance(body, dict):
+        raise BadRequest("request body must be a JSON object")
+    return body
+
+def handle(event):
+    try:
+        body = request_body(event)
+        if is_batch(event, body):
+            return respond(200, handle_batch(body))
+        if not isinstance(body.get('prompt', ''), str):
+            raise BadRequest("prompt must be a string")
+        result, metrics = invoke(body.get('prompt', ''), body.get('session_id'))
+        return respond(200, {'response': result, 'metrics': metrics})
+    except BadRequest as e:
+        return respond(400, {'error': str(e)})
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -94,3 +167,97 @@ def lambda_handler(event, context):
             },
             'body': json.dumps({'error': str(e), 'trace': error_trace})
         }
+
+def is_batch(event, body):
+    """POST /batch, or a body carrying prompts / a template instead of one prompt"""
+    return (event.get('path') or '').rstrip('/').endswith('/batch') or 'prompts' in body or 'template' in body
+
+def batch_items(body):
+    """[{'prompt', 'session_id'?, 'params'?}] from a list of prompts or one template with a list of parameters"""
+    if 'template' in body:
+        template, parameters = body['template'], body.get('parameters')
+        if not isinstance(template, str) or not isinstance(parameters, list):
+            raise BadRequest("template must be a string and parameters a list of objects")
+        items = []
+        for params in parameters:
+            if not isinstance(params, dict):
+                raise BadRequest("each parameters entry must be an object")
+            try:
+                items.append({'prompt': template.format(**params), 'params': params})
+            except (KeyError, IndexError, ValueError) as e:
+                raise BadRequest(f"template does not fit parameters {params}: {e!r}")
+    else:
+        prompts = body.get('prompts')
+        if not isinstance(prompts, list):
+            raise BadRequest("prompts must be a list")
+        items = [p if isinstance(p, dict) else {'prompt': p} for p in prompts]
+        if not all(isinstance(item.get('prompt'), str) for item in items):
+            raise BadRequest("each prompt must be a string (or an object with a prompt string)")
+    if not items:
+        raise BadRequest("batch is empty")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise BadRequest(f"batch of {len(items)} exceeds the limit of {BATCH_MAX_ITEMS} items")
+    return items
+
+def handle_batch(body):
+    """Run every item's orchestrator call concurrently (at most max_concurrency at a time); per-item status and timing"""
+    items = batch_items(body)
+    try:
+        concurrency = max(1, min(int(body.get('max_concurrency') or BATCH_MAX_CONCURRENCY), BATCH_MAX_CONCURRENCY))
+    except (TypeError, ValueError):
+        raise BadRequest("max_concurrency must be an integer")
+    started = time.monotonic()
+
+    def run(index, item):
+        queued_ms = (time.monotonic() - started) * 1000
+        entry = {'index': index, 'queued_ms': round(queued_ms, 1)}
+        if 'params' in item:
+            entry['params'] = item['params']
+        # Not started in time: report it rather than start a call that can't finish
+        if deadlines.budget_low():
+            entry.update(status='skipped', error='Request deadline exceeded before the item started', elapsed_ms=0)
+            return entry
+        begin = time.monotonic()
+        try:
+            with tracing.span("batch.item", index=index):
+                result, metrics = invoke(item['prompt'], item.get('session_id'))
+            entry.update(status='partial' if metrics.get('partial') else 'ok', response=result, metrics=metrics)
+        except Exception as e:
+            entry.update(status='error', error=str(e))
+        entry['elapsed_ms'] = round((time.monotonic() - begin) * 1000, 1)
+        print(f"Batch item {index}: {entry['status']} in {entry['elapsed_ms']}ms")
+        return entry
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    futures = [pool.submit(tracing.bind(run), index, item) for index, item in enumerate(items)]
+    # The response must go out before the request deadline: items still queued or running then are reported
+    # as skipped (calls in flight are abandoned, not waited for)
+    left = deadlines.remaining()
+    done, _ = wait(futures, timeout=None if left is None else max(0.0, left))
+    pool.shutdown(wait=False, cancel_futures=True)
+    results = []
+    for index, (item, future) in enumerate(zip(items, futures)):
+        if future in done:
+            results.append(future.result())
+            continue
+        entry = {'index': index, 'status': 'skipped', 'error': 'Request deadline exceeded before the item finished',
+                 'elapsed_ms': 0}
+        if 'params' in item:
+            entry['params'] = item['params']
+        results.append(entry)
+
+    statuses = [r['status'] for r in results]
+    return {
+        'results': results,
+        'metrics': {
+            'items': len(results),
+            'ok': statuses.count('ok'),
+            'partial': statuses.count('partial'),
+            'error': statuses.count('error'),
+            'skipped': statuses.count('skipped'),
+            'max_concurrency': concurrency,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+            # Time the items would have taken one after another
+            'sequential_ms': round(sum(r['elapsed_ms'] for r in results), 1)
+        }
+    }
@@ -0,0 +1,125 @@
+"""Cold-Start Profiler
+Breaks each LOB module's cold start into dependency imports, client construction, module init and first tool call
+
+    python bench/coldstart.py                       # demo data, eager init
+    python bench/coldstart.py --lazy --loans 100000 # LAZY_INIT on a generated 100k-loan dataset
+    python bench/coldstart.py --lazy --prewarm
+
+Every module is profiled in a fresh interpreter, so imports are really cold. Data comes from the
+local S3 stand-in; the client phase times a real boto3 S3 client construction (no network). The
+data store reports how much of init / first call went to S3 fetch, parse and index build (fetch
+and parse are summed across parallel partition fetches).
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import local_gateway
+from microbench import BENCHMARKS, MODULES, dataset
+
+STORE_PHASES = ("client", "fetch", "parse", "index")
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def profile(label, data_root):
+    """Phase timings (ms) for one module; run in a fresh interpreter"""
+    module_dir, filename, data_dir = MODULES[label]
+    phases = {}
+
+    def timed(phase, fn):
+        start = time.perf_counter()
+        result = fn()
+        phases[phase] = _ms(time.perf_counter() - start)
+        return result
+
+    timed("import_boto3", lambda: importlib.import_module("boto3"))
+    if label.endswith("_agent"):
+        timed("import_strands", lambda: importlib.import_module("strands"))
+        timed("import_bedrock_agentcore", lambda: importlib.import_module("bedrock_agentcore.runtime"))
+    import boto3
+    timed("client", lambda: boto3.client("s3", region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1")))
+
+    # Patched for the whole run so lazily built clients also read the local data
+    with mock.patch("boto3.client", return_value=local_gateway.LocalS3(Path(data_root) / data_dir)):
+        module = timed("module_init", lambda: local_gateway.load_module(f"coldstart_{label}", module_dir,
+                                                                         filename, Path(data_root) / data_dir))
+        store = next(v for v in vars(module).values() if type(v).__name__ == "PartitionStore")
+        init = dict(store.timings)
+        function, kwargs = next(iter(BENCHMARKS[label].values()))
+        timed("first_call", lambda: getattr(module, function)(**kwargs))
+        first = {k: v - init.get(k, 0.0) for k, v in store.timings.items()}
+
+    phases["init_store"] = {k: _ms(init[k]) for k in STORE_PHASES if k in init}
+    phases["first_call_store"] = {k: _ms(first[k]) for k in STORE_PHASES if first.get(k)}
+    phases["first_call_function"] = function
+    return phases
+
+
+def run_child(label, data_root, lazy, prewarm):
+    env = dict(os.environ, LAZY_INIT=str(lazy).lower(), PREWARM=str(prewarm).lower())
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", label, "--data-root", str(data_root)],
+        env=env, capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit {out.returncode}"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def print_row(label, p):
+    if "error" in p:
+        print(f"{label:<18} ⚠️  {p['error']}")
+        return
+    imports = sum(v for k, v in p.items() if k.startswith("import_"))
+    store = lambda d: "/".join(f"{d.get(k, 0):.1f}" for k in ("fetch", "parse", "index"))
+    total = imports + p["client"] + p["module_init"] + p["first_call"]
+    print(f"{label:<18} {imports:>9.1f} {p['client']:>8.1f} {p['module_init']:>9.1f} {store(p['init_store']):>17} "
+          f"{p['first_call']:>10.1f} {store(p['first_call_store']):>17} {total:>9.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", choices=list(MODULES), default=list(MODULES))
+    parser.add_argument("--data-root", default=str(local_gateway.ROOT / "data"))
+    parser.add_argument("--loans", type=int, default=None, help="Profile against a generated dataset of N loans")
+    parser.add_argument("--lazy", action="store_true", help="Profile with LAZY_INIT=true")
+    parser.add_argument("--prewarm", action="store_true", help="Profile with PREWARM=true (implies --lazy)")
+    parser.add_argument("--output", default=None, help="Write the breakdown as JSON")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        print(json.dumps(profile(args.child, args.data_root)))
+        return
+
+    data_root = dataset(args.loans) if args.loans else Path(args.data_root)
+    lazy = args.lazy or args.prewarm
+    print(f"Cold start (ms) - data: {data_root}, LAZY_INIT={str(lazy).lower()}, PREWARM={str(args.prewarm).lower()}")
+    print(f"{'module':<18} {'imports':>9} {'client':>8} {'init':>9} {'fetch/parse/idx':>17} "
+          f"{'1st call':>10} {'fetch/parse/idx':>17} {'total':>9}")
+    results = {}
+    for label in args.modules:
+        results[label] = run_child(label, data_root, lazy, args.prewarm)
+        print_row(label, results[label])
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps({"lazy": lazy, "prewarm": args.prewarm,
+                                                 "data_root": str(data_root), "modules": results}, indent=2))
+        print(f"✅ Results: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""End-to-End Latency Benchmark
+Drives the orchestrator's gateway tools against the local gateway stand-in and reports latency percentiles
+
+    python bench/e2e_latency.py --requests 500 --concurrency 32 --latency-ms 40 --jitter-ms 20
+    python bench/e2e_latency.py --data-root data/scale --output bench/results/e2e.json
+    python bench/e2e_latency.py --trace bench/results/traces.jsonl   # then bench/trace_report.py on it
+    python bench/e2e_latency.py --think-ms 500                        # loans -> model think time -> risk models
+
+Path measured per call: orchestrator tool -> aiohttp gateway client -> local gateway (JSON-RPC)
+-> mcp_server_lambda.lambda_handler -> partitioned data store -> compact tool output -> back.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import local_gateway
+
+sys.path.insert(0, str(local_gateway.ROOT / "agents" / "agent-orchestrator"))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import deadlines
+import gateway_client
+import hedging
+import prefetch
+import orchestrator_agent
+import tracing
+
+# (orchestrator tool, arguments) mix cycled through by the workers
+WORKLOAD = [
+    (orchestrator_agent.query_customer_loans, {"industry": "Technology"}),
+    (orchestrator_agent.query_customer_loans, {"bank_name": "JPMorgan", "sort_by": "-loan_amount_millions"}),
+    (orchestrator_agent.query_customer_loans, {"fields": ["customer", "loan_amount_millions"], "limit": 10}),
+    (orchestrator_agent.query_risk_models, {"industry": "Energy"}),
+    (orchestrator_agent.query_risk_models, {"bank_name": "Wells Fargo", "sort_by": "-expected_loss_pct"}),
+]
+
+
+# Loans queries a conversation starts with; the follow-up asks for the risk models of the top industry returned
+CONVERSATION_OPENERS = [
+    {"bank_name": "JPMorgan", "sort_by": "-loan_amount_millions", "limit": 10},
+    {"bank_name": "Bank of America", "limit": 10},
+    {"customer_name": "Inc", "limit": 10},
+]
+
+
+async def conversation(i, think_ms):
+    """One two-step exchange; returns the follow-up call (the part prefetch can hide)"""
+    opener = await orchestrator_agent.query_customer_loans(**CONVERSATION_OPENERS[i % len(CONVERSATION_OPENERS)])
+    industries = prefetch.column_values(json.loads(opener), "industry")
+    await asyncio.sleep(think_ms / 1000)  # The model reading the result and writing its next call
+    tool, arguments = orchestrator_agent.query_risk_models, {"industry": industries[0] if industries else "Energy"}
+    return tool, arguments
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, min(len(sorted_values), round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, elapsed, concurrency):
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None)
+    }
+
+
+async def run_benchmark(gateway, requests, concurrency, warmup=0, budget_ms=None, think_ms=None):
+    """Issue `requests` tool calls from `concurrency` workers; returns the summary dict"""
+    runner, base_url = await local_gateway.start(gateway)
+    orchestrator_agent.CORPORATE_BANKING_GATEWAY = f"{base_url}/corporate-banking/mcp"
+    orchestrator_agent.TREASURY_RISK_GATEWAY = f"{base_url}/treasury-risk/mcp"
+    latencies, errors = [], 0
+    hedges_before = sum(p.hedges for p in hedging._policies.values())
+    try:
+        for i in range(warmup):
+            tool, arguments = WORKLOAD[i % len(WORKLOAD)]
+            await tool(**arguments)
+
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(WORKLOAD[i % len(WORKLOAD)])
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                tool, arguments = queue.get_nowait()
+                if think_ms is not None:
+                    tool, arguments = await conversation(queue.qsize(), think_ms)
+                start = time.perf_counter()
+                deadline = deadlines.new(budget_ms / 1000) if budget_ms else None
+                with tracing.trace("bench.request", tool=tool.tool_name), deadlines.scope(deadline):
+                    result = await tool(**arguments)
+                latencies.append(time.perf_counter() - start)
+                if '"error"' in result:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await gateway_client.close_session()
+        await runner.cleanup()
+    summary = summarize(latencies, errors, elapsed, concurrency)
+    summary["hedges"] = sum(p.hedges for p in hedging._policies.values()) - hedges_before
+    summary["prefetch"] = orchestrator_agent.prefetcher.stats()
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    local_gateway.add_gateway_args(parser)
+    parser.add_argument("--requests", type=int, default=200, help="Measured tool calls")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="Concurrent workers (one run per value)")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured calls before each run")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    parser.add_argument("--think-ms", type=float, default=None,
+                        help="Run two-step conversations and time only the follow-up call")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Per-request deadline (like the backend's)")
+    parser.add_argument("--trace", default=None, help="Export every request's spans (all hops) to this JSONL file")
+    return parser.parse_args(argv)
+
+
+def export_traces(gateway, path):
+    """Send orchestrator and Lambda spans to one file (each loaded Lambda has its own tracing module)"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    exporter = tracing.FileExporter(path)
+    tracing.set_exporter(exporter)
+    for module in gateway.lambdas.values():
+        module.tracing.set_exporter(exporter)
+
+
+def main():
+    args = parse_args()
+    gateway = local_gateway.gateway_from_args(args)
+    if args.trace:
+        export_traces(gateway, args.trace)
+    results = []
+    print(f"{'conc':>5} {'reqs':>6} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hedges':>7}")
+    for concurrency in args.concurrency:
+        r = asyncio.run(run_benchmark(gateway, args.requests, concurrency, args.warmup, args.budget_ms,
+                                       args.think_ms))
+        results.append(r)
+        print(f"{r['concurrency']:>5} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>8} "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['hedges']:>7}")
+        if r["prefetch"]["issued"]:
+            print(f"      prefetch: {r['prefetch']}")
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps({
+            "data_root": args.data_root,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "runs": results
+        }, indent=2))
+        print(f"✅ Results: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
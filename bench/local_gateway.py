@@ -0,0 +1,255 @@
+"""Local AgentCore Gateway Stand-in
+Serves the LOB MCP Lambdas over the gateway's JSON-RPC protocol, offline, with injectable latency and errors
+
+    python bench/local_gateway.py --port 8900 --latency-ms 40 --jitter-ms 20 --error-rate 0.01
+    python bench/local_gateway.py --throttle-rps 100 --throttle-burst 200   # 429 above the gateway's limits
+    python bench/local_gateway.py --slow-rate 0.02 --slow-ms 2000             # cold-start-like outliers
+
+Endpoints (one per LOB gateway):
+    http://127.0.0.1:8900/corporate-banking/mcp
+    http://127.0.0.1:8900/treasury-risk/mcp
+"""
+import argparse
+import asyncio
+import importlib.util
+import io
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Gateway route -> Lambda source dir, gateway target name (tool name prefix), local data dir
+GATEWAYS = {
+    "corporate-banking": {
+        "lambda_dir": ROOT / "agents" / "agent-corporate-banking",
+        "target": "corporate-banking-tools",
+        "data_dir": "corporate_banking"
+    },
+    "treasury-risk": {
+        "lambda_dir": ROOT / "agents" / "agent-treasury-risk",
+        "target": "treasury-risk-tools",
+        "data_dir": "treasury_risk"
+    }
+}
+
+
+def lob_siblings(module_dir):
+    """Flat modules a LOB directory ships (both LOBs, and the orchestrator, have copies with the same names)"""
+    return {path.stem for path in Path(module_dir).glob("*.py")}
+
+
+class LocalBody(io.BytesIO):
+    """StreamingBody stand-in: read(), read(n) and iter_lines()"""
+
+    def iter_lines(self):
+        return iter(self.getvalue().splitlines())
+
+
+class LocalS3:
+    """Read-only S3 client stand-in serving s3://<any bucket>/data/<path> from a local data directory"""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+
+    def get_object(self, Bucket, Key):
+        path = self.data_dir / Key.removeprefix("data/")
+        if not path.is_file():
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": LocalBody(path.read_bytes())}
+
+
+def load_module(name, module_dir, filename, data_dir):
+    """Import a LOB module (Lambda or agent) in isolation, with its S3 client reading data_dir"""
+    siblings = lob_siblings(module_dir)
+    saved = {m: sys.modules.pop(m) for m in siblings if m in sys.modules}
+    sys.path.insert(0, str(module_dir))
+    try:
+        spec = importlib.util.spec_from_file_location(name, Path(module_dir) / filename)
+        module = importlib.util.module_from_spec(spec)
+        local_s3 = LocalS3(data_dir)
+        with mock.patch("boto3.client", return_value=local_s3):
+            spec.loader.exec_module(module)
+        # Lazily loaded stores build their client after the patch is gone; hand them the stand-in directly
+        for value in vars(module).values():
+            if type(value).__name__ in ("PartitionStore", "MarketDataStore") and not hasattr(value._s3, "get_object"):
+                value._s3 = local_s3
+        return module
+    finally:
+        sys.path.remove(str(module_dir))
+        for m in siblings:
+            sys.modules.pop(m, None)
+        sys.modules.update(saved)
+
+
+def load_lambda(name, lambda_dir, data_dir):
+    """Import a LOB's mcp_server_lambda in isolation"""
+    return load_module(f"{name}_lambda", lambda_dir, "mcp_server_lambda.py", data_dir)
+
+
+def lambda_context(tool_name, meta=None):
+    """Context the gateway hands a Lambda target: the tool name (and request metadata) ride in client_context.custom"""
+    custom = {"bedrockAgentCoreToolName": tool_name, **(meta or {})}
+    return SimpleNamespace(client_context=SimpleNamespace(custom=custom), aws_request_id="local")
+
+
+class LocalGateway:
+    """aiohttp app answering tools/list and tools/call for every LOB gateway.
+
+    Args:
+        data_root: Directory holding corporate_banking/ and treasury_risk/ (demo data or scale output)
+        latency_ms / jitter_ms: Added delay per call (uniform jitter on top)
+        error_rate: Fraction of calls answered with error_status instead of a result
+        error_status: HTTP status for injected errors
+        seed: Seed for the jitter/error draws
+        throttle_rps / throttle_burst: Per-route token bucket; calls beyond it get 429 (0 = unlimited)
+        slow_rate / slow_ms: Fraction of calls delayed by an extra slow_ms (cold-start outliers)
+    """
+
+    def __init__(self, data_root=ROOT / "data", latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=500, seed=None,
+                 throttle_rps=0, throttle_burst=0, slow_rate=0.0, slow_ms=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lambdas = {
+            route: load_lambda(route.replace("-", "_"), spec["lambda_dir"], Path(data_root) / spec["data_dir"])
+            for route, spec in GATEWAYS.items()
+        }
+        self.calls = 0
+        self.injected_errors = 0
+        self.throttle_rps = throttle_rps
+        self.throttle_burst = throttle_burst or throttle_rps
+        self.buckets = {route: [float(self.throttle_burst), time.monotonic()] for route in GATEWAYS}
+        self.throttled = 0
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.slow_calls = 0
+
+    def app(self):
+        app = web.Application()
+        for route in GATEWAYS:
+            app.router.add_post(f"/{route}/mcp", self.handle)
+        return app
+
+    def tools(self, route):
+        target, module = GATEWAYS[route]["target"], self.lambdas[route]
+        return [
+            {"name": f"{target}___{name}", "description": spec["description"], "inputSchema": spec["inputSchema"]}
+            for name, spec in module.TOOLS.items()
+        ]
+
+    def admit(self, route):
+        """Take a token from the route's bucket (like the managed gateway's throttle)"""
+        bucket, now = self.buckets[route], time.monotonic()
+        bucket[0] = min(self.throttle_burst, bucket[0] + (now - bucket[1]) * self.throttle_rps)
+        bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    async def handle(self, request):
+        route = request.path.strip("/").split("/")[0]
+        body = await request.json()
+        rpc_id, method, params = body.get("id"), body.get("method"), body.get("params", {})
+        self.calls += 1
+        if self.throttle_rps and not self.admit(route):
+            self.throttled += 1
+            return web.json_response({"message": "Rate exceeded"}, status=429)
+
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if self.slow_rate and self.random.random() < self.slow_rate:
+            self.slow_calls += 1
+            delay += self.slow_ms
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.injected_errors += 1
+            return web.json_response({"message": "Injected gateway error"}, status=self.error_status)
+
+        if method == "tools/list":
+            return web.json_response({"jsonrpc": "2.0", "id": rpc_id, "result": {"tools": self.tools(route)}})
+        if method != "tools/call":
+            return web.json_response({"jsonrpc": "2.0", "id": rpc_id,
+                                      "error": {"code": -32601, "message": f"Method not found: {method}"}})
+
+        target = GATEWAYS[route]["target"]
+        name = params.get("name", "")
+        tool_name = name.split("___", 1)[1] if name.startswith(f"{target}___") else name
+        if tool_name not in self.lambdas[route].TOOLS:
+            return web.json_response({"jsonrpc": "2.0", "id": rpc_id,
+                                      "error": {"code": -32602, "message": f"Unknown tool: {name}"}})
+
+        # Forward the caller's request metadata (MCP _meta: trace context, deadline) to the Lambda
+        meta = dict(params.get("_meta") or {})
+        if "traceparent" not in meta and request.headers.get("traceparent"):
+            meta["traceparent"] = request.headers["traceparent"]
+        # Lambdas are synchronous; run them off the loop like concurrent Lambda invocations
+        result = await asyncio.to_thread(
+            self.lambdas[route].lambda_handler, params.get("arguments", {}), lambda_context(name, meta)
+        )
+        return web.json_response({"jsonrpc": "2.0", "id": rpc_id, "result": {
+            "content": [{"type": "text", "text": json.dumps(result)}],
+            "isError": isinstance(result, dict) and "error" in result
+        }})
+
+
+async def start(gateway, host="127.0.0.1", port=0):
+    """Start the gateway on the running loop; returns (runner, base_url)"""
+    runner = web.AppRunner(gateway.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_gateway_args(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    return parser.parse_args(argv)
+
+
+def add_gateway_args(parser):
+    parser.add_argument("--data-root", default=str(ROOT / "data"),
+                        help="Directory with corporate_banking/ and treasury_risk/ (e.g. data/scale)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Injected delay per call")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform extra delay per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for injected jitter and errors")
+    parser.add_argument("--throttle-rps", type=float, default=0, help="Per-gateway rate limit; excess calls get 429")
+    parser.add_argument("--throttle-burst", type=int, default=0, help="Per-gateway burst (default: throttle rps)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of calls delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=0, help="Extra delay of slow calls (cold-start outliers)")
+
+
+def gateway_from_args(args):
+    return LocalGateway(args.data_root, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.seed,
+                        args.throttle_rps, args.throttle_burst, args.slow_rate, args.slow_ms)
+
+
+def main():
+    args = parse_args()
+    gateway = gateway_from_args(args)
+    for route in GATEWAYS:
+        print(f"✅ http://{args.host}:{args.port}/{route}/mcp ({len(gateway.lambdas[route].TOOLS)} tools)")
+    web.run_app(gateway.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""LOB Microbenchmarks
+Times the LOB query and aggregation hot paths in both agent modules and both Lambda modules at several data scales
+
+    python bench/microbench.py --scales 1000 20000 100000 --save-baseline
+    python bench/microbench.py --scales 1000 20000 100000 --compare        # exit 1 on regression
+
+Each scale is produced once by data/generate_synthetic_data.py (seeded, partitioned) under
+bench/.data/. Per module the import (cold start) time and peak memory are recorded; per benchmark
+the first (cold, partition-fetching) call's time and peak memory and the steady-state median/p95.
+Every cold number comes from its own freshly imported module (after a gc), so it does not depend
+on which benchmarks ran before it.
+
+bench/results/ is not committed: timings only compare on the same machine and interpreter. Save a
+baseline from the base revision, then compare the change against it:
+
+    git stash && python bench/microbench.py --scales 1000 20000 --save-baseline
+    git stash pop && python bench/microbench.py --scales 1000 20000 --compare
+"""
+import argparse
+import gc
+import json
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import local_gateway
+
+ROOT = local_gateway.ROOT
+DATA_CACHE = ROOT / "bench" / ".data"
+BASELINE_PATH = ROOT / "bench" / "results" / "baseline.json"
+SEED = 42
+
+CORPORATE_DIR = ROOT / "agents" / "agent-corporate-banking"
+TREASURY_DIR = ROOT / "agents" / "agent-treasury-risk"
+
+# Module label -> (source dir, file, data subdir)
+MODULES = {
+    "corporate_agent": (CORPORATE_DIR, "corporate_banking_agent.py", "corporate_banking"),
+    "corporate_lambda": (CORPORATE_DIR, "mcp_server_lambda.py", "corporate_banking"),
+    "treasury_agent": (TREASURY_DIR, "treasury_risk_agent.py", "treasury_risk"),
+    "treasury_lambda": (TREASURY_DIR, "mcp_server_lambda.py", "treasury_risk"),
+}
+
+# Benchmark name -> (function name, kwargs), per LOB
+CORPORATE_BENCHMARKS = {
+    "query_customer_loans[industry]": ("query_customer_loans", {"industry": "Technology"}),
+    "query_customer_loans[bank,sorted]": ("query_customer_loans", {"bank_name": "JPMorgan",
+                                                                   "sort_by": "-loan_amount_millions"}),
+    "query_customer_loans[all,projected]": ("query_customer_loans", {"fields": ["customer", "loan_amount_millions"],
+                                                                     "limit": 100}),
+    "get_industry_exposure": ("get_industry_exposure", {"industry": "Technology"}),
+    "get_bank_aggregate_data": ("get_bank_aggregate_data", {"bank_name": "JPMorgan Chase"}),
+}
+TREASURY_BENCHMARKS = {
+    "query_risk_models[industry]": ("query_risk_models", {"industry": "Energy"}),
+    "query_risk_models[bank,sorted]": ("query_risk_models", {"bank_name": "Wells Fargo",
+                                                             "sort_by": "-expected_loss_pct"}),
+    "calculate_expected_loss": ("calculate_expected_loss", {"industry": "Energy", "exposure_millions": 100.0}),
+}
+BENCHMARKS = {
+    "corporate_agent": CORPORATE_BENCHMARKS,
+    "corporate_lambda": CORPORATE_BENCHMARKS,
+    "treasury_agent": TREASURY_BENCHMARKS,
+    "treasury_lambda": TREASURY_BENCHMARKS,
+}
+
+
+def dataset(loans):
+    """Directory with corporate_banking/ and treasury_risk/ for a scale, generated on first use"""
+    root = DATA_CACHE / f"loans-{loans}-seed-{SEED}"
+    if not (root / "corporate_banking" / "manifest.json").exists():
+        subprocess.run(
+            [sys.executable, "data/generate_synthetic_data.py", "--loans", str(loans), "--seed", str(SEED),
+             "--partitioned", "--output-dir", str(root)],
+            cwd=ROOT, check=True, stdout=subprocess.DEVNULL
+        )
+    return root
+
+
+def measure_peak(fn):
+    """(result, seconds, peak MB) of one traced call"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def time_calls(fn, repeat, min_seconds):
+    """Per-call seconds over at least `repeat` calls and `min_seconds` of wall time"""
+    samples = []
+    deadline = time.perf_counter() + min_seconds
+    while len(samples) < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def load(label, data_root):
+    """Freshly imported module: nothing fetched or cached yet"""
+    module_dir, filename, data_dir = MODULES[label]
+    return local_gateway.load_module(f"bench_{label}", module_dir, filename, data_root / data_dir)
+
+
+def time_cold(fn):
+    gc.collect()
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_module(label, data_root, repeat, min_seconds):
+    # Memory is traced and time untraced, each on its own fresh module, so a cold call's peak
+    # includes its partition fetches and index builds whatever ran before it
+    _, _, load_peak = measure_peak(lambda: load(label, data_root))
+    results = {"_load": {"cold_ms": round(time_cold(lambda: load(label, data_root)) * 1000, 3),
+                         "peak_mb": round(load_peak, 2)}}
+    for name, (function, kwargs) in BENCHMARKS[label].items():
+        peak = measure_peak(lambda f=getattr(load(label, data_root), function): f(**kwargs))[2]
+        fn = lambda f=getattr(load(label, data_root), function): f(**kwargs)
+        cold = time_cold(fn)
+        samples = sorted(time_calls(fn, repeat, min_seconds))
+        results[name] = {
+            "cold_ms": round(cold * 1000, 3),
+            "median_ms": round(statistics.median(samples) * 1000, 4),
+            "p95_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 4),
+            "peak_mb": round(peak, 3),
+            "calls": len(samples)
+        }
+    return results
+
+
+def run(scales, modules, repeat, min_seconds):
+    results = {}
+    for loans in scales:
+        data_root = dataset(loans)
+        for label in modules:
+            try:
+                module_results = run_module(label, data_root, repeat, min_seconds)
+            except ImportError as e:
+                print(f"  ⚠️  Skipping {label}: {e}")
+                continue
+            for name, r in module_results.items():
+                key = f"{loans}/{label}/{name}"
+                results[key] = r
+                if name == "_load":
+                    print(f"{key:<62} load {r['cold_ms']:>10.2f} ms {r['peak_mb']:>9.2f} MB")
+                else:
+                    print(f"{key:<62} {r['median_ms']:>10.4f} ms p95 {r['p95_ms']:>9.4f} "
+                          f"cold {r['cold_ms']:>9.2f} ms {r['peak_mb']:>8.3f} MB")
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms, min_delta_mb):
+    """Benchmarks whose median time or peak memory grew by more than threshold (fraction) over baseline.
+
+    Growth below min_delta_ms / min_delta_mb is noise (timer resolution, allocator and tracemalloc
+    bookkeeping) however large it is relative to a tiny baseline. Cold timings are single samples,
+    so they are reported but not gated on.
+    """
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in ("median_ms", "peak_mb"):
+            if metric not in current or metric not in base or not base[metric]:
+                continue
+            delta = current[metric] - base[metric]
+            if delta < (min_delta_ms if metric.endswith("_ms") else min_delta_mb):
+                continue
+            if delta / base[metric] > threshold:
+                regressions.append((key, metric, base[metric], current[metric]))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 20000, 100000], help="Loans per dataset")
+    parser.add_argument("--modules", nargs="+", choices=list(MODULES), default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=50, help="Minimum timed calls per benchmark")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Minimum timing window per benchmark")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline; exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown/growth fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore timing changes smaller than this")
+    parser.add_argument("--min-delta-mb", type=float, default=0.25, help="Ignore memory changes smaller than this")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON path")
+    return parser.parse_args(argv)
+
+
+def write_json(path, payload):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(payload, indent=2, sort_keys=True))
+
+
+def main():
+    args = parse_args()
+    results = run(args.scales, args.modules, args.repeat, args.min_seconds)
+    report = {"python": sys.version.split()[0], "seed": SEED, "results": results}
+    if args.output:
+        write_json(args.output, report)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"✅ Baseline: {args.baseline}")
+    if args.compare:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms, args.min_delta_mb)
+        for key, metric, before, after in regressions:
+            print(f"❌ {key} {metric}: {before} -> {after} (+{(after - before) / before:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
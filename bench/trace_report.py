@@ -0,0 +1,84 @@
+"""Trace Report
+Critical-path breakdown of exported traces (tracing.FileExporter JSONL), joined across processes by trace id
+
+    TRACE_EXPORTER=file TRACE_FILE=/tmp/traces.jsonl ...   # or: bench/e2e_latency.py --trace FILE
+    python bench/trace_report.py /tmp/traces.jsonl
+    python bench/trace_report.py /tmp/traces.jsonl --slowest 5
+
+Per span name: mean and p95 of the time it alone accounts for on each
+request's critical path, and how often it is on the path at all.
+"""
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+
+import local_gateway
+
+sys.path.insert(0, str(local_gateway.ROOT / "agents" / "agent-orchestrator"))
+
+import tracing
+from e2e_latency import percentile
+
+
+def load_traces(path):
+    """trace_id -> span dicts (lines that aren't spans, e.g. other stdout logs, are skipped)"""
+    traces = {}
+    for line in Path(path).read_text().splitlines():
+        try:
+            span = json.loads(line)
+        except ValueError:
+            continue
+        span = span.get("span", span)  # StdoutExporter wraps each span
+        if isinstance(span, dict) and "trace_id" in span:
+            traces.setdefault(span["trace_id"], []).append(span)
+    return traces
+
+
+def report(traces):
+    """Per-span-name critical-path stats over all traces, plus per-trace summaries"""
+    summaries = {trace_id: tracing.summarize(spans) for trace_id, spans in traces.items()}
+    by_name = {}
+    for summary in summaries.values():
+        totals = {}
+        for step in summary["critical_path"]:
+            totals[step["span"]] = totals.get(step["span"], 0.0) + step["ms"]
+        for name, ms in totals.items():
+            by_name.setdefault(name, []).append(ms)
+    stats = {
+        name: {
+            "on_path": len(values),
+            "mean_ms": round(statistics.mean(values), 3),
+            "p95_ms": round(percentile(sorted(values), 95), 3)
+        }
+        for name, values in by_name.items()
+    }
+    return stats, summaries
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace_file", help="JSONL written by tracing.FileExporter (or StdoutExporter logs)")
+    parser.add_argument("--slowest", type=int, default=3, help="Print the critical path of the N slowest traces")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    traces = load_traces(args.trace_file)
+    if not traces:
+        print(f"⚠️  No spans in {args.trace_file}")
+        return
+    stats, summaries = report(traces)
+    print(f"{len(traces)} traces - critical path by span")
+    print(f"{'span':<28} {'on path':>8} {'mean ms':>10} {'p95 ms':>10}")
+    for name, s in sorted(stats.items(), key=lambda item: -item[1]["mean_ms"] * item[1]["on_path"]):
+        print(f"{name:<28} {s['on_path']:>8} {s['mean_ms']:>10.3f} {s['p95_ms']:>10.3f}")
+    for summary in sorted(summaries.values(), key=lambda s: -s["total_ms"])[:args.slowest]:
+        path = " -> ".join(f"{step['span']} {step['ms']:.2f}" for step in summary["critical_path"])
+        print(f"\n{summary['trace_id']} {summary['total_ms']:.2f} ms\n  {path}")
+
+
+if __name__ == "__main__":
+    main()
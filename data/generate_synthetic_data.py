@@ -3,10 +3,16 @@
 Generate hybrid synthetic + real data for multi-account demo
 - Corporate Banking: Real FDIC aggregate + synthetic customer breakdown
 - Treasury & Risk: Real FRED/Treasury data + synthetic risk models
+
+Scale mode (--loans N) streams reproducible load-test volumes to NDJSON:
+  python3 data/generate_synthetic_data.py --seed 7 --banks 50 --customers 200000 --loans 5000000
 """
+import argparse
 import json
 import random
-from datetime import datetime
+import re
+import shutil
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 # Create data directories if they don't exist
@@ -38,6 +44,18 @@ CORPORATE_CUSTOMERS = [
 ]
 
 CREDIT_RATINGS = ["AAA", "AA+", "AA", "AA-", "A+", "A", "A-", "BBB+", "BBB", "BBB-"]
+LOAN_TYPES = ["Term Loan", "Revolving Credit", "Bridge Loan"]
+INDUSTRIES = ["Technology", "Healthcare", "Energy", "Retail", "Financial Services", "Consumer Goods", "Aerospace"]
+COUNTRIES = ["USA", "CHN", "DEU", "VNM", "MEX", "IND"]
+CORPORATE_BANKS = ["JPMorgan Chase", "Bank of America", "Citigroup"]
+MARKET_DATA = {
+    "treasury_10y_yield": 4.25,
+    "treasury_2y_yield": 4.15,
+    "fed_funds_rate": 5.33,
+    "data_source": "FRED API / Treasury.gov (Real)",
+    "note": "Use live APIs in production"
+}
+TREASURY_BANKS = ["Wells Fargo", "U.S. Bancorp", "Charles Schwab"]
 
 def generate_corporate_banking_data():
     """Generate Corporate Banking LOB data with synthetic customer profiles"""
@@ -103,13 +121,7 @@ def generate_treasury_risk_data():
         "description": "Treasury positions and risk models",
         "data_source": "Hybrid: Real FRED/Treasury rates + Synthetic risk models",
         "generated_at": datetime.now().isoformat(),
-        "market_data": {
-            "treasury_10y_yield": 4.25,
-            "treasury_2y_yield": 4.15,
-            "fed_funds_rate": 5.33,
-            "data_source": "FRED API / Treasury.gov (Real)",
-            "note": "Use live APIs in production"
-        },
+        "market_data": dict(MARKET_DATA),
         "banks": []
     }
     
@@ -144,20 +156,595 @@ def generate_treasury_risk_data():
     
     return data
 
+# Synthetic daily history for each numeric MARKET_DATA series, ending at its current value
+MARKET_DATA_DIR = Path("data/treasury_risk/market_data")
+MARKET_DAILY_VOLATILITY = {"treasury_10y_yield": 0.05, "treasury_2y_yield": 0.06}  # Fed Funds moves in 25bp steps
+MARKET_MEAN_REVERSION = 0.003
+
+def business_days_until(end, count):
+    """The `count` weekdays up to and including `end`, oldest first"""
+    days = []
+    day = end
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+def market_step(name, value, anchor):
+    """One business day's move of a market series (mean-reverting toward anchor)"""
+    if name in MARKET_DAILY_VOLATILITY:
+        move = random.gauss(0, MARKET_DAILY_VOLATILITY[name]) + MARKET_MEAN_REVERSION * (anchor - value)
+    else:
+        move = random.choice((-0.25, 0.25)) if random.random() < 0.01 else 0.0
+    return max(0.0, round(value + move, 2))
+
+def generate_market_history(years, end=None):
+    """Columnar daily market data: a random walk per series, walked back from today's values"""
+    days = business_days_until(end or date.today(), years * 261)
+    series = {}
+    for name, current in MARKET_DATA.items():
+        if not isinstance(current, (int, float)):
+            continue
+        values = [current]
+        while len(values) < len(days):
+            values.append(market_step(name, values[-1], current))
+        series[name] = {"dates": [d.isoformat() for d in days], "values": values[::-1]}
+    return {
+        "data_source": f"Synthetic daily history ending at {MARKET_DATA['data_source']} values",
+        "generated_at": datetime.now().isoformat(),
+        "appends": 0,
+        "series": series
+    }
+
+def write_market_history(data):
+    """Write the columnar base and drop append files it supersedes"""
+    shutil.rmtree(MARKET_DATA_DIR / "appends", ignore_errors=True)
+    MARKET_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    path = MARKET_DATA_DIR / "series.json"
+    path.write_text(json.dumps(data, separators=(",", ":")))
+    return path
+
+def append_market_updates(count):
+    """Write the next append file with `count` new business days of every series"""
+    base = json.loads((MARKET_DATA_DIR / "series.json").read_text())
+    latest = {name: (columns["dates"][-1], columns["values"][-1]) for name, columns in base["series"].items()}
+    appends = sorted((MARKET_DATA_DIR / "appends").glob("*.ndjson"))
+    for path in appends:
+        for line in path.read_text().splitlines():
+            observation = json.loads(line)
+            latest[observation["series"]] = (observation["date"], observation["value"])
+    last_day = date.fromisoformat(max(day for day, _ in latest.values()))
+    days = []
+    day = last_day
+    while len(days) < count:
+        day += timedelta(days=1)
+        if day.weekday() < 5:
+            days.append(day)
+    values = {name: value for name, (_, value) in latest.items()}
+    lines = []
+    for day in days:
+        for name in values:
+            values[name] = market_step(name, values[name], MARKET_DATA.get(name, values[name]))
+            lines.append(json.dumps({"series": name, "date": day.isoformat(), "value": values[name]}))
+    path = MARKET_DATA_DIR / "appends" / f"{base.get('appends', 0) + len(appends) + 1:06d}.ndjson"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+def _names(base, count, synthetic):
+    """First `count` names: the real ones, then numbered synthetic ones"""
+    return (base + [synthetic.format(i) for i in range(len(base), count)])[:count]
+
+class NdjsonWriter:
+    """Writes NDJSON lines to one file, or to numbered chunk files of chunk_rows lines each"""
+
+    def __init__(self, path, chunk_rows=None):
+        self.path = Path(path)
+        self.chunk_rows = chunk_rows
+        self.files = []
+        self._file = None
+        self._rows_in_file = 0
+
+    def _next_file(self):
+        if self._file:
+            self._file.close()
+        if self.chunk_rows:
+            path = self.path.with_name(f"{self.path.stem}-{len(self.files):05d}{self.path.suffix}")
+        else:
+            path = self.path
+        self.files.append(path)
+        self._file = open(path, "w")
+        self._rows_in_file = 0
+
+    def write(self, records):
+        for record in records:
+            if self._file is None or (self.chunk_rows and self._rows_in_file >= self.chunk_rows):
+                self._next_file()
+            self._file.write(json.dumps(record))
+            self._file.write("\n")
+            self._rows_in_file += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+# Manifest partition fields -> raw record fields
+PARTITION_SOURCE_FIELDS = {"bank": "bank_name", "industry": "industry"}
+
+class PartitionedWriter:
+    """Appends NDJSON records to partitions/bank=<slug>[/industry=<slug>].ndjson under lob_dir.
+
+    Records are grouped per call, so each partition file is opened once per
+    batch regardless of how many partitions exist.
+    """
+
+    def __init__(self, lob_dir, partition_by):
+        self.lob_dir = Path(lob_dir)
+        self.partition_by = tuple(partition_by)
+        self.partitions = {}  # relative path -> manifest entry
+        shutil.rmtree(self.lob_dir / "partitions", ignore_errors=True)
+
+    def _path(self, record):
+        values = [record[PARTITION_SOURCE_FIELDS[f]] for f in self.partition_by]
+        parts = [f"{f}={_slug(v)}" for f, v in zip(self.partition_by, values)]
+        return "partitions/" + "/".join(parts) + ".ndjson", values
+
+    def write(self, records):
+        grouped = {}
+        for record in records:
+            path, values = self._path(record)
+            if path not in self.partitions:
+                self.partitions[path] = {"path": path, **dict(zip(self.partition_by, values)), "rows": 0}
+            grouped.setdefault(path, []).append(json.dumps(record))
+        for path, lines in grouped.items():
+            target = self.lob_dir / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, "a") as f:
+                f.write("\n".join(lines))
+                f.write("\n")
+            self.partitions[path]["rows"] += len(lines)
+
+    @property
+    def files(self):
+        return [self.lob_dir / path for path in sorted(self.partitions)]
+
+    def close(self):
+        pass
+
+def write_manifest(lob_dir, meta, writer, industries):
+    """manifest.json: LOB metadata, bank metadata and one entry per partition"""
+    manifest = dict(meta)
+    manifest.update({
+        "version": 1,
+        "partition_by": list(writer.partition_by),
+        "industries": sorted(industries),
+        "partitions": list(writer.partitions.values())
+    })
+    path = Path(lob_dir) / "manifest.json"
+    path.write_text(json.dumps(manifest, indent=2))
+    return path
+
+def write_partitioned_snapshot(data, lob_dir, records_key, partition_by):
+    """Split a monolithic snapshot ({"banks": [{..., records_key: [...]}]}) into partitions + manifest"""
+    writer = PartitionedWriter(lob_dir, partition_by)
+    industries = set()
+    for bank in data["banks"]:
+        records = [dict(raw, bank_name=bank["bank_name"]) for raw in bank[records_key]]
+        industries.update(r["industry"] for r in records)
+        writer.write(records)
+    meta = {k: v for k, v in data.items() if k != "banks"}
+    meta["banks"] = [{k: v for k, v in b.items() if k != records_key} for b in data["banks"]]
+    return write_manifest(lob_dir, meta, writer, industries)
+
+def generate_scale_data(args):
+    """Stream seeded, vectorized load-test data; memory stays at one batch plus per-customer attributes"""
+    import numpy as np
+
+    rng = np.random.default_rng(args.seed)
+    out_dir = Path(args.output_dir)
+    corp_dir = out_dir / "corporate_banking"
+    risk_dir = out_dir / "treasury_risk"
+    corp_dir.mkdir(parents=True, exist_ok=True)
+    risk_dir.mkdir(parents=True, exist_ok=True)
+
+    corp_banks = _names(CORPORATE_BANKS, args.banks, "Synthetic Bank {:04d}")
+    risk_banks = _names(TREASURY_BANKS, args.banks, "Synthetic Risk Bank {:04d}")
+    industries = _names(INDUSTRIES, args.industries, "Industry {:03d}")
+    countries = _names(COUNTRIES, args.countries, "C{:03d}")
+    ratings = np.array(CREDIT_RATINGS)
+    loan_types = np.array(LOAN_TYPES)
+
+    # Per-customer attributes are fixed so every loan of a customer agrees on industry/country
+    customer_names = [c["name"] for c in CORPORATE_CUSTOMERS][:args.customers]
+    customer_names += [f"Customer {i:07d} Corp" for i in range(len(customer_names), args.customers)]
+    customer_industry = rng.integers(0, len(industries), args.customers)
+    customer_country = rng.integers(0, len(countries), args.customers)
+
+    exposure = np.zeros(len(corp_banks))
+    loan_counts = np.zeros(len(corp_banks), dtype=np.int64)
+    # Distinct customers per bank needs a banks x customers bitmap; skip it when that gets large
+    track_customers = len(corp_banks) * args.customers <= 50_000_000
+    bank_customers = np.zeros((len(corp_banks), args.customers), dtype=bool) if track_customers else None
+    if args.partitioned:
+        writer = PartitionedWriter(corp_dir, ("bank", "industry"))
+    else:
+        writer = NdjsonWriter(corp_dir / "customer_loans.ndjson", args.chunk_rows)
+    for start in range(0, args.loans, args.batch_size):
+        n = min(args.batch_size, args.loans - start)
+        bank = rng.integers(0, len(corp_banks), n)
+        customer = rng.integers(0, args.customers, n)
+        amount = np.clip(np.round(rng.lognormal(3.8, 0.9, n)), 1, 5000).astype(np.int64)
+        rating = ratings[rng.integers(0, len(ratings), n)]
+        years = rng.integers(1, 31, n)
+        loan_type = loan_types[rng.integers(0, len(loan_types), n)]
+        exposure += np.bincount(bank, weights=amount, minlength=len(corp_banks))
+        loan_counts += np.bincount(bank, minlength=len(corp_banks))
+        if track_customers:
+            bank_customers[bank, customer] = True
+        writer.write(
+            {
+                "loan_id": loan_id,
+                "bank_name": corp_banks[b],
+                "customer_name": customer_names[c],
+                "industry": industries[customer_industry[c]],
+                "country": countries[customer_country[c]],
+                "loan_amount_millions": a,
+                "credit_rating": r,
+                "relationship_years": y,
+                "loan_type": t
+            }
+            for loan_id, (b, c, a, r, y, t) in enumerate(zip(bank.tolist(), customer.tolist(), amount.tolist(),
+                                                             rating.tolist(), years.tolist(), loan_type.tolist()),
+                                                         start)
+        )
+    writer.close()
+
+    corp_meta = {
+        "lob": "Corporate Banking",
+        "account_id": "891377397197",
+        "description": "Customer relationships and loan exposure",
+        "data_source": "Synthetic load-test data",
+        "generated_at": datetime.now().isoformat(),
+        "seed": args.seed,
+        # Sampled loans can repeat a bank/customer/loan type, so deltas match rows on loan_id instead
+        "key_fields": ["loan_id"],
+        "banks": [
+            {
+                "bank_name": name,
+                "total_ci_loans_billions": round(float(exposure[i]) / 1000, 2),
+                "data_source_aggregate": "Synthetic (load test)",
+                "total_loans": int(loan_counts[i]),
+                # Loan count stands in for distinct customers when the bitmap was skipped
+                "total_customers": int(bank_customers[i].sum()) if track_customers else int(loan_counts[i]),
+                "total_exposure_millions": int(exposure[i])
+            }
+            for i, name in enumerate(corp_banks)
+        ]
+    }
+    if args.partitioned:
+        write_manifest(corp_dir, corp_meta, writer, industries)
+    else:
+        corp_meta["loans_files"] = [p.name for p in writer.files]
+        (corp_dir / "banks.json").write_text(json.dumps(corp_meta, indent=2))
+
+    # Treasury & Risk: one model per bank x industry, vectorized over the whole grid
+    n_models = len(risk_banks) * len(industries)
+    pd_pct = np.round(rng.uniform(0.5, 5.0, n_models), 2)
+    lgd_pct = np.round(rng.uniform(30, 60, n_models), 2)
+    el_pct = np.round(pd_pct * lgd_pct / 100, 2)
+    model_ratings = ratings[rng.integers(0, len(ratings), n_models)]
+    if args.partitioned:
+        risk_writer = PartitionedWriter(risk_dir, ("bank",))
+    else:
+        risk_writer = NdjsonWriter(risk_dir / "risk_models.ndjson", args.chunk_rows)
+    risk_writer.write(
+        {
+            "bank_name": risk_banks[i // len(industries)],
+            "industry": industries[i % len(industries)],
+            "probability_of_default_pct": p,
+            "loss_given_default_pct": l,
+            "expected_loss_pct": e,
+            "rating_equivalent": r
+        }
+        for i, (p, l, e, r) in enumerate(zip(pd_pct.tolist(), lgd_pct.tolist(), el_pct.tolist(), model_ratings.tolist()))
+    )
+    risk_writer.close()
+
+    capital = np.round(np.column_stack([
+        rng.uniform(12, 15, len(risk_banks)),
+        rng.uniform(15, 18, len(risk_banks)),
+        rng.uniform(8, 11, len(risk_banks))
+    ]), 2)
+    risk_meta = {
+        "lob": "Treasury & Risk",
+        "account_id": "058264155998",
+        "description": "Treasury positions and risk models",
+        "data_source": "Synthetic load-test data",
+        "generated_at": datetime.now().isoformat(),
+        "seed": args.seed,
+        "market_data": dict(MARKET_DATA),
+        "banks": [
+            {
+                "bank_name": name,
+                "capital_ratios": {
+                    "tier1_capital_ratio": capital[i, 0].item(),
+                    "total_capital_ratio": capital[i, 1].item(),
+                    "leverage_ratio": capital[i, 2].item(),
+                    "data_source": "Synthetic (load test)"
+                }
+            }
+            for i, name in enumerate(risk_banks)
+        ]
+    }
+    if args.partitioned:
+        write_manifest(risk_dir, risk_meta, risk_writer, industries)
+    else:
+        risk_meta["risk_models_files"] = [p.name for p in risk_writer.files]
+        (risk_dir / "banks.json").write_text(json.dumps(risk_meta, indent=2))
+
+    print(f"✅ Generated {args.loans:,} loans across {len(corp_banks)} banks, "
+          f"{args.customers:,} customers, {len(industries)} industries, {len(countries)} countries")
+    print(f"   {corp_dir}: {', '.join(p.relative_to(corp_dir).as_posix() for p in writer.files[:3])}{' ...' if len(writer.files) > 3 else ''}")
+    print(f"✅ Generated {n_models:,} risk models -> {risk_dir}")
+
+# Demo dataset layout per LOB: snapshot file, per-bank record list, raw row key, partition fields
+LOBS = {
+    "corporate_banking": {
+        "snapshot": "customer_loans.json",
+        "records_key": "customer_loans",
+        "key_fields": ("bank_name", "customer_name", "loan_type"),
+        "partition_by": ("bank", "industry")
+    },
+    "treasury_risk": {
+        "snapshot": "risk_models.json",
+        "records_key": "risk_models",
+        "key_fields": ("bank_name", "industry"),
+        "partition_by": ("bank",)
+    }
+}
+
+def _row_key(row, key_fields):
+    return tuple(row[f] for f in key_fields)
+
+def _rows_by_key(rows, key_fields):
+    """Key -> row; refuses snapshots whose rows share a key, which a delta could not tell apart"""
+    keyed = {_row_key(r, key_fields): r for r in rows}
+    if len(keyed) != len(rows):
+        raise ValueError(f"{len(rows) - len(keyed)} rows share a {key_fields} key; deltas need a unique key per row")
+    return keyed
+
+def flat_rows(data, records_key):
+    """Snapshot -> raw rows tagged with bank_name (the partition/delta row format)"""
+    return [dict(raw, bank_name=bank["bank_name"]) for bank in data["banks"] for raw in bank[records_key]]
+
+def read_delta_index(lob_dir, base_version=0):
+    path = Path(lob_dir) / "deltas" / "index.json"
+    if path.exists():
+        return json.loads(path.read_text())
+    return {"base_version": base_version, "deltas": []}
+
+def write_delta_index(lob_dir, index):
+    path = Path(lob_dir) / "deltas" / "index.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(index, indent=2))
+
+def latest_version(index):
+    return max([index["base_version"]] + [d["version"] for d in index["deltas"]])
+
+def apply_delta_to_snapshot(data, lob, delta):
+    """Fold one delta file into a monolithic snapshot (returns a new snapshot)"""
+    records_key, key_fields = LOBS[lob]["records_key"], LOBS[lob]["key_fields"]
+    rows = _rows_by_key(flat_rows(data, records_key), key_fields)
+    for change in delta["changes"]:
+        key = _row_key(change["row"], key_fields)
+        if change["op"] == "delete":
+            rows.pop(key, None)
+        else:
+            rows[key] = change["row"]
+
+    banks = {b["bank_name"]: {k: v for k, v in b.items() if k != records_key} for b in data["banks"]}
+    for bank in delta.get("banks", []):
+        banks[bank["bank_name"]] = bank
+    for bank in banks.values():
+        bank[records_key] = []
+    for row in rows.values():
+        bank = banks.setdefault(row["bank_name"], {"bank_name": row["bank_name"], records_key: []})
+        bank[records_key].append({k: v for k, v in row.items() if k != "bank_name"})
+
+    out = {k: v for k, v in data.items() if k != "banks"}
+    out["banks"] = list(banks.values())
+    out["data_version"] = delta["version"]
+    return out
+
+def current_snapshot(lob):
+    """Base snapshot with every published delta applied"""
+    lob_dir = Path("data") / lob
+    data = json.loads((lob_dir / LOBS[lob]["snapshot"]).read_text())
+    index = read_delta_index(lob_dir, data.get("data_version", 0))
+    if index["base_version"] == data.get("data_version", 0):
+        for entry in index["deltas"]:
+            data = apply_delta_to_snapshot(data, lob, json.loads((lob_dir / entry["path"]).read_text()))
+    return data
+
+def diff_snapshots(old, new, lob):
+    """Inserted, updated and deleted rows (plus changed bank metadata) taking old to new"""
+    records_key, key_fields = LOBS[lob]["records_key"], LOBS[lob]["key_fields"]
+    old_rows = _rows_by_key(flat_rows(old, records_key), key_fields)
+    new_rows = _rows_by_key(flat_rows(new, records_key), key_fields)
+    changes = [{"op": "delete", "row": row} for key, row in old_rows.items() if key not in new_rows]
+    for key, row in new_rows.items():
+        if key not in old_rows:
+            changes.append({"op": "insert", "row": row})
+        elif row != old_rows[key]:
+            changes.append({"op": "update", "row": row})
+
+    def bank_meta(data):
+        return {b["bank_name"]: {k: v for k, v in b.items() if k != records_key} for b in data["banks"]}
+    old_banks = bank_meta(old)
+    banks = [b for name, b in bank_meta(new).items() if old_banks.get(name) != b]
+    return changes, banks
+
+def emit_delta(lob, new_data):
+    """Write the next versioned delta file taking the current state to new_data"""
+    lob_dir = Path("data") / lob
+    base = json.loads((lob_dir / LOBS[lob]["snapshot"]).read_text())
+    changes, banks = diff_snapshots(current_snapshot(lob), new_data, lob)
+    if not changes and not banks:
+        return None
+    index = read_delta_index(lob_dir, base.get("data_version", 0))
+    version = latest_version(index) + 1
+    path = f"deltas/{version:06d}.json"
+    (lob_dir / "deltas").mkdir(exist_ok=True)
+    (lob_dir / path).write_text(json.dumps({
+        "version": version,
+        "base_version": index["base_version"],
+        "generated_at": datetime.now().isoformat(),
+        "changes": changes,
+        "banks": banks
+    }, indent=2))
+    index["deltas"].append({"version": version, "path": path, "changes": len(changes)})
+    write_delta_index(lob_dir, index)
+    return lob_dir / path
+
+def write_base(lob, data):
+    """Write a new base snapshot + partitions and reset the delta index to it"""
+    lob_dir = Path("data") / lob
+    shutil.rmtree(lob_dir / "deltas", ignore_errors=True)
+    write_delta_index(lob_dir, {"base_version": data.get("data_version", 0), "deltas": []})
+    with open(lob_dir / LOBS[lob]["snapshot"], "w") as f:
+        json.dump(data, f, indent=2)
+    return write_partitioned_snapshot(data, lob_dir, LOBS[lob]["records_key"], LOBS[lob]["partition_by"])
+
+def compact_deltas(lob):
+    """Fold published deltas into a new base snapshot"""
+    data = current_snapshot(lob)
+    index = read_delta_index(Path("data") / lob)
+    if not index["deltas"]:
+        print(f"  {lob}: no deltas to compact")
+        return
+    write_base(lob, data)
+    print(f"✅ Compacted {len(index['deltas'])} deltas into data/{lob} base version {data['data_version']}")
+
+def simulate_intraday_updates(data, lob, count):
+    """Copy of a snapshot with `count` random intraday changes (loan updates/inserts/deletes, risk model moves)"""
+    data = json.loads(json.dumps(data))
+    banks = data["banks"]
+    if lob == "treasury_risk":
+        for _ in range(count):
+            model = random.choice(random.choice(banks)["risk_models"])
+            pd = round(min(max(model["probability_of_default_pct"] + random.uniform(-0.25, 0.25), 0.1), 10.0), 2)
+            lgd = round(min(max(model["loss_given_default_pct"] + random.uniform(-2, 2), 10.0), 90.0), 2)
+            model.update({
+                "probability_of_default_pct": pd,
+                "loss_given_default_pct": lgd,
+                "expected_loss_pct": round((pd / 100) * (lgd / 100) * 100, 2)
+            })
+        return data
+
+    for _ in range(count):
+        bank = random.choice(banks)
+        loans = bank["customer_loans"]
+        op = random.choices(["update", "insert", "delete"], weights=[70, 15, 15])[0]
+        if op == "update" and loans:
+            loan = random.choice(loans)
+            loan["loan_amount_millions"] = max(1, loan["loan_amount_millions"] + random.randint(-10, 10))
+            if random.random() < 0.2:
+                loan["credit_rating"] = random.choice(CREDIT_RATINGS)
+        elif op == "delete" and len(loans) > 1:
+            loans.remove(random.choice(loans))
+        else:
+            customer = random.choice(CORPORATE_CUSTOMERS)
+            loan_type = random.choice(LOAN_TYPES)
+            if any(l["customer_name"] == customer["name"] and l["loan_type"] == loan_type for l in loans):
+                continue
+            loans.append({
+                "customer_name": customer["name"],
+                "industry": customer["industry"],
+                "ticker": customer["ticker"],
+                "loan_amount_millions": random.randint(10, 150),
+                "credit_rating": random.choice(CREDIT_RATINGS),
+                "relationship_years": random.randint(3, 25),
+                "loan_type": loan_type
+            })
+    for bank in banks:
+        bank["total_customers"] = len({l["customer_name"] for l in bank["customer_loans"]})
+        bank["total_exposure_millions"] = sum(l["loan_amount_millions"] for l in bank["customer_loans"])
+    return data
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic LOB data")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible output")
+    parser.add_argument("--loans", type=int, default=None, help="Scale mode: number of loans to generate")
+    parser.add_argument("--banks", type=int, default=3, help="Scale mode: banks per LOB")
+    parser.add_argument("--customers", type=int, default=1000, help="Scale mode: distinct customers")
+    parser.add_argument("--industries", type=int, default=len(INDUSTRIES), help="Scale mode: distinct industries")
+    parser.add_argument("--countries", type=int, default=len(COUNTRIES), help="Scale mode: distinct countries")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="Scale mode: rows sampled per vectorized batch")
+    parser.add_argument("--chunk-rows", type=int, default=None, help="Scale mode: split NDJSON output into files of N rows")
+    parser.add_argument("--output-dir", default="data/scale", help="Scale mode: output directory")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="Scale mode: write bank/industry partitions + manifest.json instead of flat NDJSON")
+    parser.add_argument("--partition-existing", action="store_true",
+                        help="Partition the existing demo snapshots without regenerating them")
+    parser.add_argument("--intraday-updates", type=int, default=None,
+                        help="Emit a delta file per LOB with N simulated intraday changes")
+    parser.add_argument("--compact", action="store_true", help="Fold published deltas into a new base snapshot")
+    parser.add_argument("--market-years", type=int, default=10, help="Years of daily market data history to generate")
+    parser.add_argument("--market-history", action="store_true",
+                        help="Regenerate only the market data history (data/treasury_risk/market_data)")
+    parser.add_argument("--market-updates", type=int, default=None,
+                        help="Append N new business days of market data as the next append file")
+    return parser.parse_args(argv)
+
+
 def main():
+    args = parse_args()
+    if args.loans is not None:
+        generate_scale_data(args)
+        return
+    if args.partition_existing:
+        for lob, layout in LOBS.items():
+            data = json.loads((Path("data") / lob / layout["snapshot"]).read_text())
+            manifest = write_partitioned_snapshot(data, Path("data") / lob, layout["records_key"], layout["partition_by"])
+            print(f"✅ Partitioned: {manifest}")
+        return
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.intraday_updates is not None:
+        for lob in LOBS:
+            path = emit_delta(lob, simulate_intraday_updates(current_snapshot(lob), lob, args.intraday_updates))
+            print(f"✅ Delta: {path}" if path else f"  {lob}: no changes")
+        return
+    if args.compact:
+        for lob in LOBS:
+            compact_deltas(lob)
+        return
+    if args.market_history:
+        print(f"✅ Market data history: {write_market_history(generate_market_history(args.market_years))}")
+        return
+    if args.market_updates is not None:
+        print(f"✅ Market data append: {append_market_updates(args.market_updates)}")
+        return
+
     print("Generating hybrid synthetic + real data...")
     
-    # Generate Corporate Banking data
+    # Generate Corporate Banking data (a new base: its version supersedes every published delta)
     corp_data = generate_corporate_banking_data()
-    with open("data/corporate_banking/customer_loans.json", "w") as f:
-        json.dump(corp_data, f, indent=2)
-    print(f"✅ Generated: data/corporate_banking/customer_loans.json")
+    corp_data["data_version"] = latest_version(read_delta_index("data/corporate_banking")) + 1
+    write_base("corporate_banking", corp_data)
+    print(f"✅ Generated: data/corporate_banking/customer_loans.json (+ partitions)")
     
     # Generate Treasury & Risk data
     risk_data = generate_treasury_risk_data()
-    with open("data/treasury_risk/risk_models.json", "w") as f:
-        json.dump(risk_data, f, indent=2)
-    print(f"✅ Generated: data/treasury_risk/risk_models.json")
+    risk_data["data_version"] = latest_version(read_delta_index("data/treasury_risk")) + 1
+    write_base("treasury_risk", risk_data)
+    print(f"✅ Generated: data/treasury_risk/risk_models.json (+ partitions)")
+    write_market_history(generate_market_history(args.market_years))
+    print(f"✅ Generated: data/treasury_risk/market_data/series.json ({args.market_years} years daily)")
     
     print("\n📊 Data Summary:")
     print(f"  Corporate Banking: {len(corp_data['banks'])} banks, {sum(b['total_customers'] for b in corp_data['banks'])} customers")
@@ -4,10 +4,34 @@ Generalized Multi-Account Setup
 Supports any number of child accounts defined in accounts_config.json
 """
 import boto3
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
 import json
+import os
 import sys
+import threading
 from pathlib import Path
 
+SETUP_MAX_WORKERS = int(os.getenv('SETUP_MAX_WORKERS', '8'))
+UPLOAD_MAX_WORKERS = int(os.getenv('UPLOAD_MAX_WORKERS', '16'))
+SYNC_MANIFEST_KEY = "data/_sync_manifest.json"
+# Files that point at other data files; uploaded last so readers never see dangling references
+POINTER_FILES = ("manifest.json", "deltas/index.json")
+# Large snapshots go up as concurrent multipart uploads
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024,
+                                 max_concurrency=10)
+
+_print_lock = threading.Lock()
+
+def account_log(prefix):
+    """print() with every line tagged [prefix], so parallel account setups stay readable"""
+    def log(message=""):
+        text = "\n".join(f"[{prefix}] {line}" for line in str(message).split("\n"))
+        with _print_lock:
+            print(text, flush=True)
+    return log
+
 def load_accounts_config():
     """Load accounts configuration"""
     config_path = Path("infra/accounts_config.json")
@@ -20,11 +44,12 @@ def setup_central_account(config):
     """Setup central account infrastructure"""
     central = config['central']
     children = config['children']
+    log = account_log("central")
     
-    print("=" * 70)
-    print("Central Account Infrastructure Setup")
-    print(f"Account: {central['account_id']} (profile: {central['profile']})")
-    print("=" * 70)
+    log("=" * 70)
+    log("Central Account Infrastructure Setup")
+    log(f"Account: {central['account_id']} (profile: {central['profile']})")
+    log("=" * 70)
     
     session = boto3.Session(profile_name=central['profile'], region_name=central['region'])
     s3_client = session.client('s3')
@@ -34,23 +59,23 @@ def setup_central_account(config):
     # Verify account
     identity = sts_client.get_caller_identity()
     if identity['Account'] != central['account_id']:
-        print(f"❌ Account mismatch: expected {central['account_id']}, got {identity['Account']}")
+        log(f"❌ Account mismatch: expected {central['account_id']}, got {identity['Account']}")
         sys.exit(1)
     
-    print(f"✅ Connected to account: {identity['Account']}")
+    log(f"✅ Connected to account: {identity['Account']}")
     
     # Create S3 bucket
     bucket_name = f"{central['s3_bucket_prefix']}-{central['account_id']}"
-    print(f"\n📦 Creating S3 bucket: {bucket_name}")
+    log(f"\n📦 Creating S3 bucket: {bucket_name}")
     try:
         s3_client.create_bucket(Bucket=bucket_name)
-        print(f"  ✅ Created bucket")
+        log(f"  ✅ Created bucket")
     except s3_client.exceptions.BucketAlreadyOwnedByYou:
-        print(f"  ℹ️  Bucket already exists")
+        log(f"  ℹ️  Bucket already exists")
     
     # Create IAM role with dynamic child account permissions
     role_name = central['agentcore_role_name']
-    print(f"\n🔐 Creating IAM role: {role_name}")
+    log(f"\n🔐 Creating IAM role: {role_name}")
     
     trust_policy = {
         "Version": "2012-10-17",
@@ -105,18 +130,18 @@ def setup_central_account(config):
             MaxSessionDuration=3600
         )
         role_arn = response['Role']['Arn']
-        print(f"  ✅ Created role: {role_arn}")
+        log(f"  ✅ Created role: {role_arn}")
     except iam_client.exceptions.EntityAlreadyExistsException:
         response = iam_client.get_role(RoleName=role_name)
         role_arn = response['Role']['Arn']
-        print(f"  ℹ️  Role already exists: {role_arn}")
+        log(f"  ℹ️  Role already exists: {role_arn}")
     
     iam_client.put_role_policy(
         RoleName=role_name,
         PolicyName=f"{role_name}Policy",
         PolicyDocument=json.dumps(policy_document)
     )
-    print(f"  ✅ Attached inline policy")
+    log(f"  ✅ Attached inline policy")
     
     # Save config
     output_config = {
@@ -138,14 +163,82 @@ def setup_central_account(config):
     
     Path("infra/central_config.json").write_text(json.dumps(output_config, indent=2))
     
-    print("\n" + "=" * 70)
-    print("✅ Central Account Setup Complete!")
-    print("=" * 70)
-    print(f"📦 S3 Bucket: {bucket_name}")
-    print(f"🔐 Role: {role_arn}")
-    print(f"👥 Child Accounts: {len(children)}")
+    log("\n" + "=" * 70)
+    log("✅ Central Account Setup Complete!")
+    log("=" * 70)
+    log(f"📦 S3 Bucket: {bucket_name}")
+    log(f"🔐 Role: {role_arn}")
+    log(f"👥 Child Accounts: {len(children)}")
     for child in children:
-        print(f"   - {child['id']}: {child['name']} ({child['account_id']})")
+        log(f"   - {child['id']}: {child['name']} ({child['account_id']})")
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def remote_sync_state(s3_client, bucket_name):
+    """(sync manifest {relative path: {sha256, etag}}, current ETags {relative path: etag})"""
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=SYNC_MANIFEST_KEY)
+        manifest = json.loads(response['Body'].read())
+    except s3_client.exceptions.NoSuchKey:
+        manifest = {}
+    etags = {}
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix="data/"):
+        for obj in page.get('Contents', []):
+            etags[obj['Key'][len("data/"):]] = obj['ETag']
+    return manifest, etags
+
+def sync_data_dir(s3_client, bucket_name, data_dir, log=print):
+    """Upload only the data files whose content changed since the last sync.
+
+    A file is skipped when its sha256 matches the remote sync manifest and
+    the object's current ETag still matches the ETag recorded at upload
+    time. The ETag check catches objects that were changed or deleted out of
+    band. Changed files are uploaded in parallel. Pointer files
+    (manifest.json, deltas/index.json) are uploaded last.
+    """
+    local = {
+        path.relative_to(data_dir).as_posix(): path
+        for path in sorted(data_dir.rglob("*"))
+        if path.is_file() and path.suffix in (".json", ".ndjson")
+    }
+    if not local:
+        log(f"  ⚠️  No JSON files found in {data_dir}")
+        return
+    manifest, etags = remote_sync_state(s3_client, bucket_name)
+    with ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS) as pool:
+        hashes = dict(zip(local, pool.map(file_sha256, local.values())))
+
+    changed = [
+        rel for rel in local
+        if manifest.get(rel, {}).get("sha256") != hashes[rel] or manifest[rel].get("etag") != etags.get(rel)
+    ]
+    unchanged = len(local) - len(changed)
+
+    def upload(rel):
+        s3_key = f"data/{rel}"
+        s3_client.upload_file(str(local[rel]), bucket_name, s3_key, Config=TRANSFER_CONFIG)
+        etag = s3_client.head_object(Bucket=bucket_name, Key=s3_key)['ETag']
+        log(f"  ✅ Uploaded {rel} to s3://{bucket_name}/{s3_key}")
+        return rel, etag
+
+    uploaded = {}
+    for batch in ([r for r in changed if r not in POINTER_FILES], [r for r in changed if r in POINTER_FILES]):
+        if batch:
+            with ThreadPoolExecutor(max_workers=min(UPLOAD_MAX_WORKERS, len(batch))) as pool:
+                uploaded.update(pool.map(upload, batch))
+
+    if uploaded or set(manifest) - set(local):
+        new_manifest = {
+            rel: {"sha256": hashes[rel], "etag": uploaded.get(rel, etags.get(rel))}
+            for rel in local
+        }
+        s3_client.put_object(Bucket=bucket_name, Key=SYNC_MANIFEST_KEY, Body=json.dumps(new_manifest, indent=2))
+    log(f"  ✅ Uploaded {len(uploaded)} changed files, {unchanged} unchanged")
 
 def setup_child_account(config, child_id):
     """Setup a specific child account"""
@@ -155,11 +248,12 @@ def setup_child_account(config, child_id):
     if not child:
         print(f"❌ Child account '{child_id}' not found in config")
         sys.exit(1)
+    log = account_log(child_id)
     
-    print("=" * 70)
-    print(f"Child Account Setup: {child['name']}")
-    print(f"Account: {child['account_id']} (profile: {child['profile']})")
-    print("=" * 70)
+    log("=" * 70)
+    log(f"Child Account Setup: {child['name']}")
+    log(f"Account: {child['account_id']} (profile: {child['profile']})")
+    log("=" * 70)
     
     session = boto3.Session(profile_name=child['profile'], region_name=central['region'])
     s3_client = session.client('s3')
@@ -169,19 +263,19 @@ def setup_child_account(config, child_id):
     # Verify account
     identity = sts_client.get_caller_identity()
     if identity['Account'] != child['account_id']:
-        print(f"❌ Account mismatch: expected {child['account_id']}, got {identity['Account']}")
+        log(f"❌ Account mismatch: expected {child['account_id']}, got {identity['Account']}")
         sys.exit(1)
     
-    print(f"✅ Connected to account: {identity['Account']}")
+    log(f"✅ Connected to account: {identity['Account']}")
     
     # Create S3 bucket
     bucket_name = f"{child['s3_bucket_prefix']}-{child['account_id']}"
-    print(f"\n📦 Creating S3 bucket: {bucket_name}")
+    log(f"\n📦 Creating S3 bucket: {bucket_name}")
     try:
         s3_client.create_bucket(Bucket=bucket_name)
-        print(f"  ✅ Created bucket")
+        log(f"  ✅ Created bucket")
     except s3_client.exceptions.BucketAlreadyOwnedByYou:
-        print(f"  ℹ️  Bucket already exists")
+        log(f"  ℹ️  Bucket already exists")
     
     # Bucket policy for central account
     bucket_policy = {
@@ -195,30 +289,19 @@ def setup_child_account(config, child_id):
     }
     s3_client.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(bucket_policy))
     
-    # Upload data if exists
+    # Sync data if exists
     data_dir = Path(child['data_directory'])
     if data_dir.exists():
-        print(f"\n📤 Uploading data from {data_dir}")
-        count = 0
-        for file_path in data_dir.glob("*.json"):
-            if file_path.is_file():
-                # Upload to data/ prefix for agent access
-                s3_key = f"data/{file_path.name}"
-                s3_client.upload_file(str(file_path), bucket_name, s3_key)
-                print(f"  ✅ Uploaded {file_path.name} to s3://{bucket_name}/{s3_key}")
-                count += 1
-        if count > 0:
-            print(f"  ✅ Uploaded {count} files")
-        else:
-            print(f"  ⚠️  No JSON files found in {data_dir}")
+        log(f"\n📤 Syncing data from {data_dir}")
+        sync_data_dir(s3_client, bucket_name, data_dir, log)
     else:
-        print(f"  ⚠️  Data directory not found: {data_dir}")
-        print(f"  💡 Run: python3 data/generate_synthetic_data.py")
+        log(f"  ⚠️  Data directory not found: {data_dir}")
+        log(f"  💡 Run: python3 data/generate_synthetic_data.py")
     
     # Create IAM role for cross-account access only
     role_name = child['iam_role_name']
     
-    print(f"\n🔐 Creating IAM role...")
+    log(f"\n🔐 Creating IAM role...")
     
     # Cross-account access role (for orchestrator)
     trust_policy = {
@@ -249,18 +332,18 @@ def setup_child_account(config, child_id):
             MaxSessionDuration=3600
         )
         role_arn = response['Role']['Arn']
-        print(f"  ✅ Created cross-account role: {role_arn}")
+        log(f"  ✅ Created cross-account role: {role_arn}")
     except iam_client.exceptions.EntityAlreadyExistsException:
         response = iam_client.get_role(RoleName=role_name)
         role_arn = response['Role']['Arn']
-        print(f"  ℹ️  Cross-account role already exists: {role_arn}")
+        log(f"  ℹ️  Cross-account role already exists: {role_arn}")
     
     iam_client.put_role_policy(
         RoleName=role_name,
         PolicyName=f"{role_name}Policy",
         PolicyDocument=json.dumps(policy_document)
     )
-    print(f"  ✅ Attached policy")
+    log(f"  ✅ Attached policy")
     
     # Save config
     output_config = {
@@ -276,12 +359,33 @@ def setup_child_account(config, child_id):
     
     Path(f"infra/{child_id}_config.json").write_text(json.dumps(output_config, indent=2))
     
-    print("\n" + "=" * 70)
-    print(f"✅ {child['name']} Setup Complete!")
-    print("=" * 70)
-    print(f"📦 S3 Bucket: {bucket_name}")
-    print(f"🔐 Cross-Account Role: {role_arn}")
-    print(f"💡 AgentCore will auto-create execution role during deployment")
+    log("\n" + "=" * 70)
+    log(f"✅ {child['name']} Setup Complete!")
+    log("=" * 70)
+    log(f"📦 S3 Bucket: {bucket_name}")
+    log(f"🔐 Cross-Account Role: {role_arn}")
+    log(f"💡 AgentCore will auto-create execution role during deployment")
+
+def setup_all_accounts(config):
+    """Central and child accounts in parallel on a bounded pool (they only share static config)"""
+    jobs = [("central", lambda: setup_central_account(config))] + [
+        (child['id'], lambda child_id=child['id']: setup_child_account(config, child_id))
+        for child in config['children']
+    ]
+    failed = []
+    with ThreadPoolExecutor(max_workers=min(SETUP_MAX_WORKERS, len(jobs))) as pool:
+        futures = {pool.submit(job): name for name, job in jobs}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except (Exception, SystemExit) as e:
+                # sys.exit() from an account check only fails that account
+                account_log(futures[future])(f"❌ Setup failed: {e}")
+                failed.append(futures[future])
+    if failed:
+        print(f"❌ Failed accounts: {', '.join(sorted(failed))}")
+        sys.exit(1)
+    print(f"✅ All {len(jobs)} accounts set up")
 
 def main():
     if len(sys.argv) < 2:
@@ -298,10 +402,7 @@ def main():
     if target == "central":
         setup_central_account(config)
     elif target == "all":
-        setup_central_account(config)
-        for child in config['children']:
-            print("\n")
-            setup_child_account(config, child['id'])
+        setup_all_accounts(config)
     else:
         # Try to find matching child account by ID
         setup_child_account(config, target)
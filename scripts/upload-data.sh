@@ -28,6 +28,9 @@ echo "📤 Uploading Treasury & Risk data..."
 aws s3 cp data/treasury_risk/risk_models.json \
   s3://$RISK_BUCKET/data/risk_models.json \
   --profile $RISK_PROFILE
+aws s3 cp data/treasury_risk/market_data \
+  s3://$RISK_BUCKET/data/market_data/ \
+  --recursive --profile $RISK_PROFILE
 
 echo "✅ Treasury & Risk data uploaded to s3://$RISK_BUCKET/data/"
 echo ""
@@ -39,4 +42,5 @@ echo ""
 echo "Buckets:"
 echo "  - s3://$CORP_BUCKET/data/customer_loans.json"
 echo "  - s3://$RISK_BUCKET/data/risk_models.json"
+echo "  - s3://$RISK_BUCKET/data/market_data/"
 echo ""
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Agent directories are deployed standalone, so their modules import each other flat
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'agents', 'agent-orchestrator'))
+# LOB-only modules (record_book, partition_store, market_data, ...); the modules the LOBs share with the
+# orchestrator are byte-identical copies (test_vendored_copies), so lookup order between them doesn't matter
+sys.path.append(os.path.join(ROOT, 'agents', 'agent-corporate-banking'))
+sys.path.append(os.path.join(ROOT, 'agents', 'agent-treasury-risk'))
+sys.path.append(os.path.join(ROOT, 'bench'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
@@ -0,0 +1,96 @@
+"""Request deadlines: scoping, and propagation from the orchestrator through the gateway to the Lambda"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import deadlines
+
+
+def test_scope_only_tightens_and_restores():
+    now = time.time()
+    assert deadlines.current() is None
+    with deadlines.scope(now + 10) as outer:
+        assert outer == deadlines.current() == now + 10
+        with deadlines.scope(now + 20) as inner:  # Looser: the outer deadline stays
+            assert inner == deadlines.current() == now + 10
+        with deadlines.scope(str(now + 5)):  # Payload values may be strings
+            assert deadlines.current() == now + 5
+        with deadlines.scope("not a deadline"):
+            assert deadlines.current() == now + 10
+        assert deadlines.current() == now + 10
+    assert deadlines.current() is None
+
+
+def test_budget_helpers_follow_the_time_left():
+    assert deadlines.timeout(30) == 30 and deadlines.downstream() is None and not deadlines.budget_low()
+    with deadlines.scope(time.time() + 1):
+        assert deadlines.timeout(30) == pytest.approx(1, abs=0.05)
+        assert deadlines.downstream(0.25) == pytest.approx(deadlines.current() - 0.25)
+        assert deadlines.budget_low(2) and not deadlines.expired()
+    with deadlines.scope(time.time() - 1):
+        assert deadlines.expired() and deadlines.timeout(30) == 0.0
+
+
+def test_lambda_deadline_sources_capped_by_the_lambda_timeout():
+    now = time.time()
+    context = SimpleNamespace(client_context=SimpleNamespace(custom={"deadline": str(now + 5)}),
+                              get_remaining_time_in_millis=lambda: 3000)
+    assert deadlines.lambda_deadline({"deadline": now + 2}, context) == now + 2  # _meta first
+    assert deadlines.lambda_deadline(None, context) == pytest.approx(now + 3, abs=0.05)  # Own timeout is sooner
+    context.get_remaining_time_in_millis = lambda: 60000
+    assert deadlines.lambda_deadline(None, context) == now + 5  # Client context when there is no _meta
+    assert deadlines.lambda_deadline(None, None) is None
+
+
+def call_through_gateway(deadline, monkeypatch):
+    """call_tool under `deadline` via the local gateway; returns (result, deadlines the Lambda ran under, calls)"""
+    pytest.importorskip("aiohttp")
+    import gateway_client
+    import local_gateway
+
+    gateway = local_gateway.LocalGateway()
+    corporate = gateway.lambdas["corporate-banking"]
+    seen = []
+    dispatch = corporate.dispatch
+
+    def recording_dispatch(tool_name, arguments):
+        seen.append(corporate.deadlines.current())
+        return dispatch(tool_name, arguments)
+
+    monkeypatch.setattr(corporate, "dispatch", recording_dispatch)
+
+    async def scenario():
+        runner, base_url = await local_gateway.start(gateway)
+        try:
+            with deadlines.scope(deadline):
+                return await gateway_client.call_tool(
+                    f"{base_url}/corporate-banking/mcp", "corporate-banking-tools___get_bank_aggregate_data",
+                    {"bank_name": "JPMorgan Chase"})
+        finally:
+            await gateway_client.close_session()
+            await runner.cleanup()
+
+    return asyncio.run(scenario()), seen, gateway.calls
+
+
+def test_deadline_reaches_the_lambda_minus_the_hop_margin(monkeypatch):
+    deadline = time.time() + 20
+    result, seen, calls = call_through_gateway(deadline, monkeypatch)
+    assert not result["isError"] and calls == 1
+    assert seen == [pytest.approx(deadline - deadlines.HOP_MARGIN_SECONDS)]
+
+
+def test_lambda_refuses_work_whose_deadline_passed_in_flight(monkeypatch):
+    # Still open when sent, but gone once the hop margin is taken off
+    result, seen, calls = call_through_gateway(time.time() + deadlines.HOP_MARGIN_SECONDS / 2, monkeypatch)
+    assert calls == 1 and seen == []
+    assert json.loads(result["content"][0]["text"]) == {"error": "Request deadline exceeded"}
+
+
+def test_expired_call_is_not_sent(monkeypatch):
+    result, seen, calls = call_through_gateway(time.time() - 1, monkeypatch)
+    assert result == {"error": "Request deadline exceeded; call not sent"}
+    assert calls == 0 and seen == []
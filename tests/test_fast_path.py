@@ -0,0 +1,125 @@
+"""Fast-path router: the LOB agents' grammars, entity resolution, number parsing and hit/miss counts"""
+import json
+
+import pytest
+
+pytest.importorskip("strands")
+pytest.importorskip("bedrock_agentcore")
+local_gateway = pytest.importorskip("local_gateway")
+
+from fast_path import FastPathRouter
+
+
+def load_agent(route, filename):
+    gateway = local_gateway.GATEWAYS[route]
+    return local_gateway.load_module(filename.removesuffix(".py"), gateway["lambda_dir"], filename,
+                                     local_gateway.ROOT / "data" / gateway["data_dir"])
+
+
+@pytest.fixture(scope="module")
+def treasury():
+    return load_agent("treasury-risk", "treasury_risk_agent.py").fast_path
+
+
+@pytest.fixture(scope="module")
+def corporate():
+    return load_agent("corporate-banking", "corporate_banking_agent.py").fast_path
+
+
+def matched(router, prompt):
+    found = router.match(prompt)
+    return found and (found[0], found[2])
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("Show me the capital ratios for Wells Fargo?", ("get_bank_capital_ratios", {"bank_name": "Wells Fargo"})),
+    ("schwab's capital ratios", ("get_bank_capital_ratios", {"bank_name": "Charles Schwab"})),
+    ("What are the latest market data", ("get_market_data", {})),
+    ("risk models for the energy sector", ("query_risk_models", {"industry": "Energy"})),
+    ("risk models at u.s. bancorp", ("query_risk_models", {"bank_name": "U.S. Bancorp"})),
+    ("Healthcare risk models", ("query_risk_models", {"industry": "Healthcare"})),
+    ("expected loss on $1,250 million of energy exposure",
+     ("calculate_expected_loss", {"exposure_millions": 1250.0, "industry": "Energy"})),
+    ("expected loss for 2.5m in technology loans",
+     ("calculate_expected_loss", {"exposure_millions": 2.5, "industry": "Technology"})),
+    # Misses fall through to the LLM
+    ("capital ratios for the bank", None),  # Only generic words
+    ("capital ratios for wells fargo and schwab", None),
+    ("risk models for widgets", None),
+    ("market data for last tuesday, please", None),
+    ("expected loss for 1.2.3m of energy", None),
+    ("expected loss for ,m of energy", None),
+    ("expected loss for 1,25m of energy", None),
+    ("expected loss for 100m of energy, and why", None),
+])
+def test_treasury_grammars(treasury, prompt, expected):
+    assert matched(treasury, prompt) == expected
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("Total exposure to the energy industry", ("get_industry_exposure", {"industry": "Energy"})),
+    ("consumer goods loan exposure", ("get_industry_exposure", {"industry": "Consumer Goods"})),
+    ("portfolio summary for citigroup", ("get_bank_aggregate_data", {"bank_name": "Citigroup"})),
+    ("JPMorgan's aggregate data", ("get_bank_aggregate_data", {"bank_name": "JPMorgan Chase"})),
+    ("exposure to widgets", None),
+    ("aggregate data for bank", None),
+    ("which customers have the largest loans", None),
+])
+def test_corporate_grammars(corporate, prompt, expected):
+    assert matched(corporate, prompt) == expected
+
+
+class EchoTool:
+    """Stands in for a strands @tool: a tool_spec plus a call returning JSON"""
+
+    def __init__(self, name, properties, required=()):
+        self.tool_spec = {"name": name, "inputSchema": {"json": {
+            "type": "object", "properties": properties, "required": list(required)}}}
+        self.calls = []
+
+    def __call__(self, **arguments):
+        self.calls.append(arguments)
+        return json.dumps({"error": "boom"} if arguments.get("bank_name") == "Error Bank" else arguments)
+
+
+def router_with(pattern):
+    tool = EchoTool("price", {"bank_name": {"type": "string"}, "amount": {"type": "number"}}, ["amount"])
+    router = FastPathRouter({"bank_name": ["First Bank", "Second Bank", "Error Bank"]})
+    router.register(tool, [pattern], lambda r: f"{r['bank_name']}: {r['amount']}")
+    return router, tool
+
+
+def test_resolution_needs_exactly_one_distinctive_entity():
+    router, _ = router_with(r"price (?P<amount>\d+) at (?P<bank_name>[a-z ]+)")
+    assert router.resolve("bank_name", "first bank") == "First Bank"
+    assert router.resolve("bank_name", "second") == "Second Bank"
+    assert router.resolve("bank_name", "bank") is None  # Generic
+    assert router.resolve("bank_name", "ond bank") is None  # Not a whole word
+    assert router.resolve("amount", " 12 ") == "12"  # No index for the slot: taken as captured
+
+
+def test_unparseable_number_falls_through():
+    router, tool = router_with(r"price (?P<amount>[\d,.]+) at (?P<bank_name>[a-z ]+)")
+    assert matched(router, "price 1,000.5 at first bank") == ("price", {"amount": 1000.5, "bank_name": "First Bank"})
+    assert matched(router, "price 1.2.3 at first bank") is None
+    assert matched(router, "price , at first bank") is None
+    assert router.route("price . at first bank") is None and tool.calls == []
+    assert router.stats() == {"hits": {"price": 0}, "misses": 1, "hit_rate": 0.0}
+
+
+def test_route_counts_hits_and_misses():
+    router, tool = router_with(r"price (?P<amount>\d+) at (?P<bank_name>[a-z ]+)")
+    assert router.route("Price 5 at first bank?") == "First Bank: 5.0"
+    assert router.route("price 5 at error bank") is None  # Tool error: the LLM answers instead
+    assert router.route("what is the price") is None
+    assert tool.calls == [{"amount": 5.0, "bank_name": "First Bank"}, {"amount": 5.0, "bank_name": "Error Bank"}]
+    assert router.stats() == {"hits": {"price": 1}, "misses": 2, "hit_rate": 0.3333}
+
+
+def test_register_checks_slots_against_the_schema():
+    router, _ = router_with(r"price (?P<amount>\d+)")
+    tool = EchoTool("other", {"amount": {"type": "number"}}, ["amount"])
+    with pytest.raises(ValueError, match="not in tool schema"):
+        router.register(tool, [r"(?P<amount>\d+) (?P<bank>\w+)"], str)
+    with pytest.raises(ValueError, match="does not capture required"):
+        router.register(tool, [r"other"], str)
@@ -0,0 +1,53 @@
+"""Concurrent orchestrator sessions must overlap their gateway round-trips"""
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("strands")
+pytest.importorskip("bedrock_agentcore")
+web = pytest.importorskip("aiohttp.web")
+
+import gateway_client
+import orchestrator_agent
+
+SESSIONS = 10
+DELAYS = [0.1 + 0.02 * i for i in range(SESSIONS)]  # slowest gateway call: 0.28s
+
+
+async def slow_gateway(request):
+    body = await request.json()
+    arguments = body["params"]["arguments"]
+    await asyncio.sleep(float(arguments["industry"]))
+    return web.json_response({"jsonrpc": "2.0", "id": body["id"], "result": {"echo": arguments}})
+
+
+async def run_sessions():
+    app = web.Application()
+    app.router.add_post("/mcp", slow_gateway)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    orchestrator_agent.CORPORATE_BANKING_GATEWAY = f"http://127.0.0.1:{port}/mcp"
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            orchestrator_agent.query_customer_loans(industry=str(delay)) for delay in DELAYS
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        await gateway_client.close_session()
+        await runner.cleanup()
+    return results, elapsed
+
+
+def test_concurrent_sessions_take_time_of_slowest_call():
+    results, elapsed = asyncio.run(run_sessions())
+
+    assert [json.loads(r)["echo"]["industry"] for r in results] == [str(d) for d in DELAYS]
+    # Serial execution would take sum(DELAYS) = 1.9s
+    assert elapsed < max(DELAYS) * 2
+    assert elapsed < sum(DELAYS) / 3
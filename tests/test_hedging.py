@@ -0,0 +1,92 @@
+"""Hedged gateway calls: backup timing, first success wins, nothing left running"""
+import asyncio
+
+import pytest
+
+from hedging import HEDGE_MIN_SAMPLES, HedgePolicy, hedged
+
+
+def warmed_policy(latency=0.02, budget=1.0):
+    policy = HedgePolicy(percentile=95, budget=budget, min_delay=0.0)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        policy.record(latency)
+    return policy
+
+
+class Attempts:
+    """attempt(hedge) stand-in: per-attempt delays and results, recording what ran and what was cancelled"""
+
+    def __init__(self, primary, backup=(0.0, "backup")):
+        self.plan = {False: primary, True: backup}
+        self.started, self.cancelled = [], []
+
+    async def __call__(self, hedge):
+        self.started.append(hedge)
+        delay, result = self.plan[hedge]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(hedge)
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def run(policy, attempts):
+    return asyncio.run(hedged(policy, attempts, lambda result: result is not None))
+
+
+def test_no_hedge_until_there_are_enough_samples():
+    attempts = Attempts((0.05, "primary"))
+    assert run(HedgePolicy(min_delay=0.0), attempts) == "primary"
+    assert attempts.started == [False]
+
+
+def test_fast_primary_is_not_hedged():
+    attempts = Attempts((0.0, "primary"))
+    assert run(warmed_policy(latency=0.05), attempts) == "primary"
+    assert attempts.started == [False]
+
+
+def test_slow_primary_loses_to_backup_and_is_cancelled():
+    policy = warmed_policy()
+    attempts = Attempts((1.0, "primary"), (0.0, "backup"))
+    assert run(policy, attempts) == "backup"
+    assert attempts.started == [False, True] and attempts.cancelled == [False]
+    assert policy.hedges == 1 and policy.hedge_wins == 1
+
+
+def test_failed_backup_falls_back_to_primary():
+    policy = warmed_policy()
+    attempts = Attempts((0.1, "primary"), (0.0, RuntimeError("backup failed")))
+    assert run(policy, attempts) == "primary"
+    assert policy.hedge_wins == 0
+
+
+def test_hedges_are_limited_by_the_budget():
+    policy = warmed_policy(budget=0.0)
+    attempts = Attempts((0.1, "primary"))
+    assert run(policy, attempts) == "primary"
+    assert attempts.started == [False] and policy.hedges == 0
+
+
+@pytest.mark.parametrize("cancel_after, started", [
+    (0.005, [False]),           # While waiting out the hedge delay
+    (0.05, [False, True]),      # While both attempts run
+])
+def test_cancelling_the_call_cancels_every_attempt(cancel_after, started):
+    attempts = Attempts((1.0, "primary"), (1.0, "backup"))
+
+    async def scenario():
+        call = asyncio.ensure_future(hedged(warmed_policy(), attempts, lambda result: True))
+        await asyncio.sleep(cancel_after)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+        # Checked before asyncio.run tears the loop down (which would cancel stragglers itself)
+        assert attempts.started == started
+        assert sorted(attempts.cancelled) == sorted(started)
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+"""API Lambda: request validation and batch runs with per-item status under the request deadline"""
+import importlib.util
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("boto3")
+
+import deadlines
+
+ROOT = Path(__file__).resolve().parent.parent
+spec = importlib.util.spec_from_file_location("invoke_agent", ROOT / "backend" / "invoke_agent.py")
+invoke_agent = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(invoke_agent)
+
+
+def post(body, path="/invoke"):
+    event = {"path": path, "requestContext": {}, "body": body if body is None or isinstance(body, str)
+             else json.dumps(body)}
+    response = invoke_agent.lambda_handler(event, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """Fake orchestrator calls: prompts starting with "fail" raise, "slow" ones take their time"""
+    calls = []
+
+    def invoke(prompt, session_id=None):
+        calls.append(prompt)
+        if prompt.startswith("fail"):
+            raise RuntimeError(f"agent error on {prompt}")
+        if prompt.startswith("slow"):
+            time.sleep(float(prompt.split()[1]))
+        return f"answer to {prompt}", {"partial": True} if prompt.startswith("cut") else {}
+
+    monkeypatch.setattr(invoke_agent, "invoke", invoke)
+    return calls
+
+
+@pytest.mark.parametrize("body, message", [
+    (None, "request body is required"),
+    ("{not json", "request body is not valid JSON"),
+    ("[1, 2]", "request body must be a JSON object"),
+    ('"a prompt"', "request body must be a JSON object"),
+    ({"prompt": ["a", "b"]}, "prompt must be a string"),
+    ({"prompts": "a"}, "prompts must be a list"),
+    ({"prompts": ["a", 3]}, "each prompt must be a string"),
+    ({"prompts": []}, "batch is empty"),
+    ({"template": "Risk for {industry}", "parameters": [{"bank": "x"}]}, "template does not fit parameters"),
+    ({"template": "Risk for {industry}", "parameters": ["Energy"]}, "each parameters entry must be an object"),
+    ({"prompts": ["a"], "max_concurrency": "lots"}, "max_concurrency must be an integer"),
+])
+def test_malformed_bodies_are_400(agent, body, message):
+    status, response = post(body)
+    assert status == 400 and response["error"].startswith(message)
+    assert agent == []
+
+
+def test_batch_reports_each_item(agent):
+    status, response = post({"prompts": ["a", "fail b", {"prompt": "cut c", "session_id": "s1"}, "d"],
+                             "max_concurrency": 2}, path="/batch")
+    assert status == 200
+    results = response["results"]
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert [r["status"] for r in results] == ["ok", "error", "partial", "ok"]
+    assert results[0]["response"] == "answer to a" and results[1]["error"] == "agent error on fail b"
+    metrics = response["metrics"]
+    assert (metrics["items"], metrics["ok"], metrics["error"], metrics["partial"], metrics["skipped"]) == (4, 2, 1, 1, 0)
+    assert metrics["max_concurrency"] == 2 and "trace" in metrics
+    assert sorted(agent) == ["a", "cut c", "d", "fail b"]
+
+
+def test_template_batch_carries_params(agent):
+    status, response = post({"template": "Risk for {industry}",
+                             "parameters": [{"industry": "Energy"}, {"industry": "Retail"}]})
+    assert status == 200
+    assert [(r["params"], r["response"]) for r in response["results"]] == [
+        ({"industry": "Energy"}, "answer to Risk for Energy"), ({"industry": "Retail"}, "answer to Risk for Retail")]
+
+
+def test_batch_over_the_item_cap_is_refused(agent, monkeypatch):
+    monkeypatch.setattr(invoke_agent, "BATCH_MAX_ITEMS", 3)
+    status, response = post({"prompts": ["a"] * 4})
+    assert status == 400 and response["error"] == "batch of 4 exceeds the limit of 3 items"
+
+
+def test_batch_answers_by_the_deadline_with_unfinished_items_skipped(agent, monkeypatch):
+    release = threading.Event()
+    invoke = invoke_agent.invoke
+
+    def blocking_invoke(prompt, session_id=None):
+        if prompt == "stuck":
+            release.wait(10)  # A call that would outlast the request
+        return invoke(prompt, session_id)
+
+    monkeypatch.setattr(invoke_agent, "invoke", blocking_invoke)
+    budget = deadlines.LOW_BUDGET_SECONDS + 0.2  # Items may start for the first 0.2s
+    try:
+        with deadlines.scope(time.time() + budget):
+            started = time.monotonic()
+            response = invoke_agent.handle_batch({"prompts": ["a", "stuck", "b", "c"], "max_concurrency": 1})
+            elapsed = time.monotonic() - started
+    finally:
+        release.set()
+    assert budget - 0.1 < elapsed < budget + 0.5
+    assert [r["status"] for r in response["results"]] == ["ok", "skipped", "skipped", "skipped"]
+    assert response["results"][1]["error"] == "Request deadline exceeded before the item finished"
+    assert response["metrics"]["skipped"] == 3
@@ -0,0 +1,131 @@
+"""Market-data time series: append-only storage, range/as-of lookups, resampling and the S3-backed store"""
+import datetime
+import json
+import random
+from collections import defaultdict
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from market_data import FREQUENCIES, MarketDataStore, Series, market_data_result, period_keys, period_label
+
+START = datetime.date(2023, 1, 2)
+
+
+def daily(days, seed=0):
+    """Business-day-ish dates (random gaps of 1-3 days) and random-walk values"""
+    rng = random.Random(seed)
+    dates, values, date, value = [], [], START, 4.0
+    for _ in range(days):
+        dates.append(date.isoformat())
+        values.append(round(value, 4))
+        date += datetime.timedelta(days=rng.choice((1, 1, 1, 3)))
+        value += rng.uniform(-0.05, 0.05)
+    return dates, values
+
+
+def naive_period(date, frequency):
+    day = datetime.date.fromisoformat(date)
+    if frequency == "daily":
+        return date
+    if frequency == "weekly":
+        return (day - datetime.timedelta(days=day.weekday())).isoformat()
+    if frequency == "monthly":
+        return date[:7]
+    if frequency == "quarterly":
+        return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+    return str(day.year)
+
+
+NAIVE = {"last": lambda v: v[-1], "first": lambda v: v[0], "mean": lambda v: sum(v) / len(v),
+         "min": min, "max": max}
+
+
+def test_append_grows_corrects_and_stays_append_only():
+    dates, values = daily(700)
+    series = Series("s", dates[:10], values[:10])
+    for i in range(10, 700, 90):  # Well past the initial capacity, in uneven chunks
+        series.append(dates[i:i + 90], values[i:i + 90])
+    assert len(series) == 700
+    got_dates, got_values = series.range()
+    assert [str(d) for d in got_dates] == dates and got_values.tolist() == values
+
+    assert series.append([dates[-1]], [9.9]) == 0  # Same date as the last observation: a correction
+    assert len(series) == 700 and series.as_of()[1] == 9.9
+    with pytest.raises(ValueError, match="append-only"):
+        series.append([dates[-2]], [1.0])
+    with pytest.raises(ValueError, match="increasing date order"):
+        series.append(["2030-01-02", "2030-01-01"], [1.0, 2.0])
+
+
+def test_range_is_inclusive_and_as_of_takes_the_last_observation_on_or_before():
+    series = Series("s", ["2025-01-02", "2025-01-03", "2025-01-06"], [1.0, 2.0, 3.0])
+    dates, values = series.range(np.datetime64("2025-01-03"), np.datetime64("2025-01-06"))
+    assert values.tolist() == [2.0, 3.0]
+    assert series.range(np.datetime64("2025-01-04"), np.datetime64("2025-01-05"))[1].tolist() == []
+    assert series.as_of(np.datetime64("2025-01-05"))[1] == 2.0  # Weekend: Friday's value
+    assert series.as_of(np.datetime64("2025-01-01")) is None
+
+
+@pytest.mark.parametrize("frequency", FREQUENCIES)
+@pytest.mark.parametrize("aggregate", list(NAIVE))
+def test_resample_matches_a_naive_group_by(frequency, aggregate):
+    dates, values = daily(400, seed=1)
+    start, end = dates[17], dates[350]
+    groups = defaultdict(list)
+    for date, value in zip(dates, values):
+        if start <= date <= end:
+            groups[naive_period(date, frequency)].append(value)
+
+    keys, result = Series("s", dates, values).resample(
+        frequency, aggregate, np.datetime64(start), np.datetime64(end))
+    assert [period_label(k, frequency) for k in keys] == list(groups)
+    assert result.tolist() == pytest.approx([NAIVE[aggregate](v) for v in groups.values()])
+
+
+def test_weekly_periods_start_on_monday():
+    keys = period_keys(np.array(["2025-06-29", "2025-06-30", "2025-07-06", "2025-07-07"], dtype="datetime64[D]"),
+                       "weekly")
+    assert [period_label(k, "weekly") for k in keys] == ["2025-06-23", "2025-06-30", "2025-06-30", "2025-07-07"]
+
+
+def write_store(tmp_path, base, appends=()):
+    root = tmp_path / "market_data"
+    (root / "appends").mkdir(parents=True)
+    (root / "series.json").write_text(json.dumps(base))
+    for i, lines in enumerate(appends, 1):
+        (root / "appends" / f"{i:06d}.ndjson").write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+    local_gateway = pytest.importorskip("local_gateway")
+    return MarketDataStore(local_gateway.LocalS3(tmp_path), "bucket")
+
+
+def test_store_loads_base_then_appends_and_serves_history(tmp_path):
+    dates, values = daily(300, seed=2)
+    base = {"data_source": "test", "series": {"treasury_10y_yield": {"dates": dates[:250], "values": values[:250]},
+                                              "fed_funds_rate": {"dates": dates[:5], "values": [5.33] * 5}}}
+    appends = [[{"series": "treasury_10y_yield", "date": d, "value": v} for d, v in zip(dates[250:], values[250:])],
+               [{"series": "treasury_2y_yield", "date": dates[-1], "value": 4.1}]]
+    store = write_store(tmp_path, base, appends).ensure_loaded()
+    assert store.appends == 2 and len(store.series["treasury_10y_yield"]) == 300
+
+    latest = market_data_result(store, {}, series=["treasury_10y_yield", "fed_funds_rate"])["market_data"]
+    assert latest["as_of"] == dates[-1] and latest["treasury_10y_yield"] == round(values[-1], 4)
+    assert latest["observation_dates"] == {"fed_funds_rate": dates[4]}  # Older than the as-of date
+
+    history = store.history(["treasury_10y_yield", "treasury_2y_yield"], max_points=20)
+    assert history["frequency"] == "monthly" and len(history["results"]) <= 20
+    assert history["results"][-1]["treasury_2y_yield"] == 4.1
+    assert all(row["treasury_2y_yield"] is None for row in history["results"][:-1])  # Outer join on period
+    assert history["summary"]["treasury_10y_yield"]["observations"] == 300
+
+    with pytest.raises(ValueError, match="Unknown market data series"):
+        store.history(["nope"])
+    with pytest.raises(ValueError, match="start_date .* is after end_date"):
+        store.history(None, "2024-01-01", "2023-01-01")
+
+
+def test_missing_base_serves_the_snapshot(tmp_path):
+    local_gateway = pytest.importorskip("local_gateway")
+    store = MarketDataStore(local_gateway.LocalS3(tmp_path), "bucket")
+    assert market_data_result(store, {"treasury_10y_yield": 4.2})["market_data"] == {"treasury_10y_yield": 4.2}
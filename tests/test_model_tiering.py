@@ -0,0 +1,164 @@
+"""Model tiering: per-call tier choice, small-to-large escalation and the guard holding back rejected attempts"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("strands")
+
+from strands.hooks import AfterModelCallEvent, BeforeModelCallEvent
+
+import model_tiering
+
+SMALL, LARGE = "small-model", "large-model"
+TOOL_SPECS = [{"name": "query_risk_models", "inputSchema": {"json": {
+    "type": "object", "properties": {"industry": {"type": "string"}, "limit": {"type": "integer"}},
+    "required": ["industry"]}}}]
+
+
+def fake_agent(prompt):
+    return SimpleNamespace(messages=[{"role": "user", "content": [{"text": prompt}]}], model=None,
+                           tool_registry=SimpleNamespace(get_all_tool_specs=lambda: TOOL_SPECS))
+
+
+def tool_result(text):
+    return {"role": "user", "content": [{"toolResult": {"toolUseId": "1", "content": [{"text": text}]}}]}
+
+
+def after(agent, content, stop_reason="end_turn", exception=None):
+    response = None if exception else AfterModelCallEvent.ModelStopResponse(
+        message={"role": "assistant", "content": content}, stop_reason=stop_reason)
+    return AfterModelCallEvent(agent=agent, stop_response=response, exception=exception)
+
+
+def tool_use(name="query_risk_models", **arguments):
+    return [{"toolUse": {"toolUseId": "1", "name": name, "input": arguments}}]
+
+
+@pytest.mark.parametrize("messages, prose, expected", [
+    ([{"role": "user", "content": [{"text": "Energy risk models"}]}], False, "small"),
+    ([{"role": "user", "content": [{"text": "Compare energy and retail risk"}]}], False, "large"),
+    ([{"role": "user", "content": [{"text": "x" * 400}]}], False, "large"),
+    ([{"role": "user", "content": [{"text": "Energy risk models"}]}, tool_result("PD 1.2%")], False, "small"),
+    ([{"role": "user", "content": [{"text": "Energy risk models"}]}, tool_result("x" * 3000)], False, "large"),
+    ([{"role": "user", "content": [{"text": "Energy risk models"}]}, tool_result("PD 1.2%")], True, "large"),
+])
+def test_choose(messages, prose, expected):
+    assert model_tiering.ModelRouter(SMALL, LARGE, prose=prose).choose(messages)[0] == expected
+
+
+def test_outside_a_turn_or_disabled_uses_the_large_model():
+    agent = fake_agent("Energy risk models")
+    model_tiering.ModelRouter(SMALL, LARGE).before_model_call(BeforeModelCallEvent(agent=agent))
+    assert agent.model == LARGE
+    with model_tiering.turn() as turn:
+        model_tiering.ModelRouter(SMALL, LARGE, enabled=False).before_model_call(BeforeModelCallEvent(agent=agent))
+    assert agent.model == LARGE and turn.calls == [{"tier": "large", "reason": "tiering off"}]
+
+
+@pytest.mark.parametrize("content, stop_reason, exception, problem", [
+    (tool_use(industry="Energy"), "tool_use", None, None),
+    ([{"text": "Energy PD is 1.2%."}], "end_turn", None, None),
+    (tool_use("nope"), "tool_use", None, "unknown tool nope"),
+    (tool_use(), "tool_use", None, "query_risk_models: missing ['industry'], unknown []"),
+    (tool_use(industry="Energy", bank="x"), "tool_use", None, "query_risk_models: missing [], unknown ['bank']"),
+    (tool_use(industry="Energy", limit="5"), "tool_use", None, "query_risk_models: limit should be integer"),
+    ([{"text": "Energy PD is"}], "max_tokens", None, "output truncated"),
+    ([{"text": " "}], "end_turn", None, "empty answer"),
+    (None, None, RuntimeError("throttled"), "error: throttled"),
+])
+def test_validate(content, stop_reason, exception, problem):
+    agent = fake_agent("Energy risk models")
+    assert model_tiering.ModelRouter(SMALL, LARGE).validate(after(agent, content, stop_reason, exception)) == problem
+
+
+def test_prose_router_rejects_list_answers():
+    router = model_tiering.ModelRouter(SMALL, LARGE, prose=True)
+    agent = fake_agent("Energy risk")
+    assert router.validate(after(agent, [{"text": "- PD 1.2%\n- LGD 40%"}])) == "answer not in prose format"
+    assert router.validate(after(agent, [{"text": "Energy is the riskiest book."}])) is None
+
+
+def test_rejected_small_call_is_retried_on_the_large_model():
+    router = model_tiering.ModelRouter(SMALL, LARGE)
+    agent = fake_agent("Energy risk models")
+    with model_tiering.turn() as turn:
+        router.before_model_call(BeforeModelCallEvent(agent=agent))
+        assert agent.model == SMALL and turn.holding
+        rejected = after(agent, tool_use("nope"), "tool_use")
+        router.after_model_call(rejected)
+        assert rejected.retry and turn.escalated and turn.discard and not turn.holding
+
+        router.before_model_call(BeforeModelCallEvent(agent=agent))  # The retry, and the rest of the turn
+        assert agent.model == LARGE and not turn.holding
+        accepted = after(agent, tool_use(industry="Energy"), "tool_use")
+        router.after_model_call(accepted)
+        assert not accepted.retry
+    assert turn.summary() == {"small": 1, "large": 1, "escalations": 1, "calls": [
+        {"tier": "small", "reason": "prompt 18 chars", "rejected": "unknown tool nope"},
+        {"tier": "large", "reason": "escalated"}]}
+
+
+def test_accepted_small_call_is_not_retried():
+    router = model_tiering.ModelRouter(SMALL, LARGE)
+    agent = fake_agent("Energy risk models")
+    with model_tiering.turn() as turn:
+        router.before_model_call(BeforeModelCallEvent(agent=agent))
+        event = after(agent, tool_use(industry="Energy"), "tool_use")
+        router.after_model_call(event)
+    assert not event.retry and not turn.escalated and turn.summary()["small"] == 1
+
+
+def text_event(text):
+    return {"event": {"contentBlockDelta": {"delta": {"text": text}}}}
+
+
+def usage_event(input_tokens, output_tokens, cache_read=0):
+    return {"event": {"metadata": {"usage": {"inputTokens": input_tokens, "outputTokens": output_tokens,
+                                             "cacheReadInputTokens": cache_read}}}}
+
+
+async def model_calls(router, agent, attempts):
+    """Agent.stream_async stand-in: per call, the hooks around its streamed events (as strands orders them)"""
+    for content, stop_reason, events in attempts:
+        before = BeforeModelCallEvent(agent=agent)
+        router.before_model_call(before)
+        for event in events:
+            yield event
+        done = after(agent, content, stop_reason)
+        router.after_model_call(done)
+        if not done.retry:
+            yield {"message": {"role": "assistant", "content": content}}
+
+
+def run_guarded(attempts, prose=False):
+    router = model_tiering.ModelRouter(SMALL, LARGE, prose=prose)
+    agent = fake_agent("Energy risk")
+    dropped = []
+
+    async def consume():
+        seen = []
+        with model_tiering.turn() as turn:
+            async for event in turn.guard(model_calls(router, agent, attempts), on_discard=dropped.append):
+                seen.append(event)
+        return seen, turn
+
+    seen, turn = asyncio.run(consume())
+    return seen, turn, dropped
+
+
+def test_guard_drops_the_rejected_attempt_but_reports_its_events():
+    attempts = [([{"text": "- PD 1.2%"}], "end_turn", [text_event("- PD 1.2%"), usage_event(100, 5, cache_read=50)]),
+                ([{"text": "Energy PD is 1.2%."}], "end_turn", [text_event("Energy PD is 1.2%."), usage_event(120, 9)])]
+    seen, turn, dropped = run_guarded(attempts, prose=True)
+    assert seen == [text_event("Energy PD is 1.2%."), usage_event(120, 9),
+                    {"message": {"role": "assistant", "content": [{"text": "Energy PD is 1.2%."}]}}]
+    assert dropped == [text_event("- PD 1.2%"), usage_event(100, 5, cache_read=50)]
+    assert turn.escalations == 1
+
+
+def test_guard_releases_an_accepted_attempt():
+    attempts = [([{"text": "Energy PD is 1.2%."}], "end_turn", [text_event("Energy PD is 1.2%."), usage_event(80, 7)])]
+    seen, turn, dropped = run_guarded(attempts)
+    assert seen[:2] == [text_event("Energy PD is 1.2%."), usage_event(80, 7)]
+    assert turn.escalations == 0 and dropped == []
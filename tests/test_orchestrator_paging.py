@@ -0,0 +1,67 @@
+"""Paging through the orchestrator's tool path: the Lambda's page is not cut again, so no row is skipped"""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("strands")
+pytest.importorskip("bedrock_agentcore")
+pytest.importorskip("aiohttp")
+
+import gateway_client
+import local_gateway
+import orchestrator_agent
+
+LOANS = 120
+
+
+def big_book(tmp_path):
+    """Data root whose corporate snapshot has one bank with LOANS loans (more than a list cap per page)"""
+    loans = [{"customer_name": f"Customer {i:03d}", "industry": "Technology", "loan_amount_millions": 1000 - i,
+              "credit_rating": "A", "relationship_years": 5, "loan_type": "Term Loan"} for i in range(LOANS)]
+    corporate = tmp_path / "corporate_banking"
+    corporate.mkdir()
+    demo = json.loads((local_gateway.ROOT / "data" / "corporate_banking" / "customer_loans.json").read_text())
+    demo["banks"] = [dict(demo["banks"][0], customer_loans=loans)]
+    (corporate / "customer_loans.json").write_text(json.dumps(demo))
+    (tmp_path / "treasury_risk").symlink_to(local_gateway.ROOT / "data" / "treasury_risk")
+    return tmp_path
+
+
+def test_every_row_is_seen_exactly_once(tmp_path, monkeypatch):
+    gateway = local_gateway.LocalGateway(data_root=big_book(tmp_path))
+    monkeypatch.setattr(orchestrator_agent.prefetcher, "enabled", False)
+
+    async def walk():
+        runner, base_url = await local_gateway.start(gateway)
+        monkeypatch.setattr(orchestrator_agent, "CORPORATE_BANKING_GATEWAY", f"{base_url}/corporate-banking/mcp")
+        customers, cursor, pages = [], None, 0
+        try:
+            while pages <= LOANS:
+                page = json.loads(await orchestrator_agent.query_customer_loans(
+                    sort_by="-loan_amount_millions", limit=50, cursor=cursor))
+                assert "error" not in page, page
+                column = page["columns"].index("customer")
+                customers.extend(row[column] for row in page["rows"])
+                pages += 1
+                cursor = page.get("next_cursor")
+                if cursor is None:
+                    return customers, pages
+        finally:
+            await gateway_client.close_session()
+            await runner.cleanup()
+
+    customers, pages = asyncio.run(walk())
+    assert customers == [f"Customer {i:03d}" for i in range(LOANS)]
+    assert pages >= 3
+
+
+def test_cut_plain_row_list_drops_the_upstream_cursor():
+    from tool_output import compact
+
+    payload = {"results": [{"id": i, "text": "x" * 50} for i in range(200)], "next_cursor": "past-row-200"}
+    out = compact("query_customer_loans", payload, budget=300)
+    assert out["more_rows"] > 0 and "next_cursor" not in out
+    already = {"columns": ["id"], "rows": [[i] for i in range(50)], "next_cursor": "past-row-50", "account_id": "1"}
+    assert compact("query_customer_loans", already) == {"columns": ["id"], "rows": [[i] for i in range(50)],
+                                                         "next_cursor": "past-row-50"}
@@ -0,0 +1,178 @@
+"""Delta application on the partitioned LOB store: patched copies, compaction equivalence, unique keys"""
+import copy
+import json
+import sys
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from local_gateway import ROOT, LocalS3
+from loan_data import SORT_FIELDS, TEXT_FIELDS, loan_record
+from partition_store import PartitionStore, apply_changes
+from record_book import RecordBook
+
+sys.path.append(str(ROOT / "data"))
+import generate_synthetic_data as generator
+
+LOB = "corporate_banking"
+KEY_FIELDS = ("bank", "customer", "loan_type")
+
+
+def demo_snapshot():
+    return json.loads((ROOT / "data" / LOB / "customer_loans.json").read_text())
+
+
+def store_over(tmp_path, snapshot):
+    """Loan store reading a monolithic snapshot (no manifest) from tmp_path"""
+    (tmp_path / "customer_loans.json").write_text(json.dumps(snapshot))
+    return PartitionStore(
+        LocalS3(tmp_path), "bucket", prefix="data/", snapshot_key="data/customer_loans.json",
+        records_key="customer_loans", to_record=loan_record, partition_by=("bank", "industry"),
+        key_fields=KEY_FIELDS, sort_fields=SORT_FIELDS, text_fields=TEXT_FIELDS
+    ).start(lazy=False)
+
+
+def sorted_rows(book, sort_by="-loan_amount_millions"):
+    return list(book.query(limit=500, sort_by=sort_by))
+
+
+def make_delta(base, new, version=1):
+    changes, banks = generator.diff_snapshots(base, new, LOB)
+    return {"version": version, "base_version": 0, "changes": changes, "banks": banks}
+
+
+def test_apply_delta_matches_compacted_snapshot(tmp_path):
+    generator.random.seed(7)
+    base = demo_snapshot()
+    new = generator.simulate_intraday_updates(base, LOB, 40)
+    delta = make_delta(base, new)
+    assert {c["op"] for c in delta["changes"]} >= {"insert", "update", "delete"}
+
+    store = store_over(tmp_path, base)
+    store.book()  # cached book over every partition: patched, not rebuilt
+    store.apply_delta(delta)
+
+    compacted = generator.apply_delta_to_snapshot(base, LOB, delta)
+    (tmp_path / "compacted").mkdir()
+    fresh = store_over(tmp_path / "compacted", compacted)
+    # Same rows, same order on every sort field (rows tied on the field may come in either order)
+    for field in ("loan_amount_millions", "credit_rating", "customer"):
+        assert [r[field] for r in sorted_rows(store.book(), field)] == \
+            [r[field] for r in sorted_rows(fresh.book(), field)]
+    assert sorted(map(json.dumps, store.book().rows)) == sorted(map(json.dumps, fresh.rows()))
+    assert store.version == 1
+
+
+def test_apply_delta_swaps_copies_and_leaves_readers_consistent(tmp_path):
+    base = demo_snapshot()
+    store = store_over(tmp_path, base)
+    book = store.book()
+    before = sorted_rows(book)
+    partitions = dict(store._rows)
+    partitions_before = {path: list(rows) for path, rows in partitions.items()}
+
+    new = copy.deepcopy(base)
+    loan = new["banks"][0]["customer_loans"][0]
+    loan["loan_amount_millions"] = 99999
+    del new["banks"][1]["customer_loans"][0]
+    store.apply_delta(make_delta(base, new))
+
+    # A query still holding the old book (or partition lists) sees the pre-delta state, untouched
+    assert sorted_rows(book) == before
+    assert {path: list(rows) for path, rows in partitions.items()} == partitions_before
+    patched = store.book()
+    assert patched is not book
+    assert sorted_rows(patched)[0]["loan_amount_millions"] == 99999
+    assert len(patched.rows) == len(book.rows) - 1
+
+
+def test_patched_book_equals_rebuilt_book():
+    rows = [{"id": i, "bank": f"B{i % 3}", "amount": (i * 37) % 11} for i in range(30)]
+    book = RecordBook(rows, sort_fields=("amount",), text_fields=("bank",))
+    changes = [("delete", {"id": 4}), ("update", {"id": 7, "bank": "B9", "amount": 100}),
+               ("insert", {"id": 30, "bank": "B1", "amount": 0}), ("delete", {"id": 29})]
+    patched = book.patched(changes, ("id",))
+    expected = RecordBook(apply_changes(rows, changes, ("id",)), sort_fields=("amount",), text_fields=("bank",))
+    assert [r["id"] for r in book.query(limit=500, sort_by="amount")] == \
+        [r["id"] for r in RecordBook(rows, sort_fields=("amount",)).query(limit=500, sort_by="amount")]
+    assert [r["amount"] for r in patched.query(limit=500, sort_by="-amount")] == \
+        [r["amount"] for r in expected.query(limit=500, sort_by="-amount")]
+    assert sorted(r["id"] for r in patched.query({"bank": "b9"}, limit=500)) == [7]
+    assert len(rows) == 30 and len(book.rows) == 30
+
+
+def test_delta_refused_when_keys_are_not_unique(tmp_path):
+    base = demo_snapshot()
+    # Scale data can give one customer two loans of the same type at one bank
+    duplicate = dict(base["banks"][0]["customer_loans"][0], loan_amount_millions=1)
+    base["banks"][0]["customer_loans"].append(duplicate)
+    store = store_over(tmp_path, base)
+    book = store.book()
+    before = sorted_rows(book)
+    delta = {"version": 1, "changes": [{"op": "update", "row": dict(duplicate, bank_name=base["banks"][0]["bank_name"],
+                                                                     loan_amount_millions=5)}]}
+    with pytest.raises(ValueError, match="unique key"):
+        store.apply_delta(delta)
+    assert store.version == 0
+    assert store.book() is book and sorted_rows(book) == before
+    with pytest.raises(ValueError, match="unique key"):
+        generator.diff_snapshots(base, base, LOB)
+
+
+def test_reset_client_rebuilds_from_the_factory(tmp_path):
+    """mcp_http_server workers drop the client they inherit across fork and build their own"""
+    built = []
+    store = PartitionStore(lambda: built.append(LocalS3(tmp_path)) or built[-1], "bucket", prefix="data/",
+                           snapshot_key="data/customer_loans.json", records_key="customer_loans",
+                           to_record=loan_record)
+    first = store.s3
+    store.reset_client()
+    assert store.s3 is not first and len(built) == 2
+
+
+def test_scale_data_keys_loans_by_id_and_takes_deltas(tmp_path):
+    pytest.importorskip("numpy")
+    # 3 banks x 40 customers x 3 loan types: 600 loans must repeat bank/customer/loan type
+    generator.generate_scale_data(generator.parse_args(
+        ["--loans", "600", "--customers", "40", "--seed", "3", "--partitioned", "--output-dir", str(tmp_path)]))
+    from loan_data import create_loan_store
+
+    store = create_loan_store(LocalS3(tmp_path / "corporate_banking"), "bucket")
+    rows = store.rows()
+    assert store.key_fields == ("loan_id",)
+    assert sorted(r["loan_id"] for r in rows) == list(range(600))
+    assert len({tuple(r[f] for f in KEY_FIELDS) for r in rows}) < 600
+
+    book = store.book()
+    first, second = rows[0], rows[1]
+    twin = dict(first, loan_id=600, loan_amount_millions=1)  # Same bank/customer/loan type, new loan
+    delta = {"version": 1, "changes": [
+        {"op": "update", "row": dict(first, bank_name=first["bank"], customer_name=first["customer"],
+                                     loan_amount_millions=99999)},
+        {"op": "insert", "row": dict(twin, bank_name=twin["bank"], customer_name=twin["customer"])},
+        {"op": "delete", "row": dict(second, bank_name=second["bank"], customer_name=second["customer"])},
+    ]}
+    store.apply_delta(delta)
+    assert store.version == 1
+    patched = {r["loan_id"]: r for r in store.book().rows}
+    assert len(patched) == 600 and second["loan_id"] not in patched
+    assert patched[first["loan_id"]]["loan_amount_millions"] == 99999 and patched[600]["loan_amount_millions"] == 1
+    assert len(book.rows) == 600 and first in book.rows  # Readers of the old book are unaffected
+
+
+def test_failed_catch_up_keeps_the_manifest(tmp_path, capsys):
+    generator.write_partitioned_snapshot(demo_snapshot(), tmp_path, "customer_loans", ("bank", "industry"))
+    generator.write_delta_index(tmp_path, {"base_version": 0, "deltas": [{"version": 1, "path": "deltas/000001.json"}]})
+    # The delta file the index points at is missing
+    store = PartitionStore(
+        LocalS3(tmp_path), "bucket", prefix="data/", snapshot_key="data/customer_loans.json",
+        records_key="customer_loans", to_record=loan_record, key_fields=KEY_FIELDS).start(lazy=False)
+    out = capsys.readouterr().out
+    assert "Error applying data deltas" in out and "Error loading manifest" not in out
+    assert store.version == 0 and all(p["path"].startswith("partitions/") for p in store.partitions)
+    assert len(store.rows()) == sum(len(b["customer_loans"]) for b in demo_snapshot()["banks"])
+
+    (tmp_path / "deltas" / "000001.json").write_text(json.dumps({"version": 1, "changes": []}))
+    store.refresh()  # The next poll picks the delta up
+    assert store.version == 1
@@ -0,0 +1,91 @@
+"""Speculative prefetch: hits are served, failed prefetches fall through to the live call"""
+import asyncio
+import gc
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+
+import gateway_client
+import prefetch
+
+URL = "http://gateway.invalid/mcp"
+
+
+def fake_gateway(monkeypatch, prefetched):
+    """gateway_client.call_tool stand-in: the first call answers `prefetched` (raising it if an exception)"""
+    calls = []
+
+    async def call_tool(gateway_url, tool_name, arguments, hedge=False):
+        calls.append(tool_name)
+        if len(calls) == 1:
+            if isinstance(prefetched, Exception):
+                raise prefetched
+            return prefetched
+        return {"live": True}
+
+    monkeypatch.setattr(gateway_client, "call_tool", call_tool)
+    return calls
+
+
+def run(scenario):
+    """Run on a loop that records the exceptions asyncio would log"""
+    logged = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: logged.append(context["message"]))
+        result = await scenario()
+        gc.collect()  # Finalize dropped tasks while the handler is still installed
+        await asyncio.sleep(0)
+        return result
+
+    return asyncio.run(main()), logged
+
+
+def issue(prefetcher):
+    """Start one prefetch of tool "next" directly (as a rule would)"""
+    loop = asyncio.get_running_loop()
+    key = prefetch.cache_key(URL, "next", {})
+    prefetcher._entries[key] = (loop.create_task(gateway_client.call_tool(URL, "next", {})), loop, 1e12)
+    prefetcher.issued += 1
+
+
+@pytest.mark.parametrize("prefetched", [aiohttp.ClientError("connection reset"), {"error": "Gateway returned 500"}])
+def test_failed_prefetch_falls_through_to_live_call(monkeypatch, prefetched):
+    calls = fake_gateway(monkeypatch, prefetched)
+    prefetcher = prefetch.Prefetcher(ttl=30, enabled=True)
+
+    async def scenario():
+        issue(prefetcher)
+        await asyncio.sleep(0)
+        return await prefetcher.call_tool(URL, "next", {})
+
+    result, logged = run(scenario)
+    assert result == {"live": True} and calls == ["next", "next"]
+    assert prefetcher.hits == 0 and prefetcher.wasted == 1
+    assert logged == []
+
+
+def test_matching_prefetch_is_served(monkeypatch):
+    calls = fake_gateway(monkeypatch, {"prefetched": True})
+    prefetcher = prefetch.Prefetcher(ttl=30, enabled=True)
+
+    async def scenario():
+        issue(prefetcher)
+        return await prefetcher.call_tool(URL, "next", {})  # Still in flight: awaited, not re-sent
+
+    result, _ = run(scenario)
+    assert result == {"prefetched": True} and calls == ["next"] and prefetcher.hits == 1
+
+
+def test_dropped_failed_prefetch_is_not_logged(monkeypatch):
+    fake_gateway(monkeypatch, aiohttp.ClientError("connection reset"))
+    prefetcher = prefetch.Prefetcher(ttl=30, enabled=True)
+
+    async def scenario():
+        issue(prefetcher)
+        await asyncio.sleep(0)
+        prefetcher._drop(next(iter(prefetcher._entries)))
+
+    _, logged = run(scenario)
+    assert prefetcher.wasted == 1 and logged == []
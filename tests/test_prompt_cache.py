@@ -0,0 +1,46 @@
+"""Prompt caching: stable prefix before the cache checkpoint, and token usage summed per request"""
+import pytest
+
+pytest.importorskip("strands")
+
+import prompt_cache
+
+
+def test_system_prompt_puts_volatile_text_after_the_checkpoint(monkeypatch):
+    monkeypatch.setattr(prompt_cache, "PROMPT_CACHE_ENABLED", True)
+    monkeypatch.setattr(prompt_cache, "PROMPT_CACHE_TTL", None)
+    assert prompt_cache.system_prompt("Instructions", "", "Example", volatile="Today is Monday") == [
+        {"text": "Instructions"}, {"text": "Example"}, {"cachePoint": {"type": "default"}}, {"text": "Today is Monday"}]
+    assert prompt_cache.system_prompt(volatile="Today") == [{"text": "Today"}]  # Nothing stable to cache
+
+    monkeypatch.setattr(prompt_cache, "PROMPT_CACHE_TTL", "1h")
+    assert prompt_cache.system_prompt("Instructions")[-1] == {"cachePoint": {"type": "default", "ttl": "1h"}}
+
+    monkeypatch.setattr(prompt_cache, "PROMPT_CACHE_ENABLED", False)
+    assert prompt_cache.system_prompt("Instructions", volatile="Today") == [{"text": "Instructions"}, {"text": "Today"}]
+
+
+def test_model_checkpoints_tools_and_messages_only_when_enabled(monkeypatch):
+    built = []
+    monkeypatch.setattr(prompt_cache, "BedrockModel", lambda **config: built.append(config) or config)
+    monkeypatch.setattr(prompt_cache, "PROMPT_CACHE_ENABLED", True)
+    config = prompt_cache.model(model_id="m")["cache_config"]
+    assert config.strategy == "auto"
+    monkeypatch.setattr(prompt_cache, "PROMPT_CACHE_ENABLED", False)
+    assert prompt_cache.model(model_id="m") == {"model_id": "m"}
+
+
+def test_usage_sums_metadata_events_only():
+    usage = prompt_cache.CacheUsage()
+    assert usage.stats()["cache_hit_rate"] is None
+    usage.observe({"event": {"contentBlockDelta": {"delta": {"text": "x"}}}})
+    usage.observe("not an event")
+    usage.observe({"event": {"metadata": {"usage": {"inputTokens": 100, "outputTokens": 20,
+                                                    "cacheWriteInputTokens": 900}}}})
+    usage.observe({"event": {"metadata": {"usage": {"inputTokens": 50, "outputTokens": 10,
+                                                    "cacheReadInputTokens": 900}}}})
+    usage.observe_rejected({"event": {"metadata": {"usage": {"inputTokens": 50, "outputTokens": 5}}}})
+    usage.observe_rejected({"event": {"contentBlockDelta": {"delta": {"text": "dropped"}}}})
+    assert usage.stats() == {"model_calls": 3, "rejected_model_calls": 1, "input_tokens": 200, "output_tokens": 35,
+                             "cache_read_tokens": 900, "cache_write_tokens": 900,
+                             "cache_hit_rate": round(900 / 2000, 3)}
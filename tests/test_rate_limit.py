@@ -0,0 +1,106 @@
+"""Gateway token bucket and AIMD concurrency limit"""
+import asyncio
+import time
+
+import pytest
+
+from rate_limit import AdaptiveConcurrency, GatewayLimiter, RateLimitTimeout, TokenBucket
+
+
+def test_bucket_spends_burst_then_paces_at_rate():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    waits = [bucket.reserve() for _ in range(3)]
+    # Reservations queue up behind each other, one token interval apart
+    assert waits == pytest.approx([0.1, 0.2, 0.3], abs=0.01)
+
+
+def test_bucket_reserves_nothing_past_the_deadline():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.reserve()
+    assert bucket.reserve(deadline=time.monotonic() + 0.5) is None
+    assert bucket.tokens == pytest.approx(0.0, abs=0.01)
+    with pytest.raises(RateLimitTimeout):
+        asyncio.run(bucket.acquire(deadline=time.monotonic() + 0.5))
+
+
+def test_cancelled_acquire_refunds_its_token():
+    async def scenario():
+        bucket = TokenBucket(rate=2, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.05)
+        assert bucket.tokens < 0  # Reserved while sleeping
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return bucket
+
+    bucket = asyncio.run(scenario())
+    assert bucket.tokens == pytest.approx(0.1, abs=0.05)  # Refilled for ~0.05s, the reservation returned
+    assert bucket.reserve() == pytest.approx(0.45, abs=0.05)
+
+
+def test_aimd_grows_additively_and_halves_on_congestion():
+    limit = AdaptiveConcurrency(initial=4, minimum=2, maximum=8)
+    for _ in range(4):
+        limit.observe(200, 0.01)
+    assert limit.limit == pytest.approx(5.0, abs=0.1)  # About +1 per round of `limit` successes
+    limit.observe(429, 0.01)
+    assert limit.limit == pytest.approx(2.5, abs=0.05)
+    limit.observe(503, 0.01)  # Same burst of failures (within one latency): not counted again
+    assert limit.limit == pytest.approx(2.5, abs=0.05)
+    limit._last_decrease -= 1
+    limit.observe(None, 0.01)
+    assert limit.limit == 2  # Never below the minimum
+    limit._last_decrease -= 1
+    limit.observe(200, 0.5)  # 50x the best latency: congestion even though it succeeded
+    assert limit.limit == 2
+    for _ in range(500):
+        limit.observe(200, 0.01)
+    assert limit.limit == 8
+
+
+def test_concurrency_queues_in_order_and_times_out():
+    async def scenario():
+        limit = AdaptiveConcurrency(initial=1, minimum=1, maximum=1)
+        await limit.acquire()
+        order = []
+
+        async def call(name):
+            await limit.acquire()
+            order.append(name)
+
+        waiters = [asyncio.ensure_future(call(n)) for n in "ab"]
+        await asyncio.sleep(0)
+        assert limit.queued == 2
+        with pytest.raises(RateLimitTimeout):
+            await limit.acquire(deadline=time.monotonic() + 0.01)
+        limit.release()
+        await asyncio.sleep(0)
+        limit.release()
+        await asyncio.gather(*waiters)
+        return limit, order
+
+    limit, order = asyncio.run(scenario())
+    assert order == ["a", "b"] and limit.in_flight == 1 and limit.queued == 0
+
+
+def test_cancelled_slot_releases_without_backing_off():
+    async def scenario():
+        limiter = GatewayLimiter(rate=100, burst=100, initial=4, maximum=4)
+
+        async def abandoned():
+            async with limiter.slot():
+                await asyncio.sleep(1)
+
+        task = asyncio.ensure_future(abandoned())
+        await asyncio.sleep(0.01)
+        assert limiter.concurrency.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.concurrency.in_flight == 0 and limiter.concurrency.limit == 4
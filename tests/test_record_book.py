@@ -0,0 +1,74 @@
+"""Cursor pagination over a RecordBook, alone and through tool_output.compact's row budget"""
+import pytest
+
+from record_book import RecordBook
+from tool_output import compact
+
+ROWS = [{"id": i, "bank": f"Bank {i % 4}", "amount": (i * 53) % 17, "note": "x" * (i % 5)} for i in range(120)]
+
+
+def book():
+    return RecordBook(list(ROWS), sort_fields=("amount", "id"), text_fields=("bank",))
+
+
+def walk(book, **query):
+    """Every row of a query, page by page through next_cursor"""
+    seen, cursor = [], None
+    while True:
+        page = book.query(cursor=cursor, **query)
+        seen.extend(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("query", [
+    {"limit": 7},
+    {"limit": 10, "sort_by": "amount"},
+    {"limit": 9, "sort_by": "-amount"},
+    {"limit": 4, "filters": {"bank": "bank 3"}, "sort_by": "-id"},
+])
+def test_cursor_round_trip_visits_every_row_once(query):
+    b = book()
+    single = b.query(limit=500, filters=query.get("filters"), sort_by=query.get("sort_by"))
+    assert walk(b, **query) == list(single)
+
+
+def test_cursor_after_resumes_mid_page():
+    b = book()
+    page = b.query(limit=10, sort_by="amount")
+    resumed = b.query(limit=10, sort_by="amount", cursor=page.cursor_after(3))
+    assert list(resumed)[:7] == list(page)[3:]
+    assert page.cursor_after(len(page)) == page.next_cursor
+
+
+def test_cursor_rejected_for_another_query():
+    b = book()
+    cursor = b.query(limit=5, sort_by="amount").next_cursor
+    with pytest.raises(ValueError, match="does not match"):
+        b.query(limit=5, sort_by="-amount", cursor=cursor)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        b.query(limit=5, cursor="not-a-cursor")
+
+
+def test_no_matching_rows_gives_no_cursor():
+    page = book().query(filters={"bank": "nobody"})
+    assert list(page) == [] and page.next_cursor is None
+    assert compact("query_customer_loans", {"results": page}) == {"columns": [], "rows": []}
+
+
+def test_compact_pages_through_budget_without_stalling():
+    """Every row comes back exactly once however tight the budget, even when one row alone is over it"""
+    rows = [dict(r, note="y" * 2000) if r["id"] == 5 else r for r in ROWS]
+    b = RecordBook(rows, sort_fields=("id",))
+    for budget in (40, 120, 400):
+        ids, cursor = [], None
+        for _ in range(len(rows) + 1):
+            out = compact("query_customer_loans", {"results": b.query(limit=50, sort_by="id", cursor=cursor)},
+                          budget=budget)
+            assert out["rows"], "a page with rows left must return at least one"
+            ids.extend(row[out["columns"].index("id")] for row in out["rows"])
+            cursor = out.get("next_cursor")
+            if cursor is None:
+                break
+        assert ids == list(range(len(rows)))
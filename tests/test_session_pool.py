@@ -0,0 +1,105 @@
+"""Session-keyed agent pool: reuse, LRU and idle-TTL eviction, and one request at a time per session"""
+import asyncio
+import itertools
+import threading
+
+import session_pool
+from session_pool import AgentPool
+
+
+def counting_factory():
+    ids = itertools.count()
+    return lambda: f"agent-{next(ids)}"
+
+
+def test_sessions_reuse_their_agent_and_anonymous_calls_do_not():
+    pool = AgentPool(counting_factory())
+    assert pool.get("a") == pool.get("a") == "agent-0"
+    assert pool.get("b") == "agent-1"
+    assert pool.get() == "agent-2" and pool.get(None) == "agent-3"  # Throwaway, never pooled
+    assert len(pool) == 2
+    pool.discard("a")
+    assert pool.get("a") == "agent-4"
+
+
+def test_least_recently_used_session_is_evicted_first():
+    pool = AgentPool(counting_factory(), max_sessions=2)
+    pool.get("a"), pool.get("b")
+    pool.get("a")  # b is now the least recently used
+    pool.get("c")
+    assert len(pool) == 2
+    assert pool.get("a") == "agent-0" and pool.get("b") == "agent-3"
+
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_pool.time, "monotonic", lambda: now[0])
+    pool = AgentPool(counting_factory(), idle_ttl_seconds=60)
+    pool.get("a"), pool.get("b")
+    now[0] += 45
+    pool.get("b")  # Refreshes b only
+    now[0] += 30
+    assert pool.get("b") == "agent-1"
+    assert len(pool) == 1  # a idled out
+    assert pool.get("a") == "agent-2"
+
+
+def test_concurrent_first_requests_share_one_agent():
+    built = []
+    gate = threading.Barrier(8)
+
+    def factory():
+        built.append(object())
+        return built[-1]
+
+    pool = AgentPool(factory)
+    agents = []
+
+    def first_request():
+        gate.wait()
+        agents.append(pool.get("s"))
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(a) for a in agents}) == 1 and len(pool) == 1
+
+
+def test_requests_on_one_session_take_turns():
+    pool = AgentPool(counting_factory())
+    log = []
+
+    async def request(name, session_id):
+        async with pool.session(session_id) as agent:
+            log.append(("start", name, agent))
+            await asyncio.sleep(0.05)
+            log.append(("end", name, agent))
+
+    async def scenario():
+        await asyncio.gather(request("first", "s"), request("second", "s"), request("other", "t"),
+                             request("anon-1", None), request("anon-2", None))
+
+    asyncio.run(scenario())
+    same = [entry for entry in log if entry[1] in ("first", "second")]
+    assert same == [("start", "first", "agent-0"), ("end", "first", "agent-0"),
+                    ("start", "second", "agent-0"), ("end", "second", "agent-0")]
+    # Other sessions (and anonymous requests) ran alongside, not after
+    starts = [entry[1] for entry in log if entry[0] == "start"]
+    assert starts.index("other") < starts.index("second") and starts.index("anon-2") < starts.index("second")
+
+
+def test_session_is_released_when_the_request_fails():
+    pool = AgentPool(counting_factory())
+
+    async def scenario():
+        try:
+            async with pool.session("s"):
+                raise RuntimeError("stream failed")
+        except RuntimeError:
+            pass
+        async with pool.session("s") as agent:
+            return agent
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 1)) == "agent-0"
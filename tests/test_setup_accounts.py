@@ -0,0 +1,123 @@
+"""Data sync to the LOB buckets: sha256/ETag skip logic and pointer files uploaded last"""
+import hashlib
+import importlib.util
+import io
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("boto3")
+
+ROOT = Path(__file__).resolve().parent.parent
+spec = importlib.util.spec_from_file_location("setup_accounts", ROOT / "infra" / "setup_accounts.py")
+setup_accounts = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(setup_accounts)
+
+
+class StubS3:
+    """In-memory bucket: the calls sync_data_dir makes, with MD5 ETags as for single-part uploads"""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = []  # Keys in upload order
+        self.puts = []
+        self._lock = threading.Lock()
+
+    def set(self, key, body):
+        self.objects[key] = (body, f'"{hashlib.md5(body).hexdigest()}"')
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": io.BytesIO(self.objects[Key][0])}
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        objects = self.objects
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                contents = [{"Key": k, "ETag": etag} for k, (_, etag) in sorted(objects.items()) if k.startswith(Prefix)]
+                # Two pages, as S3 splits long listings
+                return [{"Contents": contents[:1]}, {"Contents": contents[1:]}] if contents else [{}]
+
+        return Paginator()
+
+    def upload_file(self, filename, bucket, key, Config=None):
+        with self._lock:
+            self.set(key, Path(filename).read_bytes())
+            self.uploads.append(key)
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": self.objects[Key][1]}
+
+    def put_object(self, Bucket, Key, Body):
+        self.set(Key, Body.encode())
+        self.puts.append(Key)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    files = {"manifest.json": "{}", "deltas/index.json": "{}", "deltas/000001.json": "{}",
+             "partitions/bank=a.ndjson": "{}\n", "partitions/bank=b.ndjson": "{}\n", "README.md": "not data"}
+    for rel, text in files.items():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(text)
+    return tmp_path
+
+
+def sync(s3, data_dir):
+    s3.uploads.clear()
+    s3.puts.clear()
+    setup_accounts.sync_data_dir(s3, "bucket", data_dir, log=lambda message="": None)
+    return sorted(key.removeprefix("data/") for key in s3.uploads)
+
+
+def sync_manifest(s3):
+    return json.loads(s3.objects[setup_accounts.SYNC_MANIFEST_KEY][0])
+
+
+def test_first_sync_uploads_data_files_with_pointer_files_last(data_dir):
+    s3 = StubS3()
+    assert sync(s3, data_dir) == ["deltas/000001.json", "deltas/index.json", "manifest.json",
+                                  "partitions/bank=a.ndjson", "partitions/bank=b.ndjson"]
+    pointers = {f"data/{p}" for p in setup_accounts.POINTER_FILES}
+    assert set(s3.uploads[-2:]) == pointers and not pointers & set(s3.uploads[:-2])
+    manifest = sync_manifest(s3)
+    assert manifest["manifest.json"] == {"sha256": setup_accounts.file_sha256(data_dir / "manifest.json"),
+                                         "etag": s3.objects["data/manifest.json"][1]}
+
+
+def test_unchanged_files_are_skipped(data_dir):
+    s3 = StubS3()
+    sync(s3, data_dir)
+    assert sync(s3, data_dir) == [] and s3.puts == []  # Nothing changed: not even the sync manifest is rewritten
+
+    (data_dir / "partitions" / "bank=a.ndjson").write_text('{"changed": true}\n')
+    assert sync(s3, data_dir) == ["partitions/bank=a.ndjson"]
+    assert sync_manifest(s3)["partitions/bank=a.ndjson"]["sha256"] == \
+        setup_accounts.file_sha256(data_dir / "partitions" / "bank=a.ndjson")
+
+
+def test_objects_changed_or_deleted_out_of_band_are_uploaded_again(data_dir):
+    s3 = StubS3()
+    sync(s3, data_dir)
+    s3.set("data/partitions/bank=b.ndjson", b"edited in the console\n")  # Same local sha256, new ETag
+    del s3.objects["data/deltas/000001.json"]
+    assert sync(s3, data_dir) == ["deltas/000001.json", "partitions/bank=b.ndjson"]
+    assert s3.objects["data/partitions/bank=b.ndjson"][0] == b"{}\n"
+    assert sync(s3, data_dir) == []
+
+
+def test_removed_local_file_drops_out_of_the_sync_manifest(data_dir):
+    s3 = StubS3()
+    sync(s3, data_dir)
+    (data_dir / "deltas" / "000001.json").unlink()
+    assert sync(s3, data_dir) == [] and s3.puts == [setup_accounts.SYNC_MANIFEST_KEY]
+    assert "deltas/000001.json" not in sync_manifest(s3)
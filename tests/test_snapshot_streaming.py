@@ -0,0 +1,88 @@
+"""The streaming (ijson) snapshot parser must see exactly what json.load sees"""
+import io
+import json
+
+import pytest
+
+pytest.importorskip("ijson")
+pytest.importorskip("aiohttp")
+
+import partition_store
+from local_gateway import ROOT, LocalS3
+from loan_data import loan_record
+from partition_store import iter_snapshot
+
+# Records before bank_name, nested record values, nested metadata before and after the banks
+TRICKY = {
+    "lob": "Corporate Banking",
+    "data_version": 3,
+    "source": {"name": "synthetic", "tags": ["a", {"b": [1, 2.5]}]},
+    "banks": [
+        {
+            "customer_loans": [
+                {"customer_name": "Acme", "amount": 12.75, "covenants": {"dscr": 1.2, "tests": [1, 2]}},
+                {"customer_name": "Beta", "amount": 3, "flags": [], "empty": {}, "missing": None},
+            ],
+            "bank_name": "Late Name Bank",
+            "regions": ["NA", "EU"],
+        },
+        {"bank_name": "Early Name Bank", "customer_loans": [{"customer_name": "Gamma", "ok": True}]},
+        {"bank_name": "No Loans Bank", "customer_loans": []},
+    ],
+    "generated_at": "2025-06-30T00:00:00",
+}
+
+
+def reference(data, records_key):
+    """(meta, records tagged with bank_name, bank metadata) straight from the parsed tree"""
+    meta = {k: v for k, v in data.items() if k != "banks"}
+    records = [dict(raw, bank_name=bank["bank_name"]) for bank in data["banks"] for raw in bank[records_key]]
+    banks = [{k: v for k, v in bank.items() if k != records_key} for bank in data["banks"]]
+    return meta, records, banks
+
+
+def streamed(body, records_key):
+    meta, records, banks = {}, [], []
+    for kind, value in iter_snapshot(io.BytesIO(body), records_key):
+        if kind == "meta":
+            meta[value[0]] = value[1]
+        elif kind == "record":
+            records.append(value)
+        else:
+            banks.append(value)
+    return meta, records, banks
+
+
+@pytest.mark.parametrize("snapshot, records_key", [
+    (ROOT / "data" / "corporate_banking" / "customer_loans.json", "customer_loans"),
+    (ROOT / "data" / "treasury_risk" / "risk_models.json", "risk_models"),
+    (None, "customer_loans"),
+])
+def test_iter_snapshot_matches_json_load(snapshot, records_key):
+    body = snapshot.read_bytes() if snapshot else json.dumps(TRICKY).encode()
+    assert streamed(body, records_key) == reference(json.loads(body), records_key)
+
+
+def test_bank_event_follows_its_records():
+    kinds = [(kind, value.get("bank_name") if kind != "meta" else None)
+             for kind, value in iter_snapshot(io.BytesIO(json.dumps(TRICKY).encode()), "customer_loans")]
+    banks = [(kind, name) for kind, name in kinds if kind != "meta"]
+    assert banks == [("record", "Late Name Bank"), ("record", "Late Name Bank"), ("bank", "Late Name Bank"),
+                     ("record", "Early Name Bank"), ("bank", "Early Name Bank"), ("bank", "No Loans Bank")]
+
+
+def test_store_loads_the_same_with_and_without_ijson(tmp_path, monkeypatch):
+    (tmp_path / "customer_loans.json").write_bytes(
+        (ROOT / "data" / "corporate_banking" / "customer_loans.json").read_bytes())
+
+    def load():
+        store = partition_store.PartitionStore(
+            LocalS3(tmp_path), "bucket", prefix="data/", snapshot_key="data/customer_loans.json",
+            records_key="customer_loans", to_record=loan_record, partition_by=("bank", "industry")
+        ).start(lazy=False)
+        return store.meta, store.partitions, list(store.rows())
+
+    streamed_load = load()
+    monkeypatch.setattr(partition_store, "ijson", None)
+    assert load() == streamed_load
+    assert streamed_load[2]
@@ -0,0 +1,84 @@
+"""Schema-driven tool routing: argument validation, registry checks, and the LOB schemas vs their functions"""
+import inspect
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from tool_routing import TOOL_NAME_KEY, ToolArgumentError, build_registry, call, compile_validator, tool_name
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "industry": {"type": "string"},
+        "exposure_millions": {"type": "number"},
+        "limit": {"type": "integer"},
+        "verbose": {"type": "boolean"},
+        "fields": {"type": "array", "items": {"type": "string"}},
+        "anything": {"description": "no type: unconstrained"},
+    },
+    "required": ["industry"],
+}
+
+
+@pytest.mark.parametrize("arguments", [
+    {"industry": "Energy"},
+    {"industry": "Energy", "exposure_millions": 100, "limit": 5, "verbose": False, "fields": ["a", "b"]},
+    {"industry": "Energy", "exposure_millions": 2.5, "anything": {"x": [1]}, "limit": None},
+])
+def test_valid_arguments_pass_through(arguments):
+    assert compile_validator("tool", SCHEMA)(arguments) is arguments
+
+
+@pytest.mark.parametrize("arguments, message", [
+    ({"industry": "Energy", "bank": "x"}, "unknown argument(s) ['bank']; expected ['anything', "
+                                          "'exposure_millions', 'fields', 'industry', 'limit', 'verbose']"),
+    ({}, "missing required argument(s) ['industry']"),
+    ({"industry": None}, "missing required argument(s) ['industry']"),
+    ({"industry": 3}, "industry must be string"),
+    ({"industry": "Energy", "limit": 2.5}, "limit must be integer"),
+    ({"industry": "Energy", "limit": True}, "limit must be integer"),  # bool is not an integer here
+    ({"industry": "Energy", "exposure_millions": "100"}, "exposure_millions must be number"),
+    ({"industry": "Energy", "verbose": 1}, "verbose must be boolean"),
+    ({"industry": "Energy", "fields": "a,b"}, "fields must be array"),
+    ({"industry": "Energy", "fields": ["a", 2]}, "fields items must be string"),
+])
+def test_invalid_arguments_name_the_tool_and_the_problem(arguments, message):
+    with pytest.raises(ToolArgumentError) as error:
+        compile_validator("calculate_expected_loss", SCHEMA)(arguments)
+    assert str(error.value) == f"calculate_expected_loss: {message}"
+
+
+def test_call_routes_validated_arguments_and_reports_errors(tmp_path):
+    schema_path = tmp_path / "tool_schema.json"
+    schema_path.write_text(json.dumps([{"name": "echo", "description": "Echo", "inputSchema": SCHEMA}]))
+    registry = build_registry(str(schema_path), {"echo": lambda **kwargs: kwargs})
+    assert call(registry, "echo", {"industry": "Energy"}) == {"industry": "Energy"}
+    assert call(registry, "echo", {"industry": 1}) == {"error": "echo: industry must be string"}
+    assert call(registry, "nope", {}) == {"error": "Unknown tool: nope. Available: ['echo']"}
+
+    with pytest.raises(ValueError, match="no function for tool echo"):
+        build_registry(str(schema_path), {})
+    with pytest.raises(ValueError, match=r"functions without a schema \['extra'\]"):
+        build_registry(str(schema_path), {"echo": print, "extra": print})
+
+
+def test_tool_name_strips_the_gateway_target():
+    def context(custom):
+        return SimpleNamespace(client_context=SimpleNamespace(custom=custom))
+
+    assert tool_name(context({TOOL_NAME_KEY: "treasury-risk-tools___query_risk_models"})) == "query_risk_models"
+    assert tool_name(context({TOOL_NAME_KEY: "query_risk_models"})) == "query_risk_models"
+    assert tool_name(context({})) is None and tool_name(None) is None
+
+
+@pytest.mark.parametrize("route", ["corporate-banking", "treasury-risk"])
+def test_lob_schemas_match_their_tool_functions(route):
+    local_gateway = pytest.importorskip("local_gateway")
+    lob = local_gateway.LocalGateway().lambdas[route]
+    for name, tool in lob.TOOLS.items():
+        parameters = inspect.signature(tool["function"]).parameters
+        schema = tool["inputSchema"]
+        assert set(schema["properties"]) == set(parameters), name
+        assert set(schema.get("required", ())) == {
+            p for p, spec in parameters.items() if spec.default is inspect.Parameter.empty}, name
@@ -0,0 +1,60 @@
+"""Critical path over nested and overlapping spans, and traces recorded across threads"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+
+
+def span(name, parent, start, end):
+    return {"trace_id": "t" * 32, "span_id": name, "parent_id": parent, "name": name,
+            "start": start, "end": end, "duration_ms": round((end - start) * 1000, 3)}
+
+
+# root 0-10: A 0.5-4 (A1 1-3 inside), B 2-6 overlapping both A and C, C 5.5-9 (C1 6-8.5, C2 7-7.5)
+SPANS = [
+    span("root", "remote-parent", 0.0, 10.0),
+    span("A", "root", 0.5, 4.0), span("A1", "A", 1.0, 3.0),
+    span("B", "root", 2.0, 6.0),
+    span("C", "root", 5.5, 9.0), span("C1", "C", 6.0, 8.5), span("C2", "C", 7.0, 7.5),
+]
+
+
+def test_critical_path_follows_the_last_finisher_back():
+    path = tracing.critical_path(SPANS)
+    # B overlaps C's start and C2 runs under C1: neither is on the path
+    assert path == [{"span": "root", "ms": 3000.0}, {"span": "A", "ms": 1500.0}, {"span": "A1", "ms": 2000.0},
+                    {"span": "C", "ms": 1000.0}, {"span": "C1", "ms": 2500.0}]
+    assert sum(p["ms"] for p in path) == pytest.approx(10000.0)
+
+
+def test_critical_path_under_another_root_and_summary():
+    assert tracing.critical_path(SPANS, root_id="C") == [{"span": "C", "ms": 1000.0}, {"span": "C1", "ms": 2500.0}]
+    assert tracing.critical_path(SPANS, root_id="missing") == [] and tracing.critical_path([]) == []
+    summary = tracing.summarize(SPANS)
+    assert summary["total_ms"] == 10000.0 and summary["critical_path"][0] == {"span": "root", "ms": 3000.0}
+
+
+def test_child_ending_after_its_parent_is_clamped():
+    # A remote subtree whose clock runs slightly ahead still counts, up to the parent's end
+    spans = [span("root", None, 0.0, 10.0), span("remote", "root", 3.0, 10.2), span("early", "root", 0.5, 2.0)]
+    assert tracing.critical_path(spans) == [{"span": "root", "ms": 1500.0}, {"span": "early", "ms": 1500.0},
+                                            {"span": "remote", "ms": 7000.0}]
+
+
+def test_spans_from_bound_threads_join_the_trace():
+    def work(i):
+        with tracing.span("work", item=i):
+            time.sleep(0.01)
+
+    with tracing.trace("request") as root:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(tracing.bind(work), range(2)))
+        with tracing.span("load"):
+            pass
+    spans = {s.name: s for s in root.spans}
+    assert [s.parent_id for s in root.spans if s.name == "work"] == [root.span_id] * 2
+    assert spans["load"].parent_id == root.span_id
+    path = [p["span"] for p in root.summary["critical_path"]]
+    assert path[0] == "request" and path.count("work") == 1
@@ -0,0 +1,31 @@
+"""Each agent and backend directory deploys standalone with its own copy of the shared modules; the copies must not drift"""
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+DEPLOY_DIRS = sorted(ROOT.glob("agents/agent-*")) + [ROOT / "backend"]
+SHARED_MODULES = ("session_pool", "fast_path", "tool_output", "model_tiering", "tracing", "deadlines",
+                  "partition_store", "record_book", "mcp_http_server", "tool_routing")
+
+
+@pytest.mark.parametrize("module", SHARED_MODULES)
+def test_copies_are_byte_identical(module):
+    copies = {path.relative_to(ROOT): path.read_bytes()
+              for path in (d / f"{module}.py" for d in DEPLOY_DIRS) if path.exists()}
+    assert len(copies) >= 2, f"{module}.py is no longer shared; drop it from SHARED_MODULES"
+    master = next(iter(copies.values()))
+    assert [str(path) for path, source in copies.items() if source != master] == [], \
+        f"{module}.py copies differ; edit one and copy it over the others"
+
+
+@pytest.mark.parametrize("route", ["corporate-banking", "treasury-risk"])
+def test_local_gateway_loads_each_lob_with_its_own_copies(route):
+    local_gateway = pytest.importorskip("local_gateway")
+    lob_dir = local_gateway.GATEWAYS[route]["lambda_dir"]
+    lob = local_gateway.LocalGateway().lambdas[route]
+    modules = {name: value for name, value in vars(lob).items() if type(value).__name__ == "module"}
+    loaded = {name: Path(module.__file__).parent for name, module in modules.items()
+              if name in local_gateway.lob_siblings(lob_dir)}
+    assert {"deadlines", "tracing", "tool_routing"} <= set(loaded)
+    assert set(loaded.values()) == {lob_dir}
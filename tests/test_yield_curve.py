@@ -0,0 +1,115 @@
+"""Yield curve construction and present-value expected loss"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from yield_curve import YieldCurve, build_curve, curve_for, portfolio_expected_loss, pv_expected_loss_result
+
+TENORS = [1 / 365, 2.0, 10.0]
+RATES = [5.33, 4.70, 4.25]  # Inverted, as in the demo snapshot
+
+
+@pytest.mark.parametrize("interpolation", ["linear", "monotone_cubic"])
+def test_curve_passes_through_its_pillars_and_is_flat_beyond_them(interpolation):
+    curve = YieldCurve(TENORS, RATES, interpolation)
+    assert curve.zero_rates(TENORS) == pytest.approx(np.array(RATES) / 100)
+    assert curve.zero_rates([0.0, 30.0]) == pytest.approx([0.0533, 0.0425])
+    assert curve.discount_factors(5.0) == pytest.approx((1 + curve.zero_rates(5.0)) ** -5.0)
+    assert curve.discount_factors(0.0) == 1.0
+
+
+def test_monotone_cubic_never_overshoots_monotone_pillars():
+    t = np.linspace(0, 12, 2401)
+    for rates in (RATES, [1.0, 2.5, 4.0], [3.0, 3.0, 3.5], [2.0, 4.5, 4.6]):
+        zero = YieldCurve(TENORS, rates, "monotone_cubic").zero_rates(t)
+        steps = np.diff(zero)
+        assert (steps <= 1e-12).all() or (steps >= -1e-12).all()
+        assert zero.min() >= min(rates) / 100 - 1e-12 and zero.max() <= max(rates) / 100 + 1e-12
+
+
+def test_linear_curve_is_np_interp():
+    t = np.linspace(0, 10, 101)
+    assert YieldCurve(TENORS, RATES, "linear").zero_rates(t) == pytest.approx(
+        np.interp(t, TENORS, np.array(RATES) / 100))
+
+
+def test_curve_rejects_bad_input():
+    with pytest.raises(ValueError, match="interpolation must be one of"):
+        YieldCurve(TENORS, RATES, "spline")
+    with pytest.raises(ValueError, match="two distinct tenors"):
+        YieldCurve([2.0, 2.0], [4.0, 4.1])
+
+
+def test_one_year_loan_matches_the_closed_form():
+    curve = YieldCurve(TENORS, RATES)
+    exposure, pd_pct, lgd_pct = 100.0, 2.0, 45.0
+    lifetime, present = portfolio_expected_loss(curve, [exposure], [1.0], [pd_pct], [lgd_pct])
+    el = exposure * pd_pct / 100 * lgd_pct / 100
+    assert lifetime[0] == pytest.approx(el)
+    assert present[0] == pytest.approx(el * float(curve.discount_factors(1.0)))
+    assert present[0] == pytest.approx(el / (1 + float(curve.zero_rates(1.0))))
+
+
+def test_multi_year_loans_sum_discounted_yearly_default_losses():
+    curve = YieldCurve(TENORS, RATES)
+    exposures, maturities, pd_pct, lgd_pct = [100.0, 50.0, 80.0], [2.5, 0.5, 7.0], [3.0, 1.0, 2.0], [40.0, 60.0, 25.0]
+    lifetime, present = portfolio_expected_loss(curve, exposures, maturities, pd_pct, lgd_pct)
+    for i, maturity in enumerate(maturities):
+        survival, lgd = 1 - pd_pct[i] / 100, exposures[i] * lgd_pct[i] / 100
+        # Year ends up to maturity, with a final (partial) period ending at maturity
+        ends = [float(k) for k in range(1, int(np.ceil(maturity)))] + [maturity]
+        starts = [0.0] + ends[:-1]
+        expected = sum(lgd * (survival ** s - survival ** e) * float(curve.discount_factors(e))
+                       for s, e in zip(starts, ends))
+        assert present[i] == pytest.approx(expected)
+        assert lifetime[i] == pytest.approx(lgd * (1 - survival ** maturity))
+        assert present[i] < lifetime[i]
+
+
+RISK_ROWS = [
+    {"bank": "Wells Fargo", "industry": "Energy", "probability_of_default_pct": 2.0, "loss_given_default_pct": 40.0},
+    {"bank": "Goldman Sachs", "industry": "Energy", "probability_of_default_pct": 4.0, "loss_given_default_pct": 50.0},
+    {"bank": "Wells Fargo", "industry": "Technology", "probability_of_default_pct": 1.0, "loss_given_default_pct": 30.0},
+]
+
+
+def test_pv_result_averages_industry_models_and_totals_the_book():
+    curve = YieldCurve(TENORS, RATES)
+    result = pv_expected_loss_result(curve, RISK_ROWS, [100.0, 50.0, 25.0], [1.0, 3.0, 2.0],
+                                     ["Energy", "technology", "ENERGY"])
+    by_industry = {r["industry"]: r for r in result["results"]}
+    assert by_industry["Energy"]["loans"] == 2 and by_industry["Energy"]["exposure_millions"] == 125.0
+    assert by_industry["Energy"]["average_pd_pct"] == 3.0 and by_industry["Energy"]["average_lgd_pct"] == 45.0
+    _, present = portfolio_expected_loss(curve, [100.0, 50.0, 25.0], [1.0, 3.0, 2.0], [3.0, 1.0, 3.0],
+                                         [45.0, 30.0, 45.0])
+    assert result["pv_el_millions"] == pytest.approx(present.sum(), abs=1e-4)
+    assert result["weighted_maturity_years"] == round((100 + 150 + 50) / 175, 2)
+
+    wells = pv_expected_loss_result(curve, RISK_ROWS, [100.0], [1.0], "Energy", bank_name="wells fargo")
+    assert wells["results"][0]["average_pd_pct"] == 2.0
+    with pytest.raises(ValueError, match="No risk models found for industry: retail"):
+        pv_expected_loss_result(curve, RISK_ROWS, [1.0], [1.0], "Retail")
+    with pytest.raises(ValueError, match="equal-length"):
+        pv_expected_loss_result(curve, RISK_ROWS, [1.0, 2.0], [1.0], "Energy")
+    with pytest.raises(ValueError, match="maturities positive"):
+        pv_expected_loss_result(curve, RISK_ROWS, [1.0], [0.0], "Energy")
+
+
+class EmptyStore:
+    series = {}
+
+    def ensure_loaded(self):
+        return self
+
+
+def test_curve_from_the_snapshot_is_built_once_per_set_of_quotes():
+    snapshot = {"fed_funds_rate": 5.33, "treasury_2y_yield": 4.70, "treasury_10y_yield": 4.25, "note": "x"}
+    curve = curve_for(EmptyStore(), snapshot)
+    assert curve is curve_for(EmptyStore(), dict(snapshot))
+    assert curve.describe()["pillars"] == {"overnight": 5.33, "2y": 4.7, "10y": 4.25}
+    assert curve is not curve_for(EmptyStore(), dict(snapshot, treasury_10y_yield=4.30))  # A correction
+    assert build_curve(((2.0, 4.7), (10.0, 4.25))).interpolation == "monotone_cubic"
+    with pytest.raises(ValueError, match="only the current curve"):
+        curve_for(EmptyStore(), snapshot, as_of="2024-01-01")
+    with pytest.raises(ValueError, match="Not enough market data"):
+        curve_for(EmptyStore(), {"treasury_10y_yield": 4.25})